@@ -0,0 +1,3 @@
+"""
+Offline benchmarks of the summarizer, see run_benchmark.py
+"""
@@ -0,0 +1,59 @@
+"""
+Micro-benchmark of the per-run setup of the agents: building the tool calling agent and its executor
+against getting the executor (and tools string) cached by the agent
+
+    python -m benchmarks.agent_setup_benchmark --runs 200
+"""
+import argparse
+import importlib
+import time
+import tracemalloc
+from typing import Callable
+
+from .harness import BenchmarkConfig, install_fakes
+
+
+def measure(setup: Callable[[], object], runs: int) -> dict:
+    """
+    Mean wall time and peak traced memory of a setup function, after a first warm-up call
+    """
+    setup()
+    started_at = time.perf_counter()
+    for _ in range(runs):
+        setup()
+    wall_us = (time.perf_counter() - started_at) / runs * 1_000_000
+
+    tracemalloc.start()
+    for _ in range(runs):
+        setup()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"mean_us": round(wall_us, 2), "peak_kb": round(peak / 1024, 2)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-run setup cost of the agents")
+    parser.add_argument("--runs", type=int, default=200)
+    runs = parser.parse_args().runs
+
+    install_fakes(BenchmarkConfig(llm_latency_ms=0, api_latency_ms=0))
+    # The services are imported first like the app does, the tag tools and the agents import each other
+    importlib.import_module("services")
+    agents = importlib.import_module("agents")
+
+    print(f"{'agent':<24} {'setup':<10} {'mean us':>10} {'peak kb':>10}")
+    for agent_class in (agents.GmailSummarizerAgent, agents.SlackSummarizerAgent, agents.GeneralSummarizerAgent, agents.TagExtractorAgent):
+        agent = agent_class()
+        # The setup done by every execute_agent call before the executors were cached
+        uncached = measure(lambda: (
+            agent._build_agent_executor(agent.tools),
+            "\n".join(f"{tool.__class__.__name__}: {tool.description}" for tool in agent.tools)
+        ), runs)
+        cached = measure(lambda: (agent._get_agent_executor(), agent._get_agent_tools_string()), runs)
+        for setup_name, result in (("build", uncached), ("cached", cached)):
+            print(f"{agent_class.__name__:<24} {setup_name:<10} {result['mean_us']:>10} {result['peak_kb']:>10}")
+
+
+if __name__ == "__main__":
+    main()
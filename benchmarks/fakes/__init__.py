@@ -0,0 +1,3 @@
+"""
+Local stand-ins of the external services used by the summarizer (OpenAI, Slack, Gmail, DynamoDB, Pinecone and Tavily)
+"""
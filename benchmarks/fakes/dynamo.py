@@ -0,0 +1,173 @@
+import copy
+import re
+import threading
+from collections import Counter
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from botocore.exceptions import ClientError
+
+
+def _check_types(value: Any) -> None:
+    """
+    Reject the floats like boto3 does, the items must use Decimal
+    """
+    if isinstance(value, float):
+        raise TypeError("Float types are not supported. Use Decimal types instead.")
+    if isinstance(value, dict):
+        for item in value.values():
+            _check_types(item)
+    elif isinstance(value, (list, tuple, set)):
+        for item in value:
+            _check_types(item)
+
+
+def _client_error(code: str, operation: str) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": code}}, operation)
+
+
+class InMemoryTable:
+    """
+    In-memory stand-in of a boto3 DynamoDB Table with a single hash key
+    It supports the operations used by the services: load, get_item, put_item, delete_item,
+    update_item (SET/ADD/REMOVE, attribute_exists conditions), scan and batch_writer
+    """
+
+    def __init__(self, name: str, hash_key: str = "uuid"):
+        self.name = name
+        self.table_name = name
+        self.hash_key = hash_key
+        self.items: Dict[str, dict] = {}
+        self.calls: Counter = Counter()
+        self._lock = threading.RLock()
+
+    def _record(self, operation: str) -> None:
+        with self._lock:
+            self.calls[operation] += 1
+
+    def load(self) -> None:
+        self._record("DescribeTable")
+
+    def get_item(self, Key: dict, **kwargs: Any) -> dict:
+        self._record("GetItem")
+        with self._lock:
+            item = self.items.get(Key[self.hash_key])
+            return {"Item": copy.deepcopy(item)} if item is not None else {}
+
+    def put_item(self, Item: dict, **kwargs: Any) -> dict:
+        self._record("PutItem")
+        _check_types(Item)
+        with self._lock:
+            self.items[Item[self.hash_key]] = copy.deepcopy(Item)
+        return {}
+
+    def delete_item(self, Key: dict, **kwargs: Any) -> dict:
+        self._record("DeleteItem")
+        with self._lock:
+            self.items.pop(Key[self.hash_key], None)
+        return {}
+
+    def scan(self, Limit: int = None, ExclusiveStartKey: dict = None, **kwargs: Any) -> dict:
+        self._record("Scan")
+        with self._lock:
+            keys = sorted(self.items)
+            if ExclusiveStartKey:
+                keys = [key for key in keys if key > ExclusiveStartKey[self.hash_key]]
+            page_keys = keys[:Limit] if Limit else keys
+            response = {"Items": [copy.deepcopy(self.items[key]) for key in page_keys], "Count": len(page_keys)}
+            if Limit and len(keys) > Limit:
+                response["LastEvaluatedKey"] = {self.hash_key: page_keys[-1]}
+            return response
+
+    @staticmethod
+    def _resolve(token: str, names: Dict[str, str]) -> str:
+        return names.get(token, token)
+
+    def _check_condition(self, condition: Optional[str], item: Optional[dict], names: Dict[str, str]) -> None:
+        if not condition:
+            return
+        for function, attribute in re.findall(r"(attribute_exists|attribute_not_exists)\(\s*([#\w]+)\s*\)", condition):
+            exists = item is not None and self._resolve(attribute, names) in item
+            if exists != (function == "attribute_exists"):
+                raise _client_error("ConditionalCheckFailedException", "UpdateItem")
+
+    def update_item(
+        self,
+        Key: dict,
+        UpdateExpression: str,
+        ExpressionAttributeNames: Dict[str, str] = None,
+        ExpressionAttributeValues: Dict[str, Any] = None,
+        ConditionExpression: str = None,
+        ReturnValues: str = "NONE",
+        **kwargs: Any
+    ) -> dict:
+        self._record("UpdateItem")
+        names = ExpressionAttributeNames or {}
+        values = ExpressionAttributeValues or {}
+        _check_types(values)
+
+        with self._lock:
+            current_item = self.items.get(Key[self.hash_key])
+            self._check_condition(ConditionExpression, current_item, names)
+            item = copy.deepcopy(current_item) if current_item is not None else dict(Key)
+
+            clauses = re.split(r"\b(SET|ADD|REMOVE)\b", UpdateExpression)
+            for action, clause in zip(clauses[1::2], clauses[2::2]):
+                for assignment in filter(None, (part.strip() for part in clause.split(","))):
+                    if action == "SET":
+                        attribute, value = (part.strip() for part in assignment.split("=", 1))
+                        if_not_exists = re.match(r"if_not_exists\(\s*([#\w]+)\s*,\s*(:\w+)\s*\)", value)
+                        attribute = self._resolve(attribute, names)
+                        if if_not_exists:
+                            item.setdefault(attribute, copy.deepcopy(values[if_not_exists.group(2)]))
+                        else:
+                            item[attribute] = copy.deepcopy(values[value])
+                    elif action == "ADD":
+                        attribute, value = assignment.split()
+                        attribute = self._resolve(attribute, names)
+                        item[attribute] = item.get(attribute, Decimal(0)) + Decimal(str(values[value]))
+                    else:
+                        item.pop(self._resolve(assignment, names), None)
+
+            self.items[Key[self.hash_key]] = item
+            return {"Attributes": copy.deepcopy(item)} if ReturnValues == "ALL_NEW" else {}
+
+    def batch_writer(self, **kwargs: Any) -> "_BatchWriter":
+        return _BatchWriter(self)
+
+
+class _BatchWriter:
+    def __init__(self, table: InMemoryTable):
+        self.table = table
+        self.pending: List[dict] = []
+
+    def __enter__(self) -> "_BatchWriter":
+        return self
+
+    def put_item(self, Item: dict) -> None:
+        _check_types(Item)
+        self.pending.append(Item)
+
+    def __exit__(self, *exc_info: Any) -> None:
+        # batch_write_item writes up to 25 items per request
+        for start in range(0, len(self.pending), 25):
+            self.table._record("BatchWriteItem")
+            with self.table._lock:
+                for item in self.pending[start:start + 25]:
+                    self.table.items[item[self.table.hash_key]] = copy.deepcopy(item)
+
+
+class InMemoryDynamoResource:
+    """
+    Stand-in of the boto3 dynamodb resource, every table name gets its own in-memory table
+    """
+
+    def __init__(self):
+        self.tables: Dict[str, InMemoryTable] = {}
+        self._lock = threading.Lock()
+
+    def Table(self, name: str) -> InMemoryTable:
+        with self._lock:
+            if name not in self.tables:
+                self.tables[name] = InMemoryTable(name)
+            return self.tables[name]
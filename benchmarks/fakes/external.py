@@ -0,0 +1,66 @@
+import json
+import threading
+from collections import Counter
+from typing import Any, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForToolRun
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.tools import BaseTool
+from langchain_core.vectorstores import InMemoryVectorStore
+
+
+class FakePinecone:
+    """
+    Stand-in of the pinecone client, the indexes only exist in memory
+    """
+    indexes: dict = {}
+
+    def __init__(self, api_key: str = None, **kwargs: Any):
+        self.api_key = api_key
+
+    def list_indexes(self) -> List[dict]:
+        return [{"name": name} for name in self.indexes]
+
+    def create_index(self, name: str, **kwargs: Any) -> None:
+        self.indexes[name] = kwargs
+
+    def describe_index(self, name: str) -> Any:
+        return type("IndexDescription", (), {"status": {"ready": True}})()
+
+    def Index(self, name: str) -> dict:
+        return {"name": name}
+
+
+def build_in_memory_vector_store(index: Any = None, embedding: Any = None, **kwargs: Any) -> InMemoryVectorStore:
+    """
+    Stand-in of PineconeVectorStore, an in-memory vector store with the same add_documents/similarity_search api
+    """
+    return InMemoryVectorStore(embedding=embedding)
+
+
+def build_fake_embeddings(**kwargs: Any) -> DeterministicFakeEmbedding:
+    """
+    Stand-in of OpenAIEmbeddings, deterministic vectors computed locally
+    """
+    return DeterministicFakeEmbedding(size=256)
+
+
+web_search_calls: Counter = Counter()
+_web_search_calls_lock = threading.Lock()
+
+
+class FakeWebSearchTool(BaseTool):
+    """
+    Stand-in of TavilySearchResults with canned results
+    """
+    name: str = "web_search"
+    description: str = "Search the web"
+
+    def _run(self, query: str, run_manager: Optional[CallbackManagerForToolRun] = None) -> str:
+        with _web_search_calls_lock:
+            web_search_calls["search"] += 1
+        return json.dumps([{"url": "https://example.com", "content": f"Definition of {query}"}])
+
+
+def build_fake_web_search(name: str = "web_search", description: str = "Search the web", **kwargs: Any) -> FakeWebSearchTool:
+    return FakeWebSearchTool(name=name, description=description)
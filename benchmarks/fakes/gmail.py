@@ -0,0 +1,177 @@
+import base64
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from email.mime.text import MIMEText
+from typing import Any, Callable, Dict, List, Optional
+
+from googleapiclient.discovery import Resource
+
+
+class SyntheticMailbox:
+    """
+    Synthetic gmail mailbox with a number of emails per day around the benchmark day
+    """
+
+    def __init__(self, day: str, emails_per_day: int = 20, days_around: int = 1):
+        self.messages: Dict[str, dict] = {}
+        day_start = datetime.strptime(day, "%Y-%m-%d")
+
+        for day_offset in range(-days_around, days_around + 1):
+            current_day = day_start + timedelta(days=day_offset)
+            for index in range(emails_per_day):
+                message_id = f"{current_day.strftime('%Y%m%d')}{index:04d}"
+                sent_at = current_day + timedelta(minutes=30 + index * (1380 // max(emails_per_day, 1)))
+                body = f"Hello,\n\nThis is the email {index} of {current_day.strftime('%Y-%m-%d')} about project {index % 7}.\n" * 3
+                mime = MIMEText(body)
+                mime["Subject"] = f"Update {index} on project {index % 7}"
+                mime["From"] = f"sender{index % 5}@example.com"
+                mime["To"] = "me@example.com"
+                mime["Date"] = sent_at.strftime("%a, %d %b %Y %H:%M:%S +0000")
+                self.messages[message_id] = {
+                    "id": message_id,
+                    "threadId": f"t{message_id}",
+                    "snippet": body[:100],
+                    "internalDate": str(int(sent_at.timestamp() * 1000)),
+                    "labelIds": ["INBOX"],
+                    "raw": base64.urlsafe_b64encode(mime.as_bytes()).decode(),
+                    "payload": {
+                        "mimeType": "text/plain",
+                        "headers": [{"name": name, "value": value} for name, value in mime.items()],
+                        "body": {"data": base64.urlsafe_b64encode(body.encode()).decode(), "size": len(body)}
+                    }
+                }
+
+    def search(self, query: str = "") -> List[dict]:
+        """
+        Search the messages with the after:/before: operators of the query (YYYY/MM/DD or YYYY-MM-DD), newest first
+        """
+        after = re.search(r"after:(\d{4}[/-]\d{2}[/-]\d{2})", query or "")
+        before = re.search(r"before:(\d{4}[/-]\d{2}[/-]\d{2})", query or "")
+        after_ms = datetime.strptime(after.group(1).replace("/", "-"), "%Y-%m-%d").timestamp() * 1000 if after else None
+        before_ms = datetime.strptime(before.group(1).replace("/", "-"), "%Y-%m-%d").timestamp() * 1000 if before else None
+
+        found = [
+            message for message in self.messages.values()
+            if (after_ms is None or int(message["internalDate"]) >= after_ms)
+            and (before_ms is None or int(message["internalDate"]) < before_ms)
+        ]
+        return sorted(found, key=lambda message: int(message["internalDate"]), reverse=True)
+
+
+class FakeRequest:
+    """
+    Request of the fake gmail api, executed lazily like the googleapiclient HttpRequest
+    """
+
+    def __init__(self, resource: "FakeGmailResource", method: str, handler: Callable[[], dict]):
+        self.resource = resource
+        self.method = method
+        self.handler = handler
+
+    def execute(self, **kwargs: Any) -> dict:
+        self.resource.record_call(self.method)
+        return self.handler()
+
+
+class FakeBatchRequest:
+    """
+    Batch of requests of the fake gmail api, executed in a single round-trip
+    """
+
+    def __init__(self, resource: "FakeGmailResource", callback: Callable = None):
+        self.resource = resource
+        self.callback = callback
+        self.requests: List[tuple] = []
+
+    def add(self, request: FakeRequest, callback: Callable = None, request_id: str = None) -> None:
+        self.requests.append((request_id or str(len(self.requests)), request, callback))
+
+    def execute(self, **kwargs: Any) -> None:
+        self.resource.record_call("batch")
+        for request_id, request, callback in self.requests:
+            callback = callback or self.callback
+            try:
+                response, exception = request.handler(), None
+            except Exception as e:
+                response, exception = None, e
+            self.resource.record_call(request.method, latency=False)
+            if callback:
+                callback(request_id, response, exception)
+
+
+class FakeGmailResource(Resource):
+    """
+    Stand-in of the gmail api resource (users().messages() and users().threads()) backed by the synthetic mailbox
+    It is a Resource subclass so the langchain gmail tools accept it, each round-trip waits api_latency_ms
+    """
+
+    def __init__(self, mailbox: SyntheticMailbox, api_latency_ms: float = 0.0):
+        self.mailbox = mailbox
+        self.api_latency_ms = api_latency_ms
+        self.calls: Counter = Counter()
+        self._calls_lock = threading.Lock()
+
+    def record_call(self, method: str, latency: bool = True) -> None:
+        with self._calls_lock:
+            self.calls[method] += 1
+        if latency:
+            time.sleep(self.api_latency_ms / 1000)
+
+    def users(self) -> "FakeGmailResource":
+        return self
+
+    def messages(self) -> "FakeGmailResource":
+        return self
+
+    def threads(self) -> "_FakeThreads":
+        return _FakeThreads(self)
+
+    def new_batch_http_request(self, callback: Callable = None) -> FakeBatchRequest:
+        return FakeBatchRequest(self, callback)
+
+    def list(self, userId: str = "me", q: str = "", maxResults: int = 100, pageToken: Optional[str] = None, **kwargs: Any) -> FakeRequest:
+        def handler() -> dict:
+            found = self.mailbox.search(q)
+            offset = int(pageToken) if pageToken else 0
+            page = found[offset:offset + maxResults]
+            response = {"messages": [{"id": message["id"], "threadId": message["threadId"]} for message in page], "resultSizeEstimate": len(found)}
+            if offset + maxResults < len(found):
+                response["nextPageToken"] = str(offset + maxResults)
+            return response
+        return FakeRequest(self, "messages.list", handler)
+
+    def get(self, userId: str = "me", id: str = None, format: str = "full", metadataHeaders: List[str] = None, **kwargs: Any) -> FakeRequest:
+        def handler() -> dict:
+            message = self.mailbox.messages[id]
+            response = {key: value for key, value in message.items() if key not in ("raw", "payload")}
+            if format == "raw":
+                response["raw"] = message["raw"]
+            elif format == "metadata":
+                headers = message["payload"]["headers"]
+                if metadataHeaders:
+                    headers = [header for header in headers if header["name"] in metadataHeaders]
+                response["payload"] = {"mimeType": message["payload"]["mimeType"], "headers": headers}
+            else:
+                response["payload"] = message["payload"]
+            return response
+        return FakeRequest(self, "messages.get", handler)
+
+
+class _FakeThreads:
+    def __init__(self, resource: FakeGmailResource):
+        self.resource = resource
+
+    def list(self, userId: str = "me", q: str = "", maxResults: int = 100, **kwargs: Any) -> FakeRequest:
+        def handler() -> dict:
+            found = self.resource.mailbox.search(q)[:maxResults]
+            return {"threads": [{"id": message["threadId"], "snippet": message["snippet"]} for message in found]}
+        return FakeRequest(self.resource, "threads.list", handler)
+
+    def get(self, userId: str = "me", id: str = None, **kwargs: Any) -> FakeRequest:
+        def handler() -> dict:
+            messages = [message for message in self.resource.mailbox.messages.values() if message["threadId"] == id]
+            return {"id": id, "messages": [{**message, "payload": message["payload"]} for message in messages]}
+        return FakeRequest(self.resource, "threads.get", handler)
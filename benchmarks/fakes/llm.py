@@ -0,0 +1,79 @@
+import asyncio
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import PrivateAttr
+
+Responder = Callable[[List[BaseMessage], List[str]], AIMessage]
+"""Builds the answer of the model from the conversation and the names of the bound tools"""
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count (4 characters per token), enough to exercise the token accounting
+    """
+    return len(text) // 4 + 1
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Chat model that answers with a scripted responder after a configurable latency
+    It supports bind_tools, so it can drive the tool calling agents like the real model,
+    and it reports an estimated usage_metadata on every answer
+    """
+    responder: Any
+    latency_ms: float = 0.0
+    calls: int = 0
+    _calls_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-chat-model"
+
+    def bind_tools(self, tools: list, **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def _answer(self, messages: List[BaseMessage], **kwargs: Any) -> ChatResult:
+        with self._calls_lock:
+            self.calls += 1
+
+        tool_names = [tool["function"]["name"] for tool in kwargs.get("tools", [])]
+        message: AIMessage = self.responder(messages, tool_names)
+
+        prompt_tokens = sum(estimate_tokens(str(prompt_message.content)) for prompt_message in messages)
+        completion_tokens = estimate_tokens(str(message.content) + str(message.tool_calls))
+        message.usage_metadata = {
+            "input_tokens": prompt_tokens,
+            "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+        return ChatResult(
+            generations=[ChatGeneration(message=message)],
+            llm_output={"model_name": "gpt-4o-mini"}
+        )
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        time.sleep(self.latency_ms / 1000)
+        return self._answer(messages, **kwargs)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        await asyncio.sleep(self.latency_ms / 1000)
+        return self._answer(messages, **kwargs)
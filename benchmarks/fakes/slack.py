@@ -0,0 +1,186 @@
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+class SyntheticWorkspace:
+    """
+    Synthetic slack workspace with N channels and M messages per channel on the benchmark day
+    Part of the messages are written by (or mention) the summarized user and part of them open a thread
+    """
+
+    def __init__(
+        self,
+        day: str,
+        member_id: str,
+        channels: int = 20,
+        messages_per_channel: int = 100,
+        users: int = 50,
+        user_message_ratio: float = 0.2,
+        thread_ratio: float = 0.3,
+        replies_per_thread: int = 4,
+        seed: int = 42
+    ):
+        randomizer = random.Random(seed)
+        self.member_id = member_id
+        self.users = [
+            {
+                "id": member_id if index == 0 else f"U{index:05d}",
+                "name": f"user{index}",
+                "real_name": f"User {index}",
+                "profile": {"display_name": f"user{index}", "real_name": f"User {index}", "title": "Engineer"}
+            }
+            for index in range(users)
+        ]
+        self.channels: List[Dict[str, Any]] = []
+        self.messages: Dict[str, List[Dict[str, Any]]] = {}
+        self.replies: Dict[tuple, List[Dict[str, Any]]] = {}
+
+        day_start = datetime.strptime(day, "%Y-%m-%d").timestamp()
+        for channel_index in range(channels):
+            channel_id = f"C{channel_index:05d}"
+            self.channels.append({
+                "id": channel_id,
+                "name": f"channel-{channel_index}",
+                "created": int(day_start) - 86400 * 30,
+                "num_members": users,
+                "is_member": True
+            })
+
+            channel_messages = []
+            for message_index in range(messages_per_channel):
+                ts = f"{day_start + 60 + message_index * (86000 / max(messages_per_channel, 1)):.6f}"
+                from_user = randomizer.random() < user_message_ratio
+                author = member_id if from_user and randomizer.random() < 0.5 else randomizer.choice(self.users)["id"]
+                text = f"Message {message_index} in channel-{channel_index} about project {randomizer.randint(1, 10)}"
+                if from_user and author != member_id:
+                    text += f" <@{member_id}> can you check it?"
+                message = {"type": "message", "user": author, "text": text, "ts": ts, "team": "T00001", "blocks": []}
+
+                if randomizer.random() < thread_ratio:
+                    message["thread_ts"] = ts
+                    message["reply_count"] = replies_per_thread
+                    self.replies[(channel_id, ts)] = [message] + [
+                        {
+                            "type": "message",
+                            "user": randomizer.choice(self.users)["id"],
+                            "text": f"Reply {reply_index} to message {message_index}",
+                            "ts": f"{float(ts) + reply_index + 1:.6f}",
+                            "thread_ts": ts
+                        }
+                        for reply_index in range(replies_per_thread)
+                    ]
+                channel_messages.append(message)
+
+            # conversations.history returns the newest messages first
+            self.messages[channel_id] = list(reversed(channel_messages))
+
+
+class FakeWebClient:
+    """
+    Stand-in of slack_sdk.WebClient backed by the synthetic workspace
+    Every instance shares the workspace and the call counters, each API call waits api_latency_ms
+    """
+    workspace: Optional[SyntheticWorkspace] = None
+    api_latency_ms: float = 0.0
+    calls: Counter = Counter()
+    _calls_lock = threading.Lock()
+
+    def __init__(self, token: str = None, **kwargs: Any):
+        self.token = token
+
+    def _call(self, method: str) -> SyntheticWorkspace:
+        with self._calls_lock:
+            FakeWebClient.calls[method] += 1
+        time.sleep(self.api_latency_ms / 1000)
+        return self.workspace
+
+    @staticmethod
+    def _paginate(items: list, cursor: Optional[str], limit: int) -> tuple[list, dict]:
+        offset = int(cursor) if cursor else 0
+        page = items[offset:offset + limit]
+        next_cursor = str(offset + limit) if offset + limit < len(items) else ""
+        return page, {"next_cursor": next_cursor}
+
+    @staticmethod
+    def _in_range(ts: str, oldest: Optional[str], latest: Optional[str]) -> bool:
+        return (oldest is None or float(ts) >= float(oldest)) and (latest is None or float(ts) <= float(latest))
+
+    def users_list(self, cursor: str = None, limit: int = 1000, **kwargs: Any) -> dict:
+        workspace = self._call("users.list")
+        members, metadata = self._paginate(workspace.users, cursor, limit)
+        return {"ok": True, "members": members, "response_metadata": metadata}
+
+    def users_info(self, user: str, **kwargs: Any) -> dict:
+        workspace = self._call("users.info")
+        for member in workspace.users:
+            if member["id"] == user:
+                return {"ok": True, "user": member}
+        return {"ok": False, "error": "user_not_found"}
+
+    def conversations_list(self, cursor: str = None, limit: int = 1000, **kwargs: Any) -> dict:
+        workspace = self._call("conversations.list")
+        channels, metadata = self._paginate(workspace.channels, cursor, limit)
+        return {"ok": True, "channels": channels, "response_metadata": metadata}
+
+    def users_conversations(self, cursor: str = None, limit: int = 1000, **kwargs: Any) -> dict:
+        workspace = self._call("users.conversations")
+        channels, metadata = self._paginate(workspace.channels, cursor, limit)
+        return {"ok": True, "channels": channels, "response_metadata": metadata}
+
+    def conversations_history(
+        self,
+        channel: str,
+        cursor: str = None,
+        limit: int = 100,
+        oldest: str = None,
+        latest: str = None,
+        **kwargs: Any
+    ) -> dict:
+        workspace = self._call("conversations.history")
+        messages = [message for message in workspace.messages.get(channel, []) if self._in_range(message["ts"], oldest, latest)]
+        page, metadata = self._paginate(messages, cursor, limit)
+        return {"ok": True, "messages": page, "has_more": bool(metadata["next_cursor"]), "response_metadata": metadata}
+
+    def conversations_replies(
+        self,
+        channel: str,
+        ts: str,
+        cursor: str = None,
+        limit: int = 100,
+        oldest: str = None,
+        latest: str = None,
+        **kwargs: Any
+    ) -> dict:
+        workspace = self._call("conversations.replies")
+        replies = [reply for reply in workspace.replies.get((channel, ts), []) if self._in_range(reply["ts"], oldest, latest)]
+        page, metadata = self._paginate(replies, cursor, limit)
+        return {"ok": True, "messages": page, "has_more": bool(metadata["next_cursor"]), "response_metadata": metadata}
+
+    def search_messages(self, query: str, count: int = 100, page: int = 1, **kwargs: Any) -> dict:
+        workspace = self._call("search.messages")
+        matches = [
+            {**message, "channel": {"id": channel["id"], "name": channel["name"]}}
+            for channel in workspace.channels
+            for message in workspace.messages[channel["id"]]
+            if message["user"] == workspace.member_id or f"<@{workspace.member_id}>" in message["text"]
+        ]
+        start = (page - 1) * count
+        return {
+            "ok": True,
+            "messages": {
+                "matches": matches[start:start + count],
+                "paging": {"count": count, "total": len(matches), "page": page, "pages": -(-len(matches) // count)}
+            }
+        }
+
+    def chat_postMessage(self, channel: str, text: str = None, **kwargs: Any) -> dict:
+        self._call("chat.postMessage")
+        return {"ok": True, "channel": channel, "ts": f"{time.time():.6f}", "message": {"text": text}}
+
+    def chat_update(self, channel: str, ts: str, text: str = None, **kwargs: Any) -> dict:
+        self._call("chat.update")
+        return {"ok": True, "channel": channel, "ts": ts, "text": text}
@@ -0,0 +1,400 @@
+"""
+End-to-end benchmark harness of lambda_handler against local stand-ins of every external service
+The fakes are installed before the app is imported, so the module level clients of the app are built with them
+"""
+import contextlib
+import importlib
+import importlib.util
+import io
+import json
+import math
+import os
+import sys
+import time
+import tracemalloc
+import types
+import uuid
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+
+from .fakes.dynamo import InMemoryDynamoResource
+from .fakes.external import FakePinecone, build_fake_embeddings, build_fake_web_search, build_in_memory_vector_store, web_search_calls
+from .fakes.gmail import FakeGmailResource, SyntheticMailbox
+from .fakes.llm import ScriptedChatModel
+from .fakes.slack import FakeWebClient, SyntheticWorkspace
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+BENCHMARK_ENV = {
+    "OPENAI_API_KEY": "benchmark",
+    "DEFAULT_OPEN_AI_MODEL": "gpt-4o-mini",
+    "DEFAULT_TEMPERATURE": "0",
+    "DEFAULT_OPENAI_EMBEDDING_MODEL": "text-embedding-3-large",
+    "TAVILY_API_KEY": "benchmark",
+    "PINECONE_API_KEY": "benchmark",
+    "BASE_PINECONE_INDEX_NAME": "benchmark-index",
+    "GOOGLE_DELEGATED_USER": "me@example.com",
+    "SLACK_USER_TOKEN": "xoxp-benchmark",
+    "SLACK_USER_DISPLAY_NAME": "user0",
+    "SLACK_USER_FULL_NAME": "User 0",
+    "DYNAMODB_REGION_NAME": "us-east-1",
+    "TAGS_TABLE": "summaries_tags",
+    "SUMMARIES_TABLE": "summaries",
+    "USAGE_TABLE": "summaries_usage",
+    "METRICS_ENABLED": "false",
+    # The stand-ins have no rate limits, the client-side limiter would only add waits
+    "SLACK_RATE_LIMIT_ENABLED": "false",
+    "LOG_LEVEL": "WARNING",
+    "LANGCHAIN_TRACING_V2": "false",
+    "LANGSMITH_TRACING": "false"
+}
+"""Environment of the benchmark, the variables already set in the environment are kept"""
+
+BENCHMARK_TAGS = [
+    {"name": "Project 1", "type": "project", "related_projects": [], "related_people": ["User 1"]},
+    {"name": "User 1", "type": "person", "related_projects": ["Project 1"], "related_people": []},
+    {"name": "Development", "type": "area", "related_projects": ["Project 1"], "related_people": []}
+]
+
+
+@dataclass
+class BenchmarkConfig:
+    """
+    Size of the synthetic workspace and mailbox, latencies of the stand-ins and number of iterations
+    """
+    day: str = "2024-12-03"
+    member_id: str = "U00000"
+    channels: int = 20
+    messages_per_channel: int = 100
+    users: int = 50
+    emails_per_day: int = 20
+    llm_latency_ms: float = 50.0
+    api_latency_ms: float = 5.0
+    iterations: int = 5
+    warmup: int = 1
+    gmail_dummy_mode: bool = False
+    llm_cache: bool = False
+
+    @property
+    def next_day(self) -> str:
+        return (datetime.strptime(self.day, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+class PipelineResponder:
+    """
+    Scripted answers of the model for each agent of the pipeline, the agent is recognized by its bound tools
+    or, for the prompts without tools, by the data section of the prompt
+    The source agents call their main tool once and summarize its output, the tag extractor reads and creates tags
+    """
+
+    def __init__(self, config: BenchmarkConfig):
+        self.config = config
+
+    @staticmethod
+    def _tool_call(name: str, args: dict) -> AIMessage:
+        return AIMessage(content="", tool_calls=[{"name": name, "args": args, "id": f"call_{uuid.uuid4().hex[:12]}"}])
+
+    @staticmethod
+    def _final(payload: dict) -> AIMessage:
+        return AIMessage(content=json.dumps(payload, ensure_ascii=False))
+
+    @staticmethod
+    def _count_tool_results(messages: List[BaseMessage]) -> int:
+        """
+        Count the tool results of the conversation, the agent prompts are single templates
+        so the agent scratchpad (with the tool messages) is rendered as text inside the prompt
+        """
+        tool_messages = sum(1 for message in messages if isinstance(message, ToolMessage))
+        rendered_tool_messages = sum(str(message.content).count("tool_call_id=") for message in messages)
+        return tool_messages + rendered_tool_messages
+
+    def __call__(self, messages: List[BaseMessage], tool_names: List[str]) -> AIMessage:
+        tool_results = self._count_tool_results(messages)
+        tool_output_chars = sum(len(str(message.content)) for message in messages)
+
+        prompt_text = "\n".join(str(message.content) for message in messages)
+
+        if "<slack_partial_summaries>" in prompt_text:
+            return self._final({
+                "day": self.config.day,
+                "key_points": ["Reviewed project 1", "Answered mentions"],
+                "important_tasks": ["Follow up with User 1"],
+                "general_detailed_summary": "Slack activity of the day"
+            })
+
+        if "get_conversations" in tool_names or "<slack_conversations>" in prompt_text:
+            if "get_conversations" in tool_names and not tool_results:
+                return self._tool_call("get_conversations", {"day": self.config.day, "user_id": self.config.member_id})
+            return self._final({
+                "day": self.config.day,
+                "general_summary": "Slack activity of the day",
+                "key_points": ["Reviewed project 1", "Answered mentions"],
+                "source_chars": tool_output_chars
+            })
+
+        if "search_gmail" in tool_names or "<gmail_messages>" in prompt_text:
+            if "search_gmail" in tool_names and not tool_results:
+                query = f"after:{self.config.day.replace('-', '/')} before:{self.config.next_day.replace('-', '/')}"
+                return self._tool_call("search_gmail", {"query": query, "max_results": 100})
+            return self._final({
+                "day": self.config.day,
+                "general_detailed_summary": "Email activity of the day",
+                "key_points": ["Project updates received"],
+                "source_chars": tool_output_chars
+            })
+
+        if "<existing_tags>" in prompt_text:
+            return self._final({"tags": BENCHMARK_TAGS})
+
+        if "get_existing_tags" in tool_names:
+            if not tool_results:
+                return self._tool_call("get_existing_tags", {})
+            if tool_results == 1:
+                return self._tool_call("create_new_tags", {"tags": BENCHMARK_TAGS})
+            return self._final({"tags": BENCHMARK_TAGS})
+
+        return self._final({
+            "daily_summary": "Worked on project 1 with User 1, reviewed the development updates and answered the emails.",
+            "key_points": ["Project 1 progress", "Development updates"],
+            "important_tasks": ["Follow up with User 1"]
+        })
+
+
+class FakeEnvironment:
+    """
+    The stand-ins installed for the benchmark and their call counters
+    """
+
+    def __init__(self, config: BenchmarkConfig):
+        self.model = ScriptedChatModel(responder=PipelineResponder(config), latency_ms=config.llm_latency_ms)
+        self.dynamo = InMemoryDynamoResource()
+        self.gmail = FakeGmailResource(SyntheticMailbox(config.day, emails_per_day=config.emails_per_day), config.api_latency_ms)
+        self.configure(config)
+
+    def configure(self, config: BenchmarkConfig) -> None:
+        """
+        Rebuild the synthetic data and latencies, the installed stand-ins are kept
+        """
+        self.config = config
+        self.model.responder = PipelineResponder(config)
+        self.model.latency_ms = config.llm_latency_ms
+        self.gmail.mailbox = SyntheticMailbox(config.day, emails_per_day=config.emails_per_day)
+        self.gmail.api_latency_ms = config.api_latency_ms
+        FakeWebClient.workspace = SyntheticWorkspace(
+            config.day,
+            config.member_id,
+            channels=config.channels,
+            messages_per_channel=config.messages_per_channel,
+            users=config.users
+        )
+        FakeWebClient.api_latency_ms = config.api_latency_ms
+
+    def reset_counters(self) -> None:
+        self.model.calls = 0
+        self.gmail.calls.clear()
+        FakeWebClient.calls.clear()
+        web_search_calls.clear()
+        for table in self.dynamo.tables.values():
+            table.calls.clear()
+
+    def api_calls(self) -> Dict[str, Any]:
+        return {
+            "llm": self.model.calls,
+            "slack": dict(FakeWebClient.calls),
+            "gmail": dict(self.gmail.calls),
+            "web_search": dict(web_search_calls),
+            "dynamo": {name: dict(table.calls) for name, table in self.dynamo.tables.items() if table.calls}
+        }
+
+
+_environment: Optional[FakeEnvironment] = None
+
+
+def _install_missing_dummy_responses() -> None:
+    """
+    The gmail and slack dummy responses are not versioned, the example response is used when they are missing
+    The modules are loaded from their files, importing the agents package would build the app clients before the fakes
+    """
+    responses_dir = os.path.join(SRC_DIR, "agents", "dummy_agent_responses")
+    example_spec = importlib.util.spec_from_file_location("benchmark_dummy_example", os.path.join(responses_dir, "example.py"))
+    example = importlib.util.module_from_spec(example_spec)
+    example_spec.loader.exec_module(example)
+
+    for module_name in ("gmail_extractor", "slack_extractor"):
+        if os.path.exists(os.path.join(responses_dir, f"{module_name}.py")):
+            continue
+        module = types.ModuleType(f"agents.dummy_agent_responses.{module_name}")
+        module.DUMMY_RESPONSE = example.DUMMY_RESPONSE
+        sys.modules[module.__name__] = module
+
+
+def _use_response_cache(model: ScriptedChatModel, cache: Any) -> ScriptedChatModel:
+    """
+    Give the scripted model the response cache of the agents, it is answered from the cache like ChatOpenAI
+    """
+    model.cache = cache
+    return model
+
+
+def install_fakes(config: BenchmarkConfig = None) -> FakeEnvironment:
+    """
+    Install the stand-ins of the external services, it must be called before importing the app
+    A second call only reconfigures the synthetic data and latencies
+    """
+    global _environment
+    config = config if config is not None else BenchmarkConfig()
+    if _environment is not None:
+        _environment.configure(config)
+        return _environment
+
+    for key, value in {**BENCHMARK_ENV, "SLACK_MEMBER_ID": config.member_id}.items():
+        os.environ.setdefault(key, value)
+    # The response cache is kept in memory, the web search and the warm state are not cached, a cache file would answer from the previous benchmark runs
+    os.environ["LLM_CACHE_ENABLED"] = "true" if config.llm_cache else "false"
+    os.environ.setdefault("LLM_CACHE_PATH", "")
+    os.environ.setdefault("TAVILY_CACHE_PATH", "")
+    os.environ.setdefault("WARM_STATE_PATH", "")
+    if SRC_DIR not in sys.path:
+        sys.path.insert(0, SRC_DIR)
+
+    environment = FakeEnvironment(config)
+
+    import boto3
+    import googleapiclient.discovery
+    import langchain_community.tools
+    import langchain_google_community.gmail.utils as gmail_utils
+    import langchain_openai
+    import langchain_pinecone
+    import pinecone
+    import slack_sdk
+
+    slack_sdk.WebClient = FakeWebClient
+    original_boto3_resource = boto3.resource
+    boto3.resource = lambda service_name, *args, **kwargs: (
+        environment.dynamo if service_name == "dynamodb" else original_boto3_resource(service_name, *args, **kwargs)
+    )
+    pinecone.Pinecone = FakePinecone
+    langchain_pinecone.PineconeVectorStore = build_in_memory_vector_store
+    # The models built without a cache (the streaming model of the general summarizer) keep the cache of the shared model
+    langchain_openai.ChatOpenAI = lambda *args, **kwargs: (
+        _use_response_cache(environment.model, kwargs["cache"]) if "cache" in kwargs else environment.model
+    )
+    langchain_openai.OpenAIEmbeddings = build_fake_embeddings
+    gmail_utils.get_gmail_credentials = lambda *args, **kwargs: None
+    original_discovery_build = googleapiclient.discovery.build
+    googleapiclient.discovery.build = lambda service_name, *args, **kwargs: (
+        environment.gmail if service_name == "gmail" else original_discovery_build(service_name, *args, **kwargs)
+    )
+    langchain_community.tools.TavilySearchResults = build_fake_web_search
+
+    _install_missing_dummy_responses()
+
+    _environment = environment
+    return environment
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """
+    Nearest-rank percentile
+    """
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def run_benchmark(config: BenchmarkConfig = None) -> dict:
+    """
+    Run lambda_handler end to end for the configured iterations and build the report:
+    p50/p95 latency, peak memory of one traced iteration, per-stage calls and wall time and calls to each stand-in
+    """
+    config = config if config is not None else BenchmarkConfig()
+    environment = install_fakes(config)
+    app = importlib.import_module("app")
+    app.summarizer_service.gmail_summarizer.dummy_mode = config.gmail_dummy_mode
+
+    event = {"day": config.day, "force": True, "debug": True}
+
+    def invoke() -> dict:
+        # The agent executors are verbose, their output is discarded to keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            response = app.lambda_handler(event, None)
+        if response["statusCode"] != 200:
+            raise RuntimeError(f"Benchmark invocation failed: {response['body']}")
+        return json.loads(response["body"])
+
+    for _ in range(config.warmup):
+        invoke()
+    environment.reset_counters()
+
+    latencies = []
+    stages: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    for _ in range(config.iterations):
+        started_at = time.perf_counter()
+        body = invoke()
+        latencies.append((time.perf_counter() - started_at) * 1000)
+        for stage, stage_metrics in body["metrics"].items():
+            for metric, value in stage_metrics.items():
+                stages[stage][metric] += value
+    api_calls = environment.api_calls()
+
+    # Memory is measured in a separate iteration, tracemalloc slows down the traced code
+    tracemalloc.start()
+    invoke()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    iterations = config.iterations
+    return {
+        "config": asdict(config),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "mean": round(sum(latencies) / iterations, 2),
+            "min": round(min(latencies), 2),
+            "max": round(max(latencies), 2)
+        },
+        "peak_memory_mb": round(peak_memory / 1024 / 1024, 2),
+        "stages": {
+            stage: {
+                "calls": stage_metrics["calls"] / iterations,
+                "llm_calls": stage_metrics["llm_calls"] / iterations,
+                "tool_calls": stage_metrics["tool_calls"] / iterations,
+                "mean_wall_ms": round(stage_metrics["wall_ms"] / max(stage_metrics["calls"], 1), 2),
+                "errors": stage_metrics["errors"]
+            }
+            for stage, stage_metrics in sorted(stages.items())
+        },
+        "api_calls_per_iteration": _per_iteration(api_calls, iterations)
+    }
+
+
+def _per_iteration(calls: Any, iterations: int) -> Any:
+    if isinstance(calls, dict):
+        return {key: _per_iteration(value, iterations) for key, value in calls.items()}
+    return round(calls / iterations, 2)
+
+
+def format_report(report: dict) -> str:
+    """
+    Human readable version of the benchmark report
+    """
+    latency = report["latency_ms"]
+    lines = [
+        f"iterations={report['config']['iterations']} channels={report['config']['channels']} "
+        f"messages_per_channel={report['config']['messages_per_channel']} emails_per_day={report['config']['emails_per_day']}",
+        f"latency p50={latency['p50']}ms p95={latency['p95']}ms mean={latency['mean']}ms",
+        f"peak memory={report['peak_memory_mb']}MB",
+        "",
+        f"{'stage':<60} {'calls':>7} {'llm':>6} {'tools':>6} {'mean ms':>10}"
+    ]
+    for stage, stage_metrics in report["stages"].items():
+        lines.append(
+            f"{stage:<60} {stage_metrics['calls']:>7} {stage_metrics['llm_calls']:>6} "
+            f"{stage_metrics['tool_calls']:>6} {stage_metrics['mean_wall_ms']:>10}"
+        )
+    lines += ["", "api calls per iteration:", json.dumps(report["api_calls_per_iteration"], indent=2)]
+    return "\n".join(lines)
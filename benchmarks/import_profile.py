@@ -0,0 +1,77 @@
+"""
+Import-time profile of the lambda handler module: per-module self and cumulative import time of a cold import of app
+The import runs in a fresh interpreter with python -X importtime and the stand-ins of the external services,
+the stand-ins answer with the configured API latency so a network call done at import shows up in the profile
+
+    python -m benchmarks.import_profile --top 25 --max-ms 1500
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import List
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_PACKAGES = ("app", "agents", "core", "prompts", "services", "tools")
+APP_IMPORT_MARKER = "-- import app --"
+
+
+def profile_app_import(api_latency_ms: float) -> List[dict]:
+    """
+    Import app in a fresh interpreter and parse the -X importtime lines of the modules imported by it
+    :return: list with module, self_ms and cumulative_ms of each module, in import order
+    """
+    code = (
+        "import sys\n"
+        "from benchmarks.harness import BenchmarkConfig, install_fakes\n"
+        f"install_fakes(BenchmarkConfig(llm_latency_ms=0, api_latency_ms={api_latency_ms}))\n"
+        f"sys.stderr.write('{APP_IMPORT_MARKER}\\n')\n"
+        "import app\n"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT_DIR, capture_output=True, text=True, check=True
+    )
+
+    lines = completed.stderr.splitlines()
+    modules = []
+    for line in lines[lines.index(APP_IMPORT_MARKER) + 1:]:
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue
+        modules.append({
+            "module": module.strip(),
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000
+        })
+    return modules
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import-time profile of the lambda handler")
+    parser.add_argument("--top", type=int, default=20, help="modules listed by self import time")
+    parser.add_argument("--api-latency-ms", type=float, default=50.0)
+    parser.add_argument("--max-ms", type=float, default=None, help="exit with an error if importing app takes longer")
+    args = parser.parse_args()
+
+    modules = profile_app_import(args.api_latency_ms)
+    total_ms = next(module["cumulative_ms"] for module in reversed(modules) if module["module"] == "app")
+
+    print(f"import app: {total_ms:.1f} ms\n")
+    print(f"{'project module':<60} {'self ms':>10} {'cumul ms':>10}")
+    for module in modules:
+        if module["module"].split(".")[0] in PROJECT_PACKAGES:
+            print(f"{module['module']:<60} {module['self_ms']:>10.1f} {module['cumulative_ms']:>10.1f}")
+
+    print(f"\n{'slowest modules':<60} {'self ms':>10} {'cumul ms':>10}")
+    for module in sorted(modules, key=lambda module: module["self_ms"], reverse=True)[:args.top]:
+        print(f"{module['module']:<60} {module['self_ms']:>10.1f} {module['cumulative_ms']:>10.1f}")
+
+    if args.max_ms is not None and total_ms > args.max_ms:
+        sys.exit(f"import app took {total_ms:.1f} ms, over the {args.max_ms:.1f} ms limit")
+
+
+if __name__ == "__main__":
+    main()
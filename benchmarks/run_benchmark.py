@@ -0,0 +1,55 @@
+"""
+Run the offline end-to-end benchmark of the summarizer
+
+    python -m benchmarks.run_benchmark --channels 50 --messages-per-channel 200 --iterations 10
+"""
+import argparse
+import json
+
+from .harness import BenchmarkConfig, format_report, run_benchmark
+
+
+def parse_args() -> tuple[BenchmarkConfig, str]:
+    defaults = BenchmarkConfig()
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of lambda_handler")
+    parser.add_argument("--day", default=defaults.day)
+    parser.add_argument("--channels", type=int, default=defaults.channels)
+    parser.add_argument("--messages-per-channel", type=int, default=defaults.messages_per_channel)
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--emails-per-day", type=int, default=defaults.emails_per_day)
+    parser.add_argument("--llm-latency-ms", type=float, default=defaults.llm_latency_ms)
+    parser.add_argument("--api-latency-ms", type=float, default=defaults.api_latency_ms)
+    parser.add_argument("--iterations", type=int, default=defaults.iterations)
+    parser.add_argument("--warmup", type=int, default=defaults.warmup)
+    parser.add_argument("--gmail-dummy-mode", action="store_true", help="use the gmail dummy response instead of the gmail agent")
+    parser.add_argument("--llm-cache", action="store_true", help="enable the in-memory LLM response cache of the agents")
+    parser.add_argument("--json", dest="json_path", help="write the report as JSON to this path")
+    args = parser.parse_args()
+
+    config = BenchmarkConfig(
+        day=args.day,
+        channels=args.channels,
+        messages_per_channel=args.messages_per_channel,
+        users=args.users,
+        emails_per_day=args.emails_per_day,
+        llm_latency_ms=args.llm_latency_ms,
+        api_latency_ms=args.api_latency_ms,
+        iterations=args.iterations,
+        warmup=args.warmup,
+        gmail_dummy_mode=args.gmail_dummy_mode,
+        llm_cache=args.llm_cache
+    )
+    return config, args.json_path
+
+
+def main() -> None:
+    config, json_path = parse_args()
+    report = run_benchmark(config)
+    print(format_report(report))
+    if json_path:
+        with open(json_path, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,79 @@
+import threading
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Dict, List
 from core.settings import settings
 from langchain_openai import ChatOpenAI
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.runnables import RunnableConfig
+from langchain.agents import create_tool_calling_agent, AgentExecutor
+from core.metrics import metrics_callback_handler
+from core.token_usage import TokenUsageCallbackHandler
+from core.llm_cache import get_llm_cache
+from core.registry import registry
+from tools import MemoizedTool
+
+registry.register("agent_llm", lambda: ChatOpenAI(
+    model_name=settings.DEFAULT_OPEN_AI_MODEL,
+    temperature=settings.DEFAULT_TEMPERATURE,
+    openai_api_key=settings.OPENAI_API_KEY,
+    cache=get_llm_cache(),
+    # The agent executor streams the LLM calls and the streamed calls skip the response cache,
+    # the whole response is needed anyway to parse the tool calls
+    disable_streaming=True
+))
 
 class AIAgentInterface(ABC):
     """
     Interface agent class for all agents to share common methods and configurations
     """
     tools: List = []
+    # Names of the read-only tools whose repeated calls in a run are answered from the run cache
+    memoized_tools: tuple = ()
+    max_iterations: int = 5
+    run_name: str = "agent"
     json_parser : JsonOutputParser = JsonOutputParser()
-    llm : ChatOpenAI = ChatOpenAI(
-            model_name=settings.DEFAULT_OPEN_AI_MODEL,
-            temperature=settings.DEFAULT_TEMPERATURE,
-            openai_api_key=settings.OPENAI_API_KEY
-        )
 
-    def _get_agent_tools_string(self) -> str:
+    def __init__(self):
+        self._set_agent_config(run_name=self.run_name)
+        # Agent executors and tools strings built once per tools list and reused by every run of the agent
+        self._agent_executors: Dict[tuple, AgentExecutor] = {}
+        self._tools_strings: Dict[tuple, str] = {}
+        self._executors_lock = threading.Lock()
+
+    @property
+    def llm(self) -> ChatOpenAI:
+        """
+        The LLM shared by the agents, created with the response cache on the first use
+        """
+        return registry.get("agent_llm")
+
+    @staticmethod
+    def _get_tools_key(tools: List) -> tuple:
+        """
+        Key of a tools list in the executors cache, the cached executor keeps the tools alive so their ids are not reused
+        """
+        return tuple(id(tool) for tool in tools)
+
+    def _get_agent_tools_string(self, tools: List = None) -> str:
         """
         Get the agent tools in a formatted string to use in the prompts
         This explain the tools that the agent can use and the utility of each tool
+        :param tools: list with the tools of the run, the agent tools by default
         """
-        formatted_tools = ""
-        if self.tools:
-            formatted_tools = "\n".join([f"{tool.__class__.__name__}: {tool.description}" for tool in self.tools])
+        tools = tools if tools is not None else self.tools
+        tools_key = self._get_tools_key(tools)
+        formatted_tools = self._tools_strings.get(tools_key)
+        if formatted_tools is None:
+            formatted_tools = ""
+            if tools:
+                formatted_tools = "\n".join([f"{tool.__class__.__name__}: {tool.description}" for tool in tools])
+            self._tools_strings[tools_key] = formatted_tools
         return formatted_tools
     
     def _set_agent_config(self, run_name: str):
         """
         Set the agent config for the agent, base config for all agents is set in the interface, the specific config for each agent is set in the agent class
+        The token usage of the agent LLM calls is accounted under the run name
         """
         self.agent_config = RunnableConfig(
             max_concurrency=5, 
@@ -38,9 +82,65 @@ class AIAgentInterface(ABC):
                 "project": "daily_job_summarizer_agent",
                 "version": "1.0.0"
             },
-            run_name=run_name
+            run_name=run_name,
+            callbacks=[metrics_callback_handler, TokenUsageCallbackHandler(agent_name=run_name)]
+        )
+
+    def _get_agent_executor(self, tools: List = None) -> AgentExecutor:
+        """
+        Get the agent executor of the tools, it is built on the first run and reused by the next runs
+        The executor has no state between runs, so it is shared by the concurrent runs of the agent
+        :param tools: list with the tools of the run, the agent tools by default
+        """
+        tools = tools if tools is not None else self.tools
+        tools_key = self._get_tools_key(tools)
+        agent_executor = self._agent_executors.get(tools_key)
+        if agent_executor is None:
+            with self._executors_lock:
+                agent_executor = self._agent_executors.get(tools_key)
+                if agent_executor is None:
+                    agent_executor = self._build_agent_executor(tools)
+                    self._agent_executors[tools_key] = agent_executor
+        return agent_executor
+
+    def _build_agent_executor(self, tools: List) -> AgentExecutor:
+        """
+        Build the tool calling agent executor with the agent prompt, tools and max iterations
+        The memoized tools of the agent are wrapped, their results are reused inside a tool_run_scope
+        :param tools: list with the tools of the executor
+        """
+        tools = [MemoizedTool(tool) if tool.name in self.memoized_tools else tool for tool in tools]
+        summarizer_agent = create_tool_calling_agent(
+            llm=self.llm,
+            tools=tools,
+            prompt=self.agent_prompt
         )
 
+        return AgentExecutor(
+            agent=summarizer_agent, 
+            tools=tools, 
+            verbose=True,
+            return_intermediate_steps=True,
+            max_iterations=self.max_iterations,
+            early_stopping_method="force",
+            handle_parsing_errors=True,
+            handle_tool_errors=True
+        )
+
+    def _enrich_response(self, result: dict, result_key: str = "summary_result") -> dict:
+        """
+        Parse the agent output and add the tool usage information
+        :param result: dict with the agent executor result
+        :param result_key: key used to store the parsed output in the response
+        :return: dict with the parsed result and the tool usage
+        """
+        parsed_result = self.json_parser.parse(result.get("output", "{}"))
+
+        return {
+            result_key: parsed_result,
+            "tool_usage": self._extract_tool_usage(result)
+        }
+
     @staticmethod
     def _extract_tool_usage(result: dict) -> list:
         """
@@ -63,4 +163,10 @@ class AIAgentInterface(ABC):
     @abstractmethod
     def execute_agent(self, context: str) -> str:
         pass
-    
\ No newline at end of file
+
+    @abstractmethod
+    async def aexecute_agent(self, context: str) -> str:
+        """
+        Async version of execute_agent, built on AgentExecutor.ainvoke so many runs can share one event loop
+        """
+        pass
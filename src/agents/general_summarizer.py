@@ -1,65 +1,123 @@
 from prompts import GeneralSummarizerPrompt
-from typing import List
+import json
+from typing import Any, List
+from langchain_openai import ChatOpenAI
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import RunnableConfig
 from .agent_interface import AIAgentInterface
-from langchain.agents import create_tool_calling_agent, AgentExecutor
-from tools import tavily_search_tool
+from core.settings import settings
+from core.registry import registry
+from tools import tool_run_scope
 from langsmith import traceable
+from core.metrics import timed_stage
+from core.token_budget import get_token_budgeter
 
 agent_prompt_template = GeneralSummarizerPrompt()
 
 class GeneralSummarizerAgent(AIAgentInterface):
     """
     Agent to summarize daily gmail information
+    In streaming mode the LLM calls are streamed so the summary can be shown while it is generated,
+    the streamed calls skip the response cache
     """
     agent_prompt : str = agent_prompt_template.get_prompt()
-    tools : List = [tavily_search_tool]
+    memoized_tools : tuple = ("web_search",)
+    max_iterations: int = 5
     run_name: str = "general_summarizer_agentt"
+    streaming_llm : ChatOpenAI = ChatOpenAI(
+            model_name=settings.DEFAULT_OPEN_AI_MODEL,
+            temperature=settings.DEFAULT_TEMPERATURE,
+            openai_api_key=settings.OPENAI_API_KEY,
+            # The token usage of the streamed calls is only reported with stream_usage
+            stream_usage=True
+        )
+
+    def __init__(self, streaming: bool = None):
+        super().__init__()
+        self.streaming = streaming if streaming is not None else settings.SLACK_STREAMING_ENABLED
+
+    @property
+    def llm(self) -> ChatOpenAI:
+        """
+        The streaming LLM in streaming mode, the shared LLM of the agents otherwise
+        """
+        return self.streaming_llm if self.streaming else super().llm
+
+    @property
+    def tools(self) -> List:
+        """
+        The web search tool, created on the first use
+        """
+        return [registry.get("web_search_tool")]
+
+    def _get_run_config(self, callbacks: List[BaseCallbackHandler] = None) -> RunnableConfig:
+        """
+        Get the agent config of a run with the extra callbacks of the run (the summary streaming)
+        """
+        if not callbacks:
+            return self.agent_config
+        return RunnableConfig(**{**self.agent_config, "callbacks": [*self.agent_config["callbacks"], *callbacks]})
+
+    @staticmethod
+    def _get_source_summary(source_result: Any) -> str:
+        """
+        Get the summary of a source agent result within the token budget of the sources
+        The tool usage is dropped, it has the raw source data already summarized by the source agent
+        """
+        if isinstance(source_result, dict) and "summary_result" in source_result:
+            source_result = source_result["summary_result"]
+        source_summary = get_token_budgeter().fit("general_sources", source_result)
+        return source_summary if isinstance(source_summary, str) else json.dumps(source_summary, ensure_ascii=False)
 
-    def __init__(self):
-        self._set_agent_config(run_name=self.run_name)
+    def _get_agent_inputs(self, day: str, gmail_summary_json: str, slack_summary_json: str) -> dict:
+        """
+        Build the input variables of the general summarizer prompt
+        """
+        return {
+            "day": day,
+            "gmail_summary_json": self._get_source_summary(gmail_summary_json),
+            "slack_summary_json": self._get_source_summary(slack_summary_json),
+            "tools": self._get_agent_tools_string()
+        }
 
     @traceable
-    def execute_agent(self, day: str, gmail_summary_json: str, slack_summary_json: str) -> dict:
+    @timed_stage()
+    def execute_agent(self, day: str, gmail_summary_json: str, slack_summary_json: str, callbacks: List[BaseCallbackHandler] = None) -> dict:
         """
         Execute the gmail_summarizer agent
         :param day: YYYY-MM-DD str with the day to summarize
         :param gmail_summary_json: JSON str with the gmail summary
         :param slack_summary_json: JSON str with the slack summary
+        :param callbacks: list with extra callback handlers of the run, for example to stream the summary
         :return: dict with the summary result
         """
-        formatted_tools = self._get_agent_tools_string()
+        agent_executor = self._get_agent_executor()
 
-        summarizer_agent = create_tool_calling_agent(
-            llm=self.llm,
-            tools=self.tools,
-            prompt=self.agent_prompt
-        )
+        with tool_run_scope():
+            result = agent_executor.invoke(
+                self._get_agent_inputs(day, gmail_summary_json, slack_summary_json),
+                config=self._get_run_config(callbacks)
+            )
 
-        agent_executor = AgentExecutor(
-            agent=summarizer_agent, 
-            tools=self.tools, 
-            verbose=True,
-            return_intermediate_steps=True,
-            max_iterations=5,
-            early_stopping_method="force",
-            handle_parsing_errors=True,
-            handle_tool_errors=True
-        )
+        return self._enrich_response(result)
 
-        result = agent_executor.invoke(
-            {
-                "day": day,
-                "gmail_summary_json": gmail_summary_json,
-                "slack_summary_json": slack_summary_json,
-                "tools": formatted_tools
-            }, 
-            config=self.agent_config
-        )
-        parsed_result = self.json_parser.parse(result.get("output", "{}"))
+    @traceable
+    @timed_stage()
+    async def aexecute_agent(self, day: str, gmail_summary_json: str, slack_summary_json: str, callbacks: List[BaseCallbackHandler] = None) -> dict:
+        """
+        Async version of execute_agent
+        :param day: YYYY-MM-DD str with the day to summarize
+        :param gmail_summary_json: JSON str with the gmail summary
+        :param slack_summary_json: JSON str with the slack summary
+        :param callbacks: list with extra callback handlers of the run, for example to stream the summary
+        :return: dict with the summary result
+        """
+        agent_executor = self._get_agent_executor()
 
-        enriched_response = {
-            "summary_result": parsed_result,
-            "tool_usage": self._extract_tool_usage(result)
-        }
+        with tool_run_scope():
+            result = await agent_executor.ainvoke(
+                self._get_agent_inputs(day, gmail_summary_json, slack_summary_json),
+                config=self._get_run_config(callbacks)
+            )
 
-        return enriched_response
+        return self._enrich_response(result)
@@ -1,76 +1,191 @@
-from prompts import DailyGmailSummarizerPrompt
+from prompts import DailyGmailSummarizerPrompt, DailyGmailMessagesSummarizerPrompt
+import asyncio
+import json
+from functools import cached_property
 from typing import List
+from langchain_core.runnables import Runnable
 from .agent_interface import AIAgentInterface
-from langchain.agents import create_tool_calling_agent, AgentExecutor
-from tools import gmail_toolkit
+from tools import get_gmail_toolkit, get_gmail_api_resource, GmailMessagesFetcher, tool_run_scope
+from core.user_profile import UserProfile
+from core.settings import settings
+from core.registry import registry
+from core.token_budget import get_token_budgeter
 import logging
 from tenacity import retry, stop_after_attempt, wait_exponential
 agent_prompt_template = DailyGmailSummarizerPrompt()
+prefetch_prompt_template = DailyGmailMessagesSummarizerPrompt()
 from .dummy_agent_responses.gmail_extractor import DUMMY_RESPONSE
 from langsmith import traceable
+from core.metrics import timed_stage
 
 
 class GmailSummarizerAgent(AIAgentInterface):
     """
     Agent to summarize daily gmail information
+    In prefetch mode the emails of the day window are fetched in code and summarized in a single LLM call,
+    in agent mode the tool calling agent searches and reads the emails with the gmail tools
     """
     agent_prompt : str = agent_prompt_template.get_prompt()
-    tools : List = [*gmail_toolkit]
+    prefetch_prompt : str = prefetch_prompt_template.get_prompt()
+    memoized_tools : tuple = ("search_gmail", "get_gmail_message", "get_gmail_thread")
+    max_iterations: int = 15
     run_name: str = "gmail_summarizer_agent"
 
-    def __init__(self, dummy_mode: bool = False, dummy_response: dict = DUMMY_RESPONSE):
-        self._set_agent_config(run_name=self.run_name)
+    def __init__(self, dummy_mode: bool = False, dummy_response: dict = DUMMY_RESPONSE, prefetch_mode: bool = None):
+        super().__init__()
         self.dummy_mode = dummy_mode
         self.dummy_response = dummy_response
+        self.prefetch_mode = prefetch_mode if prefetch_mode is not None else settings.GMAIL_SUMMARIZER_MODE == "prefetch"
+
+    @cached_property
+    def prefetch_chain(self) -> Runnable:
+        """
+        Chain of the prefetched emails summary in JSON mode, the prompt output is always the summary JSON
+        """
+        return self.prefetch_prompt | self.llm.bind(response_format={"type": "json_object"})
+
+    @property
+    def tools(self) -> List:
+        """
+        The gmail tools of the default mailbox, created on the first use
+        """
+        return registry.get("gmail_toolkit")
+
+    def _get_messages_fetcher(self, user_profile: UserProfile = None) -> GmailMessagesFetcher:
+        """
+        Get the emails fetcher of the user mailbox, the default mailbox if there is no user profile
+        """
+        delegated_user = settings.GOOGLE_DELEGATED_USER
+        if user_profile is not None and user_profile.google_delegated_user:
+            delegated_user = user_profile.google_delegated_user
+        return GmailMessagesFetcher(
+            get_gmail_api_resource(delegated_user),
+            max_messages=settings.GMAIL_PREFETCH_MAX_MESSAGES,
+            body_max_chars=settings.GMAIL_PREFETCH_BODY_MAX_CHARS
+        )
+
+    def _get_prefetch_inputs(self, day: str, previous_day: str, next_day: str, emails: List[dict]) -> dict:
+        """
+        Build the input variables of the prefetch prompt with the digests of the fetched emails, within their token budget
+        """
+        return {
+            "day": day,
+            "previous_day": previous_day,
+            "next_day": next_day,
+            "emails": json.dumps(get_token_budgeter().fit("gmail_messages", emails), ensure_ascii=False)
+        }
+
+    def _build_prefetch_response(self, previous_day: str, next_day: str, emails: List[dict], summary: str) -> dict:
+        """
+        Response of the prefetch mode with the same shape as the agent response, the fetch is reported as the tool usage
+        """
+        return {
+            "summary_result": self.json_parser.parse(summary),
+            "tool_usage": [{
+                "tool_name": "gmail_prefetch",
+                "tool_input": {"query": GmailMessagesFetcher.build_day_query(previous_day, next_day)},
+                "tool_output": emails
+            }]
+        }
+
+    def _execute_prefetch(self, day: str, previous_day: str, next_day: str, user_profile: UserProfile = None) -> dict:
+        """
+        Fetch the emails of the day window and summarize them in one LLM call
+        """
+        emails = self._get_messages_fetcher(user_profile).get_day_messages(previous_day, next_day)
+
+        logging.info(f"Summarizing {len(emails)} gmail messages for date: {day}")
+
+        result = self.prefetch_chain.invoke(self._get_prefetch_inputs(day, previous_day, next_day, emails), config=self.agent_config)
+        return self._build_prefetch_response(previous_day, next_day, emails, result.content)
+
+    async def _aexecute_prefetch(self, day: str, previous_day: str, next_day: str, user_profile: UserProfile = None) -> dict:
+        """
+        Async version of _execute_prefetch, the gmail client is sync so the fetch runs in a thread
+        """
+        fetcher = await asyncio.to_thread(self._get_messages_fetcher, user_profile)
+        emails = await asyncio.to_thread(fetcher.get_day_messages, previous_day, next_day)
+
+        logging.info(f"Summarizing {len(emails)} gmail messages for date: {day}")
+
+        result = await self.prefetch_chain.ainvoke(self._get_prefetch_inputs(day, previous_day, next_day, emails), config=self.agent_config)
+        return self._build_prefetch_response(previous_day, next_day, emails, result.content)
+
+    def _get_user_tools(self, user_profile: UserProfile = None) -> List:
+        """
+        Get the gmail tools of the user mailbox, the default mailbox tools if there is no user profile
+        """
+        if user_profile is None or not user_profile.google_delegated_user:
+            return self.tools
+        return get_gmail_toolkit(user_profile.google_delegated_user)
+
+    def _get_agent_inputs(self, day: str, previous_day: str, next_day: str, tools: List) -> dict:
+        """
+        Build the input variables of the gmail summarizer prompt
+        """
+        return {
+            "day": day,
+            "previous_day": previous_day,
+            "next_day": next_day,
+            "tools": self._get_agent_tools_string(tools)
+        }
 
     @traceable
-    def execute_agent(self, day: str, previous_day: str, next_day: str) -> dict:
+    @timed_stage()
+    def execute_agent(self, day: str, previous_day: str, next_day: str, user_profile: UserProfile = None) -> dict:
         """
         Execute the gmail_summarizer agent
         :param day: YYYY-MM-DD str with the day to summarize
+        :param user_profile: UserProfile with the mailbox to summarize, the default mailbox if None
         :return: dict with the summary result
         """
         if self.dummy_mode:
             return self.dummy_response
-        
-        formatted_tools = self._get_agent_tools_string()
 
-        summarizer_agent = create_tool_calling_agent(
-            llm=self.llm,
-            tools=self.tools,
-            prompt=self.agent_prompt
-        )
+        if self.prefetch_mode:
+            return self._execute_prefetch(day, previous_day, next_day, user_profile)
+
+        tools = self._get_user_tools(user_profile)
+        agent_executor = self._get_agent_executor(tools)
 
-        agent_executor = AgentExecutor(
-            agent=summarizer_agent, 
-            tools=self.tools, 
-            verbose=True,
-            return_intermediate_steps=True,
-            max_iterations=15,
-            early_stopping_method="force",
-            handle_parsing_errors=True,
-            handle_tool_errors=True
-        )
-        
         logging.info(f"Executing gmail summarizer agent for date: {day} (prev: {previous_day}, next: {next_day})")
 
-        result = agent_executor.invoke(
-            {
-                "day": day,
-                "previous_day": previous_day,
-                "next_day": next_day,
-                "tools": formatted_tools
-            }, 
-            config=self.agent_config
-        )
+        with tool_run_scope():
+            result = agent_executor.invoke(
+                self._get_agent_inputs(day, previous_day, next_day, tools),
+                config=self.agent_config
+            )
 
         logging.debug(f'Result: {result}')
 
-        parsed_result = self.json_parser.parse(result.get("output", "{}"))
+        return self._enrich_response(result)
 
-        enriched_response = {
-            "summary_result": parsed_result,
-            "tool_usage": self._extract_tool_usage(result)
-        }
+    @traceable
+    @timed_stage()
+    async def aexecute_agent(self, day: str, previous_day: str, next_day: str, user_profile: UserProfile = None) -> dict:
+        """
+        Async version of execute_agent
+        :param day: YYYY-MM-DD str with the day to summarize
+        :param user_profile: UserProfile with the mailbox to summarize, the default mailbox if None
+        :return: dict with the summary result
+        """
+        if self.dummy_mode:
+            return self.dummy_response
+
+        if self.prefetch_mode:
+            return await self._aexecute_prefetch(day, previous_day, next_day, user_profile)
+
+        tools = self._get_user_tools(user_profile)
+        agent_executor = self._get_agent_executor(tools)
+
+        logging.info(f"Executing async gmail summarizer agent for date: {day} (prev: {previous_day}, next: {next_day})")
+
+        with tool_run_scope():
+            result = await agent_executor.ainvoke(
+                self._get_agent_inputs(day, previous_day, next_day, tools),
+                config=self.agent_config
+            )
+
+        logging.debug(f'Result: {result}')
 
-        return enriched_response
+        return self._enrich_response(result)
@@ -1,80 +1,290 @@
-from prompts import DailySlackSummarizerPrompt
+from prompts import DailySlackSummarizerPrompt, DailySlackConversationsSummarizerPrompt, DailySlackSummaryReducePrompt
+import asyncio
+import json
+from functools import cached_property
 from typing import List
+from langchain_core.runnables import Runnable, RunnableConfig
 from .agent_interface import AIAgentInterface
-from langchain.agents import create_tool_calling_agent, AgentExecutor
-from tools import slack_search_toolkit
+from tools import slack_search_toolkit, tool_run_scope
+from tools.slack.get_conversations import SlackGetConversations
 from core.settings import settings
+from core.token_budget import get_token_budgeter
+from core.user_profile import UserProfile, get_default_user_profile
 from .dummy_agent_responses.slack_extractor import DUMMY_RESPONSE
 import logging
 from langsmith import traceable
+from core.metrics import timed_stage
 
 
 agent_prompt_template = DailySlackSummarizerPrompt()
+direct_prompt_template = DailySlackConversationsSummarizerPrompt()
+reduce_prompt_template = DailySlackSummaryReducePrompt()
 
 class SlackSummarizerAgent(AIAgentInterface):
     """
-    Agent to summarize daily gmail information
+    Agent to summarize daily slack information
+    In direct mode the day conversations are fetched in code and summarized in a single LLM call,
+    the high-volume days are summarized per chunk of channels in parallel (map) and the partial summaries are merged (reduce).
+    In agent mode the tool calling agent fetches them with its tools
     """
     agent_prompt : str = agent_prompt_template.get_prompt()
+    direct_prompt : str = direct_prompt_template.get_prompt()
+    reduce_prompt : str = reduce_prompt_template.get_prompt()
     tools : List = [*slack_search_toolkit]
+    memoized_tools : tuple = ("get_channelid_name_dict", "get_messages", "get_conversations")
+    max_iterations: int = 5
     run_name: str = "slack_summarizer_agent"
 
-    def __init__(self, dummy_mode: bool = False, dummy_response: dict = DUMMY_RESPONSE):
-        self._set_agent_config(run_name=self.run_name)
+    def __init__(self, dummy_mode: bool = False, dummy_response: dict = DUMMY_RESPONSE, direct_mode: bool = None):
+        super().__init__()
         self.dummy_mode = dummy_mode
         self.dummy_response = dummy_response
+        self.direct_mode = direct_mode if direct_mode is not None else settings.SLACK_SUMMARIZER_MODE == "direct"
+        self.conversations_tool = next(tool for tool in self.tools if isinstance(tool, SlackGetConversations))
+
+    @cached_property
+    def direct_chain(self) -> Runnable:
+        """
+        Chain of the direct summary in JSON mode, the prompt output is always the summary JSON
+        """
+        return self.direct_prompt | self.llm.bind(response_format={"type": "json_object"})
+
+    @cached_property
+    def reduce_chain(self) -> Runnable:
+        """
+        Chain of the merge of the partial summaries in JSON mode
+        """
+        return self.reduce_prompt | self.llm.bind(response_format={"type": "json_object"})
+
+    def _get_agent_inputs(self, day: str, previous_day: str, next_day: str, user_profile: UserProfile = None) -> dict:
+        """
+        Build the input variables of the slack summarizer prompt with the identity of the user
+        """
+        user_profile = user_profile if user_profile is not None else get_default_user_profile()
+        return {
+            "day": day,
+            "previous_day": previous_day,
+            "next_day": next_day,
+            "slack_user_display_name": user_profile.slack_user_display_name,
+            "slack_member_id": user_profile.slack_member_id,
+            "slack_user_full_name": user_profile.slack_user_full_name,
+            "tools": self._get_agent_tools_string()
+        }
+
+    def _get_direct_inputs(self, day: str, conversations: List[dict], user_profile: UserProfile) -> dict:
+        """
+        Build the input variables of the direct prompt with the fetched conversations (within their token budget) and the identity of the user
+        """
+        return {
+            "day": day,
+            "conversations": json.dumps(get_token_budgeter().fit("slack_conversations", conversations), ensure_ascii=False),
+            "slack_user_display_name": user_profile.slack_user_display_name,
+            "slack_member_id": user_profile.slack_member_id,
+            "slack_user_full_name": user_profile.slack_user_full_name
+        }
+
+    def _get_reduce_inputs(self, day: str, partial_summaries: List[dict], user_profile: UserProfile) -> dict:
+        """
+        Build the input variables of the reduce prompt, the evidences are merged in code so they are not sent
+        """
+        summaries = [
+            {key: value for key, value in partial_summary.items() if key != "summary_evidences"}
+            for partial_summary in partial_summaries
+        ]
+        return {
+            "day": day,
+            "partial_summaries": json.dumps(get_token_budgeter().fit("slack_partial_summaries", summaries), ensure_ascii=False),
+            "slack_user_display_name": user_profile.slack_user_display_name,
+            "slack_member_id": user_profile.slack_member_id,
+            "slack_user_full_name": user_profile.slack_user_full_name
+        }
+
+    @staticmethod
+    def _split_conversations(conversations: List[dict]) -> List[List[dict]]:
+        """
+        Split the day conversations in chunks of channels of up to SLACK_MAP_CHUNK_TOKENS for the map step
+        A channel larger than a chunk is split by messages, a single chunk is returned for the days under SLACK_MAP_REDUCE_MIN_TOKENS
+        """
+        budgeter = get_token_budgeter()
+        if budgeter.count(conversations) <= settings.SLACK_MAP_REDUCE_MIN_TOKENS:
+            return [conversations]
+
+        chunks: List[List[dict]] = []
+        chunk: List[dict] = []
+        chunk_tokens = 0
+        for channel in conversations:
+            channel_header = {key: value for key, value in channel.items() if key != "messages"}
+            for message in channel["messages"]:
+                message_tokens = budgeter.count(message)
+                if chunk and chunk_tokens + message_tokens > settings.SLACK_MAP_CHUNK_TOKENS:
+                    chunks.append(chunk)
+                    chunk, chunk_tokens = [], 0
+                if not chunk or chunk[-1]["channel_id"] != channel["channel_id"]:
+                    chunk.append({**channel_header, "messages": []})
+                chunk[-1]["messages"].append(message)
+                chunk_tokens += message_tokens
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    @staticmethod
+    def _merge_evidences(partial_summaries: List[dict]) -> List[dict]:
+        """
+        Merge the evidences of the partial summaries, ordered by relevance score from highest to lowest
+        """
+        evidences = [
+            evidence for partial_summary in partial_summaries
+            for evidence in partial_summary.get("summary_evidences", []) if isinstance(evidence, dict)
+        ]
+        return sorted(
+            evidences,
+            key=lambda evidence: evidence.get("relevance_score") if isinstance(evidence.get("relevance_score"), (int, float)) else 0,
+            reverse=True
+        )
+
+    def _get_map_config(self) -> RunnableConfig:
+        """
+        Config of the map step, the agent config with the max number of chunks summarized at the same time
+        """
+        return RunnableConfig(**{**self.agent_config, "max_concurrency": settings.SLACK_MAP_MAX_CONCURRENCY})
+
+    def _build_reduced_summary(self, day: str, partial_summaries: List[dict], reduced_summary: str) -> dict:
+        """
+        Summary of the day with the merged key points, tasks and summary of the reduce step and the evidences of every chunk
+        """
+        return {
+            **self.json_parser.parse(reduced_summary),
+            "day": day,
+            "summary_evidences": self._merge_evidences(partial_summaries)
+        }
+
+    def _build_direct_response(self, day: str, user_id: str, conversations: List[dict], summary: dict) -> dict:
+        """
+        Response of the direct mode with the same shape as the agent response, the fetch is reported as the tool usage
+        """
+        return {
+            "summary_result": summary,
+            "tool_usage": [{
+                "tool_name": self.conversations_tool.name,
+                "tool_input": {"day": day, "user_id": user_id},
+                "tool_output": conversations
+            }]
+        }
+
+    def _summarize_conversations(self, day: str, conversations: List[dict], user_profile: UserProfile) -> dict:
+        """
+        Summarize the conversations in one LLM call, or with map-reduce if they do not fit in one chunk
+        """
+        chunks = self._split_conversations(conversations)
+        if len(chunks) == 1:
+            result = self.direct_chain.invoke(self._get_direct_inputs(day, chunks[0], user_profile), config=self.agent_config)
+            return self.json_parser.parse(result.content)
+
+        logging.info(f"Summarizing {len(conversations)} slack conversations in {len(chunks)} chunks for date: {day}")
+        results = self.direct_chain.batch(
+            [self._get_direct_inputs(day, chunk, user_profile) for chunk in chunks],
+            config=self._get_map_config()
+        )
+        partial_summaries = [self.json_parser.parse(result.content) for result in results]
+        reduced = self.reduce_chain.invoke(self._get_reduce_inputs(day, partial_summaries, user_profile), config=self.agent_config)
+        return self._build_reduced_summary(day, partial_summaries, reduced.content)
+
+    async def _asummarize_conversations(self, day: str, conversations: List[dict], user_profile: UserProfile) -> dict:
+        """
+        Async version of _summarize_conversations
+        """
+        chunks = self._split_conversations(conversations)
+        if len(chunks) == 1:
+            result = await self.direct_chain.ainvoke(self._get_direct_inputs(day, chunks[0], user_profile), config=self.agent_config)
+            return self.json_parser.parse(result.content)
+
+        logging.info(f"Summarizing {len(conversations)} slack conversations in {len(chunks)} chunks for date: {day}")
+        results = await self.direct_chain.abatch(
+            [self._get_direct_inputs(day, chunk, user_profile) for chunk in chunks],
+            config=self._get_map_config()
+        )
+        partial_summaries = [self.json_parser.parse(result.content) for result in results]
+        reduced = await self.reduce_chain.ainvoke(self._get_reduce_inputs(day, partial_summaries, user_profile), config=self.agent_config)
+        return self._build_reduced_summary(day, partial_summaries, reduced.content)
+
+    def _execute_direct(self, day: str, user_profile: UserProfile = None) -> dict:
+        """
+        Fetch the day conversations of the user and summarize them without the agent
+        """
+        user_profile = user_profile if user_profile is not None else get_default_user_profile()
+        conversations = self.conversations_tool.get_day_conversations(day, user_profile.slack_member_id)
+
+        logging.info(f"Summarizing {len(conversations)} slack conversations for date: {day}")
+
+        summary = self._summarize_conversations(day, conversations, user_profile)
+        return self._build_direct_response(day, user_profile.slack_member_id, conversations, summary)
+
+    async def _aexecute_direct(self, day: str, user_profile: UserProfile = None) -> dict:
+        """
+        Async version of _execute_direct, the slack client is sync so the fetch runs in a thread
+        """
+        user_profile = user_profile if user_profile is not None else get_default_user_profile()
+        conversations = await asyncio.to_thread(self.conversations_tool.get_day_conversations, day, user_profile.slack_member_id)
+
+        logging.info(f"Summarizing {len(conversations)} slack conversations for date: {day}")
+
+        summary = await self._asummarize_conversations(day, conversations, user_profile)
+        return self._build_direct_response(day, user_profile.slack_member_id, conversations, summary)
 
     @traceable
-    def execute_agent(self, day: str, previous_day: str, next_day: str) -> dict:
+    @timed_stage()
+    def execute_agent(self, day: str, previous_day: str, next_day: str, user_profile: UserProfile = None) -> dict:
         """
         Execute the slack summarizer agent
         :param day: YYYY-MM-DD str with the day to summarize
+        :param user_profile: UserProfile with the slack identity to summarize, the default user if None
         :return: dict with the summary result
         """
         if self.dummy_mode:
             return self.dummy_response
-        
-        formatted_tools = self._get_agent_tools_string()
 
-        summarizer_agent = create_tool_calling_agent(
-            llm=self.llm,
-            tools=self.tools,
-            prompt=self.agent_prompt
-        )
+        if self.direct_mode:
+            return self._execute_direct(day, user_profile)
+
+        agent_executor = self._get_agent_executor()
 
-        agent_executor = AgentExecutor(
-            agent=summarizer_agent, 
-            tools=self.tools, 
-            verbose=True,
-            return_intermediate_steps=True,
-            max_iterations=5,
-            early_stopping_method="force",
-            handle_parsing_errors=True,
-            handle_tool_errors=True
-        )
-        
         logging.info(f"Executing slack summarizer agent for date: {day} (prev: {previous_day}, next: {next_day})")
 
-        result = agent_executor.invoke(
-            {
-                "day": day,
-                "previous_day": previous_day,
-                "next_day": next_day,
-                "slack_user_display_name": settings.SLACK_USER_DISPLAY_NAME,
-                "slack_member_id": settings.SLACK_MEMBER_ID,
-                "slack_user_full_name": settings.SLACK_USER_FULL_NAME,
-                "tools": formatted_tools
-            }, 
-            config=self.agent_config
-        )
+        with tool_run_scope():
+            result = agent_executor.invoke(
+                self._get_agent_inputs(day, previous_day, next_day, user_profile),
+                config=self.agent_config
+            )
 
         logging.debug(f'##################Result of tool calling agent: {result}')
 
-        parsed_result = self.json_parser.parse(result.get("output", "{}"))
+        return self._enrich_response(result)
 
-        enriched_response = {
-            "summary_result": parsed_result,
-            "tool_usage": self._extract_tool_usage(result)
-        }
+    @traceable
+    @timed_stage()
+    async def aexecute_agent(self, day: str, previous_day: str, next_day: str, user_profile: UserProfile = None) -> dict:
+        """
+        Async version of execute_agent
+        :param day: YYYY-MM-DD str with the day to summarize
+        :param user_profile: UserProfile with the slack identity to summarize, the default user if None
+        :return: dict with the summary result
+        """
+        if self.dummy_mode:
+            return self.dummy_response
+
+        if self.direct_mode:
+            return await self._aexecute_direct(day, user_profile)
+
+        agent_executor = self._get_agent_executor()
+
+        logging.info(f"Executing async slack summarizer agent for date: {day} (prev: {previous_day}, next: {next_day})")
+
+        with tool_run_scope():
+            result = await agent_executor.ainvoke(
+                self._get_agent_inputs(day, previous_day, next_day, user_profile),
+                config=self.agent_config
+            )
+
+        logging.debug(f'##################Result of tool calling agent: {result}')
 
-        return enriched_response
+        return self._enrich_response(result)
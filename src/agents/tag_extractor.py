@@ -1,65 +1,135 @@
-from prompts import TagExtractorPrompt
+from prompts import TagExtractorPrompt, TagCatalogueExtractorPrompt
+import asyncio
+import json
+from functools import cached_property
 from typing import List
+from langchain_core.runnables import Runnable
 from .agent_interface import AIAgentInterface
-from langchain.agents import create_tool_calling_agent, AgentExecutor
-from tools import get_tags_tool, create_tags_tool
+from tools import get_tags_tool, create_tags_tool, TagCatalogue, tag_catalogue, tool_run_scope
+from core.settings import settings
 from langsmith import traceable
+from core.metrics import timed_stage
 
 
 agent_prompt_template = TagExtractorPrompt()
+catalogue_prompt_template = TagCatalogueExtractorPrompt()
 
 class TagExtractorAgent(AIAgentInterface):
     """
-    Agent to summarize daily gmail information
+    Agent to extract the tags of a daily summary
+    In catalogue mode the model extracts the entities in a single call with the existing tags in the prompt,
+    the match with the catalogue and the creation of the new tags are done in code.
+    In agent mode the tool calling agent reads and creates the tags with its tools
     """
     agent_prompt : str = agent_prompt_template.get_prompt()
+    catalogue_prompt : str = catalogue_prompt_template.get_prompt()
     tools : List = [get_tags_tool, create_tags_tool]
+    memoized_tools : tuple = ("get_existing_tags",)
+    max_iterations: int = 10
     run_name: str = "tag_extractor_agent"
 
-    def __init__(self):
-        self._set_agent_config(run_name=self.run_name)
+    def __init__(self, catalogue: TagCatalogue = tag_catalogue, catalogue_mode: bool = None):
+        super().__init__()
+        self.catalogue = catalogue
+        self.catalogue_mode = catalogue_mode if catalogue_mode is not None else settings.TAG_EXTRACTOR_MODE == "catalogue"
+
+    @cached_property
+    def catalogue_chain(self) -> Runnable:
+        """
+        Chain of the catalogue tags in JSON mode, the prompt output is always the tags JSON
+        """
+        return self.catalogue_prompt | self.llm.bind(response_format={"type": "json_object"})
+
+    def _get_agent_inputs(self, summary: str) -> dict:
+        """
+        Build the input variables of the tag extractor prompt
+        """
+        return {
+            "daily_summary": summary,
+            "tools": self._get_agent_tools_string()
+        }
+
+    def _get_catalogue_inputs(self, summary: str, existing_tags: List[dict]) -> dict:
+        """
+        Build the input variables of the catalogue prompt, only the name and type of the existing tags are sent
+        """
+        return {
+            "daily_summary": summary,
+            "existing_tags": json.dumps([{"name": tag["name"], "type": tag["type"]} for tag in existing_tags], ensure_ascii=False)
+        }
+
+    def _build_catalogue_response(self, extracted_tags: str) -> dict:
+        """
+        Resolve the extracted tags against the catalogue, the response has the same shape as the agent response
+        """
+        tags = self.json_parser.parse(extracted_tags).get("tags", [])
+        tags_result = self.catalogue.resolve([tag for tag in tags if isinstance(tag, dict)])
+        return {
+            "tags_result": tags_result,
+            "tool_usage": []
+        }
+
+    def _execute_catalogue(self, summary: str) -> dict:
+        """
+        Extract the tags of the summary in one LLM call and create only the tags missing in the catalogue
+        """
+        result = self.catalogue_chain.invoke(self._get_catalogue_inputs(summary, self.catalogue.get_tags()), config=self.agent_config)
+        return self._build_catalogue_response(result.content)
+
+    async def _aexecute_catalogue(self, summary: str) -> dict:
+        """
+        Async version of _execute_catalogue, the catalogue reads and writes dynamo so it runs in a thread
+        """
+        existing_tags = await asyncio.to_thread(self.catalogue.get_tags)
+        result = await self.catalogue_chain.ainvoke(self._get_catalogue_inputs(summary, existing_tags), config=self.agent_config)
+        return await asyncio.to_thread(self._build_catalogue_response, result.content)
 
     @traceable
+    @timed_stage()
     def execute_agent(self, summary: str) -> dict:
         """
         Execute the tag_extractor agent
         :param summary: str with the summary
         :return: dict with the tags
         """
-        formatted_tools = self._get_agent_tools_string()
-        
-        summarizer_agent = create_tool_calling_agent(
-            llm=self.llm,
-            tools=self.tools,
-            prompt=self.agent_prompt
-        )
-        
-        agent_executor = AgentExecutor(
-            agent=summarizer_agent, 
-            tools=self.tools, 
-            verbose=True,
-            return_intermediate_steps=True,
-            max_iterations=10,
-            early_stopping_method="force",
-            handle_parsing_errors=True,
-            handle_tool_errors=True
-        )
-
-        result = agent_executor.invoke(
-            {
-                "daily_summary": summary,
-                "tools": formatted_tools
-            },
-            config=self.agent_config
-        )
-        parsed_result = self.json_parser.parse(result.get("output", "{}"))
-
-        enriched_response = {
-            "tags_result": parsed_result,
-            "tool_usage": self._extract_tool_usage(result)
-        }
+        if self.catalogue_mode:
+            return self._execute_catalogue(summary)
+
+        agent_executor = self._get_agent_executor()
+
+        with tool_run_scope():
+            result = agent_executor.invoke(
+                self._get_agent_inputs(summary),
+                config=self.agent_config
+            )
+
+        enriched_response = self._enrich_response(result, result_key="tags_result")
 
         create_tags_tool.reset_usage_count()
 
         return enriched_response
 
+    @traceable
+    @timed_stage()
+    async def aexecute_agent(self, summary: str) -> dict:
+        """
+        Async version of execute_agent
+        :param summary: str with the summary
+        :return: dict with the tags
+        """
+        if self.catalogue_mode:
+            return await self._aexecute_catalogue(summary)
+
+        agent_executor = self._get_agent_executor()
+
+        with tool_run_scope():
+            result = await agent_executor.ainvoke(
+                self._get_agent_inputs(summary),
+                config=self.agent_config
+            )
+
+        enriched_response = self._enrich_response(result, result_key="tags_result")
+
+        create_tags_tool.reset_usage_count()
+
+        return enriched_response
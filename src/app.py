@@ -1,6 +1,11 @@
 import json
 import traceback
-from services import SummarizerService
+from services import SummarizerService, warm_state_service
+from core.settings import settings
+from core.user_profile import UserProfile, get_user_profiles
+from core.metrics import metrics_scope
+from core.llm_cache import get_llm_cache
+from tools.slack.get_users import SlackGetUsers
 from datetime import datetime, timedelta
 import logging
 from uuid import uuid4
@@ -13,8 +18,44 @@ summarizer_service = SummarizerService()
 def lambda_handler(event, context):
     """
     Lambda handler que soporta múltiples fuentes de eventos
+    Con debug=true la respuesta incluye las métricas de cada etapa de la invocación y los contadores del cache de respuestas del LLM
+    y del directorio de usuarios de Slack
+    Un contenedor nuevo carga los caches (usuarios, canales y tags) del snapshot del estado caliente antes de la primera invocación
+    """
+    with metrics_scope() as metrics:
+        warm_state_service.hydrate()
+        response = handle_event(event)
+        warm_state_service.save_if_needed()
+
+    if get_flag_from_event(event, "debug"):
+        response_body = json.loads(response["body"])
+        response_body["metrics"] = metrics.summary()
+        llm_cache = get_llm_cache()
+        if llm_cache is not None:
+            response_body["llm_cache"] = llm_cache.stats()
+        response_body["slack_users"] = SlackGetUsers().stats()
+        response["body"] = json.dumps(response_body)
+
+    return response
+
+def handle_event(event) -> dict:
+    """
+    Ejecuta el summarizer según el tipo de evento (un día, batch de usuarios o backfill)
     """
     try:
+        # force=true ignora el resumen ya almacenado del día y lo genera de nuevo
+        force = get_flag_from_event(event, "force")
+
+        # Consulta de uso: tokens y costo acumulados de un día (YYYY-MM-DD) o un mes (YYYY-MM)
+        usage_period = get_event_params(event).get("usage_period")
+        if usage_period:
+            return handle_usage(usage_period)
+
+        # Modo backfill: rango de fechas en una sola invocación
+        backfill_params = get_backfill_params_from_event(event)
+        if backfill_params:
+            return handle_backfill(**backfill_params, force=force)
+
         # Obtener fecha del evento
         date_str = get_date_from_event(event)
         logging.info(f"Received date: {date_str}")
@@ -24,22 +65,35 @@ def lambda_handler(event, context):
         
         generated_run_id = uuid4()
         logging.info(f"######################## Generated run_id: {generated_run_id}")
+
+        # Modo batch: varios usuarios en una sola invocación
+        user_profiles = get_user_profiles_from_event(event)
+        if len(user_profiles) > 1:
+            return handle_batch(user_profiles, date, previous_day, next_day, generated_run_id, force=force)
         
         # Execute summarizer
         summary_result = summarizer_service.execute_summarizer(
             day=date,
             previous_day=previous_day,
             next_day=next_day,
+            user_profile=user_profiles[0],
+            force=force,
             langsmith_extra={"run_id": generated_run_id}
         )
         
+        # Sinks que fallaron (slack, pinecone, dynamo) sin detener al resto
+        partial_failures = get_partial_failures(summary_result)
+        if partial_failures:
+            logging.warning(f"Summary sinks with errors: {partial_failures}")
+        
         return {
             "statusCode": 200,
             "body": json.dumps({
                 "date": date,
                 "previous_day": previous_day,
                 "next_day": next_day,
-                "summary_result": summary_result
+                "summary_result": summary_result,
+                "partial_failures": partial_failures
             })
         }
         
@@ -61,6 +115,127 @@ def lambda_handler(event, context):
             })
         }
 
+def handle_batch(user_profiles: list[UserProfile], date: str, previous_day: str, next_day: str, run_id, force: bool = False) -> dict:
+    """
+    Ejecuta el summarizer para varios usuarios con concurrencia limitada
+    
+    Args:
+        user_profiles: Perfiles de los usuarios a resumir
+        date, previous_day, next_day: Fecha a resumir y sus días adyacentes
+        run_id: run_id de langsmith de la invocación
+        force: Generar de nuevo los resúmenes ya almacenados
+    
+    Returns:
+        dict: Respuesta con el estado de cada usuario
+    """
+    logging.info(f"Received batch of {len(user_profiles)} users for date: {date}")
+
+    users_status = summarizer_service.execute_batch_summarizer(
+        user_profiles=user_profiles,
+        day=date,
+        previous_day=previous_day,
+        next_day=next_day,
+        force=force,
+        langsmith_extra={"run_id": run_id}
+    )
+
+    return {
+        "statusCode": 200,
+        "body": json.dumps({
+            "date": date,
+            "previous_day": previous_day,
+            "next_day": next_day,
+            "users": users_status
+        })
+    }
+
+def handle_backfill(start_date: str, end_date: str, max_concurrency: int = None, force: bool = False) -> dict:
+    """
+    Ejecuta el summarizer para cada día del rango con concurrencia limitada
+    
+    Args:
+        start_date: Fecha inicial en formato YYYY-MM-DD
+        end_date: Fecha final en formato YYYY-MM-DD (incluida)
+        max_concurrency: Máximo de días procesados en paralelo (opcional)
+        force: Generar de nuevo los días ya almacenados
+    
+    Returns:
+        dict: Respuesta con el estado de cada día
+    """
+    days = get_date_range(start_date, end_date)
+    logging.info(f"Received backfill from {start_date} to {end_date} ({len(days)} days)")
+
+    days_status = summarizer_service.backfill(
+        days=days,
+        max_concurrency=max_concurrency or settings.BACKFILL_MAX_CONCURRENCY,
+        force=force,
+        langsmith_extra={"run_id": uuid4()}
+    )
+
+    return {
+        "statusCode": 200,
+        "body": json.dumps({
+            "start_date": start_date,
+            "end_date": end_date,
+            "days": days_status
+        })
+    }
+
+def handle_usage(usage_period: str) -> dict:
+    """
+    Obtiene los tokens y el costo acumulados por agente de un día o un mes
+    
+    Args:
+        usage_period: Día en formato YYYY-MM-DD o mes en formato YYYY-MM
+    
+    Returns:
+        dict: Respuesta con el uso del periodo, 501 si la tabla de uso no está configurada
+    
+    Raises:
+        ValueError: Si el periodo es inválido
+    """
+    # Sin tabla de uso es un error de configuración del servidor, no de la petición
+    if summarizer_service.usage_service is None:
+        return {
+            "statusCode": 501,
+            "body": json.dumps({
+                "error": "Tabla de uso no configurada",
+                "detail": "La consulta de uso requiere la variable USAGE_TABLE"
+            })
+        }
+
+    if is_valid_date(usage_period, "%Y-%m-%d"):
+        usage = summarizer_service.usage_service.get_daily_usage(usage_period)
+    elif is_valid_date(usage_period, "%Y-%m"):
+        usage = summarizer_service.usage_service.get_monthly_usage(usage_period)
+    else:
+        raise ValueError(f"Periodo inválido: {usage_period}. Debe ser YYYY-MM-DD o YYYY-MM")
+
+    return {
+        "statusCode": 200,
+        "body": json.dumps({
+            "usage_period": usage_period,
+            "usage": usage
+        })
+    }
+
+def get_partial_failures(summary_result: dict) -> dict:
+    """
+    Obtiene los sinks del resumen que fallaron
+    
+    Args:
+        summary_result: Resultado del summarizer con el estado de cada sink
+    
+    Returns:
+        dict: {sink_name: error} con los sinks que fallaron
+    """
+    sinks_result = summary_result.get("sinks_result", {})
+    return {
+        sink_name: sink_result.get("error")
+        for sink_name, sink_result in sinks_result.items()
+        if not sink_result.get("success")
+    }
+
 def get_date_from_event(event):
     """
     Extrae la fecha del evento desde diferentes fuentes posibles:
@@ -88,6 +263,105 @@ def get_date_from_event(event):
     # Caso 4: No se proporcionó fecha, usar fecha actual
     return None
 
+def get_event_params(event) -> dict:
+    """
+    Obtiene los parámetros del evento desde el body (API Gateway), el detail (EventBridge) o el evento directo
+    """
+    if "body" in event:
+        try:
+            params = json.loads(event["body"])
+            return params if isinstance(params, dict) else {}
+        except (json.JSONDecodeError, TypeError):
+            return {}
+    if "detail" in event:
+        return event["detail"]
+    return event
+
+def get_flag_from_event(event, flag_name: str) -> bool:
+    """
+    Obtiene un flag booleano del evento (true o "true"), por ejemplo force o debug
+    """
+    flag = get_event_params(event).get(flag_name, False)
+    if isinstance(flag, str):
+        return flag.strip().lower() == "true"
+    return bool(flag)
+
+def get_user_profiles_from_event(event) -> list[UserProfile]:
+    """
+    Obtiene los perfiles de usuario a resumir:
+    - Lista "users" del evento
+    - USER_PROFILES configurado en el entorno
+    - Usuario configurado en el entorno (por defecto)
+    
+    Raises:
+        ValueError: Si algún perfil del evento es inválido
+    """
+    users = get_event_params(event).get("users")
+    if users:
+        return [UserProfile.from_dict(user) for user in users]
+    return get_user_profiles()
+
+def get_backfill_params_from_event(event) -> dict:
+    """
+    Extrae los parámetros del backfill (start_date, end_date, max_concurrency) desde las mismas fuentes que la fecha:
+    - API Gateway (body)
+    - EventBridge/CloudWatch Events (detail)
+    - Invocación directa
+    
+    Returns:
+        dict: Parámetros del backfill o None si el evento no es un backfill
+    """
+    params = get_event_params(event)
+    if not params.get("start_date") or not params.get("end_date"):
+        return None
+
+    return {
+        "start_date": params["start_date"],
+        "end_date": params["end_date"],
+        "max_concurrency": int(params["max_concurrency"]) if params.get("max_concurrency") else None
+    }
+
+def get_date_range(start_date: str, end_date: str) -> list[tuple[str, str, str]]:
+    """
+    Calcula los días del rango con sus días adyacentes
+    
+    Args:
+        start_date: Fecha inicial en formato YYYY-MM-DD
+        end_date: Fecha final en formato YYYY-MM-DD (incluida)
+    
+    Returns:
+        list: [(date, previous_day, next_day), ...]
+    
+    Raises:
+        ValueError: Si el formato de las fechas o el rango es inválido
+    """
+    start_date, _, _ = format_date(start_date)
+    end_date, _, _ = format_date(end_date)
+
+    start_obj = datetime.strptime(start_date, "%Y-%m-%d")
+    end_obj = datetime.strptime(end_date, "%Y-%m-%d")
+    total_days = (end_obj - start_obj).days + 1
+
+    if total_days < 1:
+        raise ValueError(f"Rango de fechas inválido: {start_date} es posterior a {end_date}")
+    if total_days > settings.BACKFILL_MAX_DAYS:
+        raise ValueError(f"Rango de fechas inválido: máximo {settings.BACKFILL_MAX_DAYS} días por backfill")
+
+    return [
+        format_date((start_obj + timedelta(days=offset)).strftime("%Y-%m-%d"))
+        for offset in range(total_days)
+    ]
+
+def is_valid_date(date_str: str, date_format: str) -> bool:
+    """
+    Valida que la fecha tenga el formato indicado
+    """
+    try:
+        datetime.strptime(date_str, date_format)
+        return True
+    except (TypeError, ValueError):
+        return False
+
 def format_date(date_str: str = None) -> tuple[str, str, str]:
     """
     Formatea la fecha y calcula días adyacentes
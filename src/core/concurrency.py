@@ -0,0 +1,39 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+def run_in_threads(
+    tasks: Dict[str, Callable[[], Any]],
+    max_workers: Optional[int] = None,
+    return_exceptions: bool = False
+) -> Dict[str, Any]:
+    """
+    Run independent blocking tasks concurrently in a thread pool and join their results.
+    Each task runs inside a copy of the caller context, so the langsmith tracing parent
+    (and its run_id) and any other contextvars are propagated to the worker threads.
+    :param tasks: dict with task_name -> callable without arguments
+    :param max_workers: max number of tasks running at the same time (default: one thread per task)
+    :param return_exceptions: if True, the exception raised by a task is returned as its result instead of raised
+    :return: dict with task_name -> task result, in the same order as the tasks
+    """
+    if not tasks:
+        return {}
+
+    workers = max(1, min(max_workers or len(tasks), len(tasks)))
+    results: Dict[str, Any] = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            name: executor.submit(contextvars.copy_context().run, task)
+            for name, task in tasks.items()
+        }
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                if not return_exceptions:
+                    raise e
+                results[name] = e
+
+    return results
@@ -0,0 +1,81 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+
+class SQLiteKeyValueStore:
+    """
+    Persistent key-value store in a SQLite file, with a TTL per entry and size-bounded eviction
+    In the lambda the file lives in /tmp, so the entries are shared by the invocations of a warm container
+    The least recently used entries are evicted when the store grows over max_entries
+    """
+
+    def __init__(self, path: str, max_entries: int = 5000, table: str = "entries"):
+        self.path = path
+        self.max_entries = max_entries
+        self.table = table
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._connection.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_accessed_at ON {self.table} (accessed_at)")
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Get the value of a key, None if it does not exist or it is expired
+        """
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at < now:
+                self._connection.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                return None
+            self._connection.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+            return value
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        """
+        Store the value of a key for ttl_seconds, evicting the expired and least recently used entries over max_entries
+        """
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl_seconds, now)
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        self._connection.execute(f"DELETE FROM {self.table} WHERE expires_at < ?", (now,))
+        (entries,) = self._connection.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        if entries > self.max_entries:
+            self._connection.execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY accessed_at ASC LIMIT ?)",
+                (entries - self.max_entries,)
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._connection.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute(f"DELETE FROM {self.table}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            (entries,) = self._connection.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+            return entries
@@ -0,0 +1,137 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import ChatGeneration, Generation
+from core.kv_store import SQLiteKeyValueStore
+from core.settings import settings
+
+
+class TieredLLMCache(BaseCache):
+    """
+    LLM response cache with an in-process LRU tier and an optional persistent tier
+    The key is the hash of the llm string (model, temperature, bound tool schemas and the rest of the invocation params)
+    and the serialized messages of the prompt, so only byte-identical requests are answered from the cache
+    The cached responses have no token usage, a cache hit is not accounted as spent tokens
+    """
+
+    def __init__(self, max_memory_entries: int = 256, ttl_seconds: int = 24 * 60 * 60, store: SQLiteKeyValueStore = None):
+        self.max_memory_entries = max_memory_entries
+        self.ttl_seconds = ttl_seconds
+        self.store = store
+        self._memory: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+        self._counters = {"memory_hits": 0, "persistent_hits": 0, "misses": 0, "updates": 0}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _build_key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\n{prompt}".encode("utf-8")).hexdigest()
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def _memory_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return value
+
+    def _memory_set(self, key: str, value: str, expires_at: float) -> None:
+        with self._lock:
+            self._memory[key] = (expires_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    @staticmethod
+    def _without_usage(generation: Generation) -> Generation:
+        """
+        Copy of a generation without its token usage
+        """
+        if not isinstance(generation, ChatGeneration):
+            return generation
+        response_metadata = {key: value for key, value in generation.message.response_metadata.items() if key != "token_usage"}
+        message = generation.message.model_copy(update={"usage_metadata": None, "response_metadata": response_metadata})
+        return ChatGeneration(message=message, generation_info=generation.generation_info)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self._build_key(prompt, llm_string)
+        value = self._memory_get(key)
+        if value is not None:
+            self._count("memory_hits")
+            return loads(value)
+
+        if self.store is not None:
+            try:
+                value = self.store.get(key)
+            except Exception as e:
+                logging.warning(f"Error reading the persistent LLM cache: {e}")
+                value = None
+            if value is not None:
+                self._count("persistent_hits")
+                self._memory_set(key, value, time.time() + self.ttl_seconds)
+                return loads(value)
+
+        self._count("misses")
+        return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = self._build_key(prompt, llm_string)
+        value = dumps([self._without_usage(generation) for generation in return_val])
+        self._memory_set(key, value, time.time() + self.ttl_seconds)
+        self._count("updates")
+
+        if self.store is not None:
+            try:
+                self.store.set(key, value, self.ttl_seconds)
+            except Exception as e:
+                logging.warning(f"Error writing the persistent LLM cache: {e}")
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._memory.clear()
+        if self.store is not None:
+            self.store.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the hit and miss counters of the cache since the container started
+        """
+        with self._lock:
+            return {**self._counters, "memory_entries": len(self._memory)}
+
+
+@lru_cache()
+def get_llm_cache() -> Optional[TieredLLMCache]:
+    """
+    Get the LLM response cache shared by the agents, None if it is disabled
+    The persistent tier is a SQLite file in LLM_CACHE_PATH, the memory tier is used alone if the file can not be opened
+    """
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+
+    store = None
+    if settings.LLM_CACHE_PATH:
+        try:
+            store = SQLiteKeyValueStore(settings.LLM_CACHE_PATH, max_entries=settings.LLM_CACHE_MAX_ENTRIES, table="llm_responses")
+        except Exception as e:
+            logging.warning(f"Persistent LLM cache not available in {settings.LLM_CACHE_PATH}: {e}")
+
+    return TieredLLMCache(
+        max_memory_entries=settings.LLM_CACHE_MAX_MEMORY_ENTRIES,
+        ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+        store=store
+    )
@@ -0,0 +1,297 @@
+import asyncio
+import contextvars
+import functools
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from core.settings import settings
+
+EMF_METRICS = [
+    {"Name": "WallTime", "Unit": "Milliseconds"},
+    {"Name": "Calls", "Unit": "Count"},
+    {"Name": "LLMCalls", "Unit": "Count"},
+    {"Name": "ToolCalls", "Unit": "Count"},
+    {"Name": "PayloadBytes", "Unit": "Bytes"},
+    {"Name": "Errors", "Unit": "Count"}
+]
+"""Metrics emitted for each stage in the CloudWatch embedded metric format"""
+
+
+class PipelineMetrics:
+    """
+    Metrics of one invocation, aggregated by stage (pipeline stages, agents, tools and storage calls)
+    The recorder is shared by the threads of the invocation, so every update is done under a lock
+    """
+
+    def __init__(self):
+        self._stages: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        stage: str,
+        wall_ms: float = 0.0,
+        calls: int = 0,
+        llm_calls: int = 0,
+        tool_calls: int = 0,
+        payload_bytes: int = 0,
+        errors: int = 0
+    ) -> None:
+        with self._lock:
+            stage_metrics = self._stages.setdefault(stage, {
+                "wall_ms": 0.0, "calls": 0, "llm_calls": 0, "tool_calls": 0, "payload_bytes": 0, "errors": 0
+            })
+            stage_metrics["wall_ms"] += wall_ms
+            stage_metrics["calls"] += calls
+            stage_metrics["llm_calls"] += llm_calls
+            stage_metrics["tool_calls"] += tool_calls
+            stage_metrics["payload_bytes"] += payload_bytes
+            stage_metrics["errors"] += errors
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get the metrics of each stage, the wall time rounded to milliseconds
+        """
+        with self._lock:
+            return {
+                stage: {**stage_metrics, "wall_ms": round(stage_metrics["wall_ms"], 2)}
+                for stage, stage_metrics in self._stages.items()
+            }
+
+
+_current_metrics: contextvars.ContextVar[Optional[PipelineMetrics]] = contextvars.ContextVar("current_metrics", default=None)
+_current_stage: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_stage", default=None)
+
+
+def get_metrics() -> Optional[PipelineMetrics]:
+    """
+    Get the metrics recorder of the current invocation, None outside a metrics scope
+    """
+    return _current_metrics.get()
+
+
+@contextmanager
+def metrics_scope() -> Iterator[PipelineMetrics]:
+    """
+    Open a metrics scope for an invocation, the stages measured inside the scope are aggregated in the recorder
+    """
+    recorder = PipelineMetrics()
+    token = _current_metrics.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current_metrics.reset(token)
+
+
+def payload_size(payload: Any) -> int:
+    """
+    Get the size in bytes of a payload (str, bytes or JSON serializable object)
+    """
+    if payload is None:
+        return 0
+    if isinstance(payload, bytes):
+        return len(payload)
+    if isinstance(payload, str):
+        return len(payload.encode("utf-8"))
+    try:
+        return len(json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8"))
+    except (TypeError, ValueError):
+        return len(str(payload).encode("utf-8"))
+
+
+def emit_emf(stage: str, values: Dict[str, float]) -> None:
+    """
+    Write a structured JSON log line in the CloudWatch embedded metric format (EMF) for a stage
+    :param stage: str with the stage name, used as dimension
+    :param values: dict with the metric values (WallTime, Calls, LLMCalls, ToolCalls, PayloadBytes, Errors)
+    """
+    if not settings.METRICS_ENABLED:
+        return
+
+    emf_line = {
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": settings.METRICS_NAMESPACE,
+                "Dimensions": [["Stage"]],
+                "Metrics": [metric for metric in EMF_METRICS if metric["Name"] in values]
+            }]
+        },
+        "Stage": stage,
+        **values
+    }
+    sys.stdout.write(json.dumps(emf_line) + "\n")
+    sys.stdout.flush()
+
+
+def record_stage(
+    stage: str,
+    wall_ms: float = 0.0,
+    payload_bytes: int = 0,
+    error: bool = False,
+    llm_calls: int = 0,
+    tool_calls: int = 0
+) -> None:
+    """
+    Record a measure of a stage in the invocation metrics and emit it as an EMF log line
+    """
+    recorder = get_metrics()
+    if recorder is not None:
+        recorder.record(
+            stage,
+            wall_ms=wall_ms,
+            calls=1,
+            llm_calls=llm_calls,
+            tool_calls=tool_calls,
+            payload_bytes=payload_bytes,
+            errors=int(error)
+        )
+
+    emit_emf(stage, {
+        "WallTime": round(wall_ms, 2),
+        "Calls": 1,
+        "LLMCalls": llm_calls,
+        "ToolCalls": tool_calls,
+        "PayloadBytes": payload_bytes,
+        "Errors": int(error)
+    })
+
+
+@contextmanager
+def measure_stage(stage: str) -> Iterator[None]:
+    """
+    Measure the wall time of a stage, the LLM and tool calls done inside are attributed to the stage
+    """
+    token = _current_stage.set(stage)
+    started_at = time.perf_counter()
+    error = False
+    try:
+        yield
+    except Exception:
+        error = True
+        raise
+    finally:
+        _current_stage.reset(token)
+        record_stage(stage, wall_ms=(time.perf_counter() - started_at) * 1000, error=error)
+
+
+def timed_stage(stage: str = None) -> Callable:
+    """
+    Decorator to measure a function (sync or async) as a stage, the payload size is the size of the returned value
+    :param stage: str with the stage name, the qualified name of the function by default
+    """
+    def decorator(func: Callable) -> Callable:
+        stage_name = stage or func.__qualname__
+
+        def _record(started_at: float, result: Any = None, error: bool = False) -> None:
+            record_stage(
+                stage_name,
+                wall_ms=(time.perf_counter() - started_at) * 1000,
+                payload_bytes=payload_size(result),
+                error=error
+            )
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                token = _current_stage.set(stage_name)
+                started_at = time.perf_counter()
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception:
+                    _record(started_at, error=True)
+                    raise
+                finally:
+                    _current_stage.reset(token)
+                _record(started_at, result)
+                return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            token = _current_stage.set(stage_name)
+            started_at = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                _record(started_at, error=True)
+                raise
+            finally:
+                _current_stage.reset(token)
+            _record(started_at, result)
+            return result
+        return wrapper
+
+    return decorator
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    Langchain callback handler that counts the LLM round-trips and tool calls of the agents
+    Each LLM and tool call is attributed to the current stage and measured as its own stage (llm:<model>, tool:<name>)
+    """
+
+    # Run the handler in the caller context (also for async runs) to keep the current stage
+    run_inline = True
+
+    def __init__(self):
+        self._started_at: Dict[UUID, tuple[str, float, dict]] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID, stage: str, **counters: int) -> None:
+        recorder = get_metrics()
+        parent_stage = _current_stage.get()
+        if recorder is not None and parent_stage:
+            recorder.record(parent_stage, **counters)
+        with self._lock:
+            self._started_at[run_id] = (stage, time.perf_counter(), counters)
+
+    def _end(self, run_id: UUID, output: Any = None, error: bool = False) -> None:
+        with self._lock:
+            started = self._started_at.pop(run_id, None)
+        if started is None:
+            return
+        stage, started_at, counters = started
+        record_stage(
+            stage,
+            wall_ms=(time.perf_counter() - started_at) * 1000,
+            payload_bytes=payload_size(output),
+            error=error,
+            **counters
+        )
+
+    @staticmethod
+    def _get_model_name(serialized: Optional[dict], **kwargs: Any) -> str:
+        invocation_params = kwargs.get("invocation_params") or {}
+        return invocation_params.get("model_name") or invocation_params.get("model") or (serialized or {}).get("name", "model")
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: list, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id, f"llm:{self._get_model_name(serialized, **kwargs)}", llm_calls=1)
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: list, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id, f"llm:{self._get_model_name(serialized, **kwargs)}", llm_calls=1)
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        output = [[generation.text for generation in generations] for generations in response.generations]
+        self._end(run_id, output)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error=True)
+
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id, f"tool:{(serialized or {}).get('name', 'tool')}", tool_calls=1)
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, output)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error=True)
+
+
+metrics_callback_handler = MetricsCallbackHandler()
@@ -0,0 +1,60 @@
+import threading
+from typing import Any, Callable, Dict
+
+from core.metrics import measure_stage
+
+
+class LazyRegistry:
+    """
+    Registry of the shared components (API clients, resources and tools) created on their first use instead of at import
+    A cold start only pays for the components its invocation actually uses, each creation is measured as the init:<name> stage
+    The components are created once per container, concurrent first uses of the same component wait for a single creation
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._components: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], Any]) -> None:
+        """
+        Register the factory of a component, a registered component is replaced and created again on its next use
+        :param name: str with the component name
+        :param factory: callable without arguments that creates the component
+        """
+        with self._lock:
+            self._factories[name] = factory
+            self._components.pop(name, None)
+            self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name: str) -> Any:
+        """
+        Get a component, it is created with its factory on the first use
+        """
+        if name in self._components:
+            return self._components[name]
+        if name not in self._factories:
+            raise KeyError(f"Component {name} is not registered")
+
+        with self._locks[name]:
+            if name not in self._components:
+                with measure_stage(f"init:{name}"):
+                    self._components[name] = self._factories[name]()
+        return self._components[name]
+
+    def is_initialized(self, name: str) -> bool:
+        return name in self._components
+
+    def reset(self, name: str = None) -> None:
+        """
+        Drop a created component (all of them by default), it is created again on its next use
+        """
+        with self._lock:
+            if name is None:
+                self._components.clear()
+            else:
+                self._components.pop(name, None)
+
+
+registry = LazyRegistry()
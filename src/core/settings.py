@@ -9,6 +9,8 @@ class Settings:
     APP_CONFIG: str = os.getenv("APP_CONFIG")
     # General configuration
     DEFAULT_LANGUAGE: str = "Spanish"
+    # Bump it to invalidate the stored summaries, the prompts and model changes invalidate them automatically
+    PIPELINE_VERSION: str = os.getenv("PIPELINE_VERSION", "v1")
     ENVIRONMENT: str = os.getenv("ENVIRONMENT")
     # OpenAI configuration
     DEFAULT_MAX_TOKENS = os.getenv("DEFAULT_MAX_TOKENS")
@@ -16,9 +18,25 @@ class Settings:
     DEFAULT_TEMPERATURE = os.getenv("DEFAULT_TEMPERATURE")
     DEFAULT_OPENAI_EMBEDDING_MODEL = os.getenv("DEFAULT_OPENAI_EMBEDDING_MODEL")
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    # JSON object with model -> [input, output] USD price per 1M tokens, it overrides the default prices
+    OPENAI_PRICES = os.getenv("OPENAI_PRICES")
+    # JSON object with stage -> max tokens of the data sent in the prompts, it overrides the default budgets
+    TOKEN_BUDGETS = os.getenv("TOKEN_BUDGETS")
+    # Opt-in LLM response cache, in memory and persisted in a SQLite file shared by the invocations of a warm container
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "false").lower() == "true"
+    LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "/tmp/llm_cache.sqlite3")
+    LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", 24 * 60 * 60))
+    LLM_CACHE_MAX_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MAX_MEMORY_ENTRIES", 256))
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 5000))
 
     # External APIs configuration
     TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
+    # advanced: full pages and images, not cached / opt-in glossary: basic search with snippets only, cached per term
+    TAVILY_SEARCH_MODE = os.getenv("TAVILY_SEARCH_MODE", "advanced")
+    TAVILY_GLOSSARY_MAX_RESULTS = int(os.getenv("TAVILY_GLOSSARY_MAX_RESULTS", 3))
+    TAVILY_GLOSSARY_SNIPPET_MAX_CHARS = int(os.getenv("TAVILY_GLOSSARY_SNIPPET_MAX_CHARS", 500))
+    TAVILY_CACHE_PATH = os.getenv("TAVILY_CACHE_PATH", "/tmp/web_search_cache.sqlite3")
+    TAVILY_CACHE_TTL_SECONDS = int(os.getenv("TAVILY_CACHE_TTL_SECONDS", 7 * 24 * 60 * 60))
     PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
     BASE_PINECONE_INDEX_NAME = os.getenv("BASE_PINECONE_INDEX_NAME")
 
@@ -29,14 +47,69 @@ class Settings:
     SLACK_USER_DISPLAY_NAME = os.getenv("SLACK_USER_DISPLAY_NAME")
     SLACK_MEMBER_ID = os.getenv("SLACK_MEMBER_ID")
     SLACK_USER_FULL_NAME = os.getenv("SLACK_USER_FULL_NAME")
+    # JSON list of user profiles to summarize in the same run, the user above is used if it is not set
+    USER_PROFILES = os.getenv("USER_PROFILES")
+    # "direct" fetches the day conversations in code and summarizes them in one LLM call, "agent" runs the tool calling agent
+    SLACK_SUMMARIZER_MODE = os.getenv("SLACK_SUMMARIZER_MODE", "direct")
+    # In direct mode the days with more conversation tokens are summarized per chunk of channels in parallel and then merged
+    SLACK_MAP_REDUCE_MIN_TOKENS = int(os.getenv("SLACK_MAP_REDUCE_MIN_TOKENS", 8000))
+    SLACK_MAP_CHUNK_TOKENS = int(os.getenv("SLACK_MAP_CHUNK_TOKENS", 4000))
+    SLACK_MAP_MAX_CONCURRENCY = int(os.getenv("SLACK_MAP_MAX_CONCURRENCY", 8))
+    # "prefetch" fetches the emails of the day in code and summarizes them in one LLM call, "agent" runs the tool calling agent
+    GMAIL_SUMMARIZER_MODE = os.getenv("GMAIL_SUMMARIZER_MODE", "prefetch")
+    # The gmail dummy response replaces the gmail summary, for environments without gmail access
+    GMAIL_DUMMY_MODE = os.getenv("GMAIL_DUMMY_MODE", "false").lower() == "true"
+    GMAIL_PREFETCH_MAX_MESSAGES = int(os.getenv("GMAIL_PREFETCH_MAX_MESSAGES", 100))
+    GMAIL_PREFETCH_BODY_MAX_CHARS = int(os.getenv("GMAIL_PREFETCH_BODY_MAX_CHARS", 1500))
 
     # Logging configuration
     LOG_LEVEL = os.getenv("LOG_LEVEL")
 
+    # Metrics configuration, the CloudWatch embedded metric format log lines (one per stage, LLM and tool call) are opt-in
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+    METRICS_NAMESPACE = os.getenv("METRICS_NAMESPACE", "SummarizerAI")
+
     # DynamoDB configuration
     DYNAMODB_REGION_NAME = os.getenv("DYNAMODB_REGION_NAME")
     TAGS_TABLE = os.getenv("TAGS_TABLE")
     SUMMARY_TABLE = os.getenv("SUMMARIES_TABLE")
+    CHECKPOINTS_TABLE = os.getenv("CHECKPOINTS_TABLE")
+    USAGE_TABLE = os.getenv("USAGE_TABLE")
+    # "agent" runs the tool calling agent, the opt-in "catalogue" extracts the tags in one LLM call and creates the new ones in code
+    TAG_EXTRACTOR_MODE = os.getenv("TAG_EXTRACTOR_MODE", "agent")
+    TAGS_CATALOGUE_TTL_SECONDS = int(os.getenv("TAGS_CATALOGUE_TTL_SECONDS", 5 * 60))
+
+    # Pipeline checkpoints configuration
+    CHECKPOINT_TTL_SECONDS = int(os.getenv("CHECKPOINT_TTL_SECONDS", 7 * 24 * 60 * 60))
+    # Checkpoints over this size are not stored in DynamoDB (the item limit is 400KB)
+    CHECKPOINT_MAX_BYTES = int(os.getenv("CHECKPOINT_MAX_BYTES", 350 * 1024))
+    # Snapshot of the warm caches (slack users, channels and tags) in /tmp and in the checkpoints table by default
+    WARM_STATE_ENABLED = os.getenv("WARM_STATE_ENABLED", "true").lower() == "true"
+    WARM_STATE_PATH = os.getenv("WARM_STATE_PATH", "/tmp/warm_state.json.gz")
+    WARM_STATE_TABLE = os.getenv("WARM_STATE_TABLE", CHECKPOINTS_TABLE)
+    WARM_STATE_TTL_SECONDS = int(os.getenv("WARM_STATE_TTL_SECONDS", 6 * 60 * 60))
+
+    # Backfill configuration
+    BACKFILL_MAX_CONCURRENCY = int(os.getenv("BACKFILL_MAX_CONCURRENCY", 3))
+    BACKFILL_MAX_DAYS = int(os.getenv("BACKFILL_MAX_DAYS", 31))
+
+    # Multi-user batch configuration
+    BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", 4))
+    # The general summary is streamed to a slack message updated at most once per interval, the streamed calls skip the LLM cache
+    SLACK_STREAMING_ENABLED = os.getenv("SLACK_STREAMING_ENABLED", "false").lower() == "true"
+    SLACK_STREAMING_UPDATE_INTERVAL_SECONDS = float(os.getenv("SLACK_STREAMING_UPDATE_INTERVAL_SECONDS", 1.5))
+    # Channels and threads fetched at the same time by get_conversations, within the rate limit tier of each Slack method
+    SLACK_FETCH_MAX_CONCURRENCY = int(os.getenv("SLACK_FETCH_MAX_CONCURRENCY", 8))
+    # The history is only fetched for the channels where search.messages finds messages or mentions of the user
+    SLACK_SEARCH_PREFILTER_ENABLED = os.getenv("SLACK_SEARCH_PREFILTER_ENABLED", "true").lower() == "true"
+    SLACK_SEARCH_MAX_PAGES = int(os.getenv("SLACK_SEARCH_MAX_PAGES", 5))
+    SLACK_RATE_LIMIT_ENABLED = os.getenv("SLACK_RATE_LIMIT_ENABLED", "true").lower() == "true"
+    SLACK_RATE_LIMIT_RETRIES = int(os.getenv("SLACK_RATE_LIMIT_RETRIES", 2))
+    SLACK_USERS_CACHE_TTL_SECONDS = int(os.getenv("SLACK_USERS_CACHE_TTL_SECONDS", 6 * 60 * 60))
+    SLACK_USERS_PAGE_SIZE = int(os.getenv("SLACK_USERS_PAGE_SIZE", 200))
+    SLACK_USERS_LOOKUP_CONCURRENCY = int(os.getenv("SLACK_USERS_LOOKUP_CONCURRENCY", 4))
+    SLACK_CHANNELS_CACHE_TTL_SECONDS = int(os.getenv("SLACK_CHANNELS_CACHE_TTL_SECONDS", 60 * 60))
+    SLACK_CHANNELS_PAGE_SIZE = int(os.getenv("SLACK_CHANNELS_PAGE_SIZE", 200))
 
     def __init__(self):
         logging.basicConfig(level=self.LOG_LEVEL)
@@ -0,0 +1,147 @@
+import copy
+import json
+import logging
+import math
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from core.settings import settings
+from core.token_usage import get_encoding, count_tokens
+
+# Token ceilings of the data sent in the prompts, overridable with the TOKEN_BUDGETS setting
+DEFAULT_TOKEN_BUDGETS = {
+    "slack_conversations": 12000,
+    "slack_partial_summaries": 8000,
+    "gmail_messages": 12000,
+    "general_sources": 8000
+}
+
+# Max length of the strings tried, in order, before dropping list items
+STRING_LIMITS = (2000, 1000, 500, 250)
+
+
+@lru_cache()
+def get_token_budgets() -> Dict[str, int]:
+    """
+    Get the token ceiling of each stage, the default budgets updated with the TOKEN_BUDGETS setting
+    TOKEN_BUDGETS is a JSON object with stage -> max tokens, 0 disables the ceiling of the stage
+    """
+    budgets = dict(DEFAULT_TOKEN_BUDGETS)
+    if settings.TOKEN_BUDGETS:
+        budgets.update({stage: int(max_tokens) for stage, max_tokens in json.loads(settings.TOKEN_BUDGETS).items()})
+    return budgets
+
+
+def _dumps(value: Any) -> str:
+    return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)
+
+
+def _truncate_strings(value: Any, max_chars: int) -> int:
+    """
+    Truncate in place the strings of a JSON value longer than max_chars
+    :return: number of truncated strings
+    """
+    truncated = 0
+    items = value.items() if isinstance(value, dict) else enumerate(value) if isinstance(value, list) else []
+    for key, item in items:
+        if isinstance(item, str) and len(item) > max_chars:
+            value[key] = item[:max_chars] + "..."
+            truncated += 1
+        elif isinstance(item, (dict, list)):
+            truncated += _truncate_strings(item, max_chars)
+    return truncated
+
+
+def _find_largest_list(value: Any) -> Optional[List]:
+    """
+    Find the list with more than one item and the largest serialized size of a JSON value
+    """
+    largest, largest_size = None, 0
+    pending = [value]
+    while pending:
+        item = pending.pop()
+        if isinstance(item, list):
+            size = len(_dumps(item))
+            if len(item) > 1 and size > largest_size:
+                largest, largest_size = item, size
+            pending.extend(item)
+        elif isinstance(item, dict):
+            pending.extend(item.values())
+    return largest
+
+
+class TokenBudgeter:
+    """
+    Fit the data of the prompts (source payloads and summaries) into the token ceiling of each stage
+    The long strings are shortened first, then the last items of the largest lists are dropped
+    and as a last resort the serialized text is cut. Every cut is logged
+    """
+
+    def __init__(self, model: str = None, budgets: Dict[str, int] = None):
+        self.model = model if model is not None else settings.DEFAULT_OPEN_AI_MODEL
+        self.budgets = budgets if budgets is not None else get_token_budgets()
+
+    def count(self, value: Any) -> int:
+        """
+        Count the tokens of a value once serialized as JSON (strings are counted as they are)
+        """
+        return count_tokens([_dumps(value)], self.model)
+
+    def _cut_text(self, text: str, max_tokens: int) -> str:
+        encoding = get_encoding(self.model or "")
+        if encoding is None:
+            # Same estimate as count_tokens, 4 characters per token
+            return text[:(max_tokens - 1) * 4]
+        return encoding.decode(encoding.encode(text)[:max_tokens])
+
+    def fit(self, stage: str, value: Any) -> Any:
+        """
+        Fit a JSON value into the token ceiling of the stage, the value is returned untouched if it fits
+        :param stage: str with the stage name in the budgets
+        :param value: JSON value (dict, list or str) sent in a prompt
+        :return: the value, or a reduced copy of it, the cut JSON text if it can not be reduced enough
+        """
+        max_tokens = self.budgets.get(stage)
+        initial_tokens = tokens = self.count(value)
+        if not max_tokens or tokens <= max_tokens:
+            return value
+
+        cuts = []
+        value = copy.deepcopy(value)
+        if isinstance(value, (dict, list)):
+            for max_chars in STRING_LIMITS:
+                truncated = _truncate_strings(value, max_chars)
+                if truncated:
+                    cuts.append(f"{truncated} strings shortened to {max_chars} chars")
+                    tokens = self.count(value)
+                if tokens <= max_tokens:
+                    break
+
+            dropped_items = 0
+            while tokens > max_tokens:
+                largest_list = _find_largest_list(value)
+                if largest_list is None:
+                    break
+                # Drop the excess share of the list at once, at least one item and always keeping one
+                drop = min(len(largest_list) - 1, max(1, math.ceil(len(largest_list) * (tokens - max_tokens) / tokens)))
+                del largest_list[-drop:]
+                dropped_items += drop
+                tokens = self.count(value)
+            if dropped_items:
+                cuts.append(f"{dropped_items} list items dropped")
+
+        if tokens > max_tokens:
+            value = self._cut_text(_dumps(value), max_tokens)
+            tokens = self.count(value)
+            cuts.append("text cut")
+
+        logging.warning(f"Token budget of {stage}: {initial_tokens} -> {tokens} tokens (limit {max_tokens}), cuts: {', '.join(cuts)}")
+        return value
+
+
+@lru_cache()
+def get_token_budgeter() -> TokenBudgeter:
+    """
+    Get the token budgeter of the default model shared by the agents and tools
+    """
+    return TokenBudgeter()
@@ -0,0 +1,194 @@
+import contextvars
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional
+from uuid import UUID
+
+import tiktoken
+from langchain_core.callbacks import BaseCallbackHandler
+from core.settings import settings
+
+# USD per 1M tokens (input, output), overridable with the OPENAI_PRICES setting
+DEFAULT_MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4-turbo": (10.00, 30.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "text-embedding-3-large": (0.13, 0.0),
+    "text-embedding-3-small": (0.02, 0.0),
+    "text-embedding-ada-002": (0.10, 0.0)
+}
+
+EMBEDDINGS_AGENT = "embeddings"
+"""Name used to account the embedding tokens of the vector store"""
+
+
+@lru_cache()
+def get_model_prices() -> Dict[str, tuple]:
+    """
+    Get the price table of the models, the default prices updated with the OPENAI_PRICES setting
+    OPENAI_PRICES is a JSON object with model -> [input price, output price] in USD per 1M tokens
+    """
+    prices = dict(DEFAULT_MODEL_PRICES)
+    if settings.OPENAI_PRICES:
+        prices.update({model: tuple(price) for model, price in json.loads(settings.OPENAI_PRICES).items()})
+    return prices
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int = 0) -> float:
+    """
+    Estimate the cost in USD of a model call, the longest priced prefix of the model name is used
+    (gpt-4o-mini-2024-07-18 is priced as gpt-4o-mini), 0 for unknown models
+    """
+    prices = get_model_prices()
+    priced_models = [priced_model for priced_model in prices if (model or "").startswith(priced_model)]
+    if not priced_models:
+        logging.warning(f"No price configured for model {model}, its cost is not accounted")
+        return 0.0
+
+    input_price, output_price = prices[max(priced_models, key=len)]
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+
+@lru_cache()
+def get_encoding(model: str) -> Optional[tiktoken.Encoding]:
+    """
+    Get the tokenizer of the model, cl100k_base for unknown models and None if it can not be loaded
+    """
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # The encodings are downloaded on first use, without them the tokens are estimated
+        logging.warning(f"Tokenizer of {model} not available, the tokens are estimated: {e}")
+        return None
+
+
+def count_tokens(texts: List[str], model: str) -> int:
+    """
+    Count the tokens of texts with the tokenizer of the model, the embeddings API does not return the usage
+    Without the tokenizer the tokens are estimated as 4 characters per token
+    """
+    encoding = get_encoding(model or "")
+    if encoding is None:
+        return sum(len(text) // 4 + 1 for text in texts)
+    return sum(len(encoding.encode(text)) for text in texts)
+
+
+class RunUsage:
+    """
+    Token usage and cost of one pipeline run, aggregated by agent (and the embeddings of the vector store)
+    The recorder is shared by the threads of the run, so every update is done under a lock
+    """
+
+    def __init__(self):
+        self._agents: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, agent: str, model: str, prompt_tokens: int = 0, completion_tokens: int = 0) -> None:
+        cost = estimate_cost(model, prompt_tokens, completion_tokens)
+        with self._lock:
+            agent_usage = self._agents.setdefault(agent, {
+                "llm_calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "cost_usd": 0.0
+            })
+            agent_usage["llm_calls"] += 1
+            agent_usage["prompt_tokens"] += prompt_tokens
+            agent_usage["completion_tokens"] += completion_tokens
+            agent_usage["total_tokens"] += prompt_tokens + completion_tokens
+            agent_usage["cost_usd"] += cost
+
+    def summary(self) -> dict:
+        """
+        Get the usage of each agent and the totals of the run
+        :return: dict with the agents usage and the total usage
+        """
+        with self._lock:
+            agents = {
+                agent: {**agent_usage, "cost_usd": round(agent_usage["cost_usd"], 6)}
+                for agent, agent_usage in self._agents.items()
+            }
+
+        total = {"llm_calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "cost_usd": 0.0}
+        for agent_usage in agents.values():
+            for counter in total:
+                total[counter] += agent_usage[counter]
+        total["cost_usd"] = round(total["cost_usd"], 6)
+
+        return {"agents": agents, "total": total}
+
+
+_current_usage: contextvars.ContextVar[Optional[RunUsage]] = contextvars.ContextVar("current_usage", default=None)
+
+
+def get_run_usage() -> Optional[RunUsage]:
+    """
+    Get the usage recorder of the current pipeline run, None outside a usage scope
+    """
+    return _current_usage.get()
+
+
+@contextmanager
+def usage_scope() -> Iterator[RunUsage]:
+    """
+    Open a usage scope for a pipeline run, the tokens spent inside the scope are aggregated in the recorder
+    """
+    recorder = RunUsage()
+    token = _current_usage.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current_usage.reset(token)
+
+
+def record_usage(agent: str, model: str, prompt_tokens: int = 0, completion_tokens: int = 0) -> None:
+    """
+    Record the tokens of a model call in the usage of the current run
+    """
+    recorder = get_run_usage()
+    if recorder is None:
+        logging.debug(f"Token usage of {agent} outside a run: {prompt_tokens} prompt, {completion_tokens} completion")
+        return
+    recorder.record(agent, model, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+
+class TokenUsageCallbackHandler(BaseCallbackHandler):
+    """
+    Langchain callback handler that accounts the prompt and completion tokens of every LLM call of an agent
+    """
+
+    # Run the handler in the caller context (also for async runs) to keep the usage recorder of the run
+    run_inline = True
+
+    def __init__(self, agent_name: str):
+        self.agent_name = agent_name
+
+    @staticmethod
+    def _get_token_usage(response: Any) -> tuple[int, int]:
+        """
+        Get the prompt and completion tokens of an LLM response, from the message usage metadata
+        or from the token usage of the provider output
+        """
+        prompt_tokens, completion_tokens = 0, 0
+        for generations in response.generations:
+            for generation in generations:
+                usage_metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage_metadata:
+                    prompt_tokens += usage_metadata.get("input_tokens", 0)
+                    completion_tokens += usage_metadata.get("output_tokens", 0)
+
+        if not prompt_tokens and not completion_tokens:
+            token_usage = (response.llm_output or {}).get("token_usage") or {}
+            prompt_tokens = token_usage.get("prompt_tokens", 0)
+            completion_tokens = token_usage.get("completion_tokens", 0)
+
+        return prompt_tokens, completion_tokens
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        prompt_tokens, completion_tokens = self._get_token_usage(response)
+        model = (response.llm_output or {}).get("model_name") or settings.DEFAULT_OPEN_AI_MODEL
+        record_usage(self.agent_name, model, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
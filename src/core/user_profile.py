@@ -0,0 +1,50 @@
+import json
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from typing import List
+from core.settings import settings
+
+@dataclass(frozen=True)
+class UserProfile:
+    """
+    Identity of a user to summarize, the slack and gmail accounts of the user and where to send the summary
+    """
+    user_id: str
+    slack_member_id: str
+    slack_user_display_name: str = ""
+    slack_user_full_name: str = ""
+    google_delegated_user: str = ""
+    notification_channel: str = "#daily-bot"
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'UserProfile':
+        """
+        Build a user profile from a dict, the user_id defaults to the slack member id
+        """
+        profile_fields = {field.name for field in fields(cls)}
+        profile_data = {key: value for key, value in data.items() if key in profile_fields and value is not None}
+        profile_data.setdefault("user_id", profile_data.get("slack_member_id"))
+        if not profile_data.get("user_id") or not profile_data.get("slack_member_id"):
+            raise ValueError(f"Invalid user profile, slack_member_id is required: {data}")
+        return cls(**profile_data)
+
+@lru_cache()
+def get_default_user_profile() -> UserProfile:
+    """
+    The user profile configured in the environment variables (single user deployment)
+    """
+    return UserProfile(
+        user_id=settings.SLACK_MEMBER_ID,
+        slack_member_id=settings.SLACK_MEMBER_ID,
+        slack_user_display_name=settings.SLACK_USER_DISPLAY_NAME,
+        slack_user_full_name=settings.SLACK_USER_FULL_NAME,
+        google_delegated_user=settings.GOOGLE_DELEGATED_USER
+    )
+
+def get_user_profiles() -> List[UserProfile]:
+    """
+    The user profiles configured in USER_PROFILES (JSON list), or the default user profile
+    """
+    if not settings.USER_PROFILES:
+        return [get_default_user_profile()]
+    return [UserProfile.from_dict(profile) for profile in json.loads(settings.USER_PROFILES)]
@@ -1,10 +1,14 @@
-from .gmail_summarizer_prompt import DailyGmailSummarizerPrompt
-from .slack_summarizer_prompt import DailySlackSummarizerPrompt
+from .gmail_summarizer_prompt import DailyGmailSummarizerPrompt, DailyGmailMessagesSummarizerPrompt
+from .slack_summarizer_prompt import DailySlackSummarizerPrompt, DailySlackConversationsSummarizerPrompt, DailySlackSummaryReducePrompt
 from .general_summarizer_prompt import GeneralSummarizerPrompt
-from .tag_extractor_prompt import TagExtractorPrompt
+from .tag_extractor_prompt import TagExtractorPrompt, TagCatalogueExtractorPrompt
 __all__ = [
     "DailyGmailSummarizerPrompt",
+    "DailyGmailMessagesSummarizerPrompt",
     "DailySlackSummarizerPrompt",
+    "DailySlackConversationsSummarizerPrompt",
+    "DailySlackSummaryReducePrompt",
     "GeneralSummarizerPrompt",
-    "TagExtractorPrompt"
+    "TagExtractorPrompt",
+    "TagCatalogueExtractorPrompt"
 ]
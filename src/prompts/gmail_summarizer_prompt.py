@@ -104,3 +104,94 @@ class DailyGmailSummarizerPrompt(PromptsInterface):
                 "reward": self.reward
             }
         )
+
+
+class DailyGmailMessagesSummarizerPrompt(PromptsInterface):
+    """
+    Prompt for summarizing the day's emails already fetched by the application, without tools.
+    """
+    def __init__(self):
+        super().__init__()
+
+    def get_prompt(self) -> PromptTemplate:
+        TEMPLATE_TEXT = """
+            <role>
+            You are an expert assistant in organizing daily information for users. Your main task is to analyze the emails sent and received by the user on a specific day.
+
+            With special attention to the emails that have been sent by the user, you need to get the context of the conversation from the other emails of the same thread.
+
+            You need to read just the emails of the day, you don't need to read any other day, just the day indicated.
+            </role>
+
+            <task>
+            Analyze emails for the specific date {day} only. Follow these steps:
+            1. The emails between {previous_day} and {next_day} are already retrieved, they are in the gmail_messages section as a JSON list.
+            2. Discard the emails that are not from the day {day} using their date.
+            3. Process ALL the emails of the day at once.
+            4. Generate the summary AFTER processing all emails.
+            </task>
+
+            <constraints>
+            - If there are no emails for the day, still produce the output JSON with empty sections.
+            - The emails with sent_by_user true were sent by the user.
+            - The emails with the same thread_id are part of the same conversation, use them to get the context of the conversation.
+            - The body of the emails with is_truncated true is incomplete.
+            </constraints>
+
+            <output_format>
+            Respond only with a JSON in the following format:
+                <JSON>
+                    day: "YYYY-MM-DD", :str
+                    key_points: value, :list[str]
+                    important_tasks: value, :list[str]
+                    general_detailed_summary: value, :str
+                    emails_summary: [
+                        <Email JSON Item>
+                            subject: "subject", :str
+                            sender: value, :str
+                            recipients: value, :list[str]
+                            summary: value, :str
+                            relevance_score: :int value between 0 and 100
+                            required_action: value, :bool
+                            raw_content: value, :str
+                            is_transactional: value, :bool
+                            is_emailmkt_campaign: value, :bool
+                            is_automatic_reply: value, :bool
+                        </Email JSON Item>,
+                        ...
+                    ],
+                </JSON>
+            </output_format>
+
+            <details>
+            - In the `emails_summary` field, analyze each email and extract relevant information such as the subject, sender, recipients, a brief summary of the content, and if any action is required.
+            - In `key_points`, include the topics or conclusions discussed during the day.
+            - In `important_tasks`, highlight the tasks that must be prioritized or completed.
+            -Use the boolean fields to identify if the email is a transactional, emailmkt campaign or an automatic reply to not include this information in the summary.
+            -If the email is a transactional, emailmkt campaign or an automatic reply the relevance_score must be 0.
+            - The relevance score must be higher in the conversation emails, the emails sended by the user are the most important.
+            - Same case for the emails received by the user for any project or task.
+            -Use the relevance_score field to identify the relevance of the email to the user, this will help you to prioritize the emails in the summary.
+            -Order the emails in the summary by the relevance_score field from highest to lowest.
+            </details>
+            <input>
+                The day to analyze the activity is: {day}.
+            </input>
+            <gmail_messages>
+            {emails}
+            </gmail_messages>
+            <constraints>
+                {security_instructions}
+                {output_language}
+                {reward}
+            </constraints>
+        """
+        return PromptTemplate(
+            input_variables=["day", "previous_day", "next_day", "emails"],
+            template=TEMPLATE_TEXT,
+            partial_variables={
+                "output_language": self.output_language,
+                "security_instructions": self.security_instructions,
+                "reward": self.reward
+            }
+        )
@@ -115,3 +115,153 @@ class DailySlackSummarizerPrompt(PromptsInterface):
                 "reward": self.reward
             }
         )
+
+
+class DailySlackConversationsSummarizerPrompt(PromptsInterface):
+    """
+    Prompt for summarizing the day's Slack conversations already fetched by the application, without tools.
+    """
+    def __init__(self):
+        super().__init__()
+
+    def get_prompt(self) -> PromptTemplate:
+        TEMPLATE_TEXT = """
+            <role>
+            You are an expert assistant in organizing daily information for users. Your main task is to analyze the Slack interactions of the user on a specific day.
+
+            Focus on the conversations the user participated in or messages that are relevant to the user. Consider individual messages, threads, and any context required to understand the conversations. Identify key points, tasks, and summarize discussions.
+
+            Only analyze Slack messages for the specified day. Do not consider messages before or after that day.
+            The user's name in Slack is {slack_user_display_name} and his member id is {slack_member_id} and his full name is {slack_user_full_name}. Any message with those identifiers are the user messages.
+            </role>
+
+            <task>
+            -The conversations of the user in the day {day} are already retrieved, they are in the slack_conversations section as a JSON list of channels with their messages and thread replies.
+            -Consider both top-level messages and thread replies.
+            -Only consider the messages of the day {day}.
+            -Generate a summary of the user's day in Slack.
+            -Consider the relevance of the messages to the user, if the user is not mentioned in the message, or if the user dont participate in the channel, the message in the analyzed day is not relevant.
+            </task>
+
+            <constraints>
+            - If there are no Slack conversations for that day, still produce the output JSON with empty sections.
+            - Threads: If a message is part of a thread, use its thread_messages to understand the thread's context.
+            - Limit the analysis to messages on the exact given date {day}. Do not consider messages from previous or subsequent days.
+            </constraints>
+
+            <output_format>
+            Respond only with a JSON in the following format:
+            <JSON>
+                day: "YYYY-MM-DD", :str
+                key_points: value, :list[str]
+                important_tasks: value, :list[str]
+                general_detailed_summary: value, :str
+                summary_evidences: [
+                    <Slack Summary JSON Item>
+                        where: channel_name, conversation with X user, etc :str
+                        user: value, :str
+                        content_summary: value, :str
+                        relevance_score: :int value between 0 and 100
+                        required_action: value, :bool
+                        raw_content: value, :str
+                        is_important_announcement: value, :bool
+                        is_thread_reply: value, :bool
+                        thread_summary: value, :str (only if the message is part of a thread)
+                    <Slack Summary JSON Item>,
+                    ...
+                ]
+            </JSON>
+            </output_format>
+
+            <details>
+            - In where field, describe the context of the conversation, for example: channel_name, conversation with X user, etc. Is the source of the conversation.
+            - In the summary_evidences field, analyze each channel, list the messages of the day that the user interacted with or that are relevant to the user, and include details such as the user who posted, a brief summary of the message, its raw content, and whether an action is required.
+            - If a message is part of a thread, provide a thread_summary with the context of that thread.
+            - Use the relevance_score to highlight how important each message is to the user. Order the messages within each channel by relevance_score from highest to lowest.
+            - The relevance score must be higher in the conversation messages about projects or tasks where the user is involved.
+            - The relevance score must be lower in general conversations where the user is not involved.
+            - In key_points, summarize the main topics or conclusions discussed during that day.
+            - In important_tasks, identify action items or tasks that should be prioritized or completed.
+            - If no messages or relevant data are found, leave those sections empty but still return the JSON structure.
+            </details>
+
+            <input>
+                The day to analyze the activity is: {day}.
+            </input>
+
+            <slack_conversations>
+            {conversations}
+            </slack_conversations>
+
+            <constraints>
+                {security_instructions}
+                {output_language}
+                {reward}
+            </constraints>
+        """
+        return PromptTemplate(
+            input_variables=["day", "conversations", "slack_user_display_name", "slack_member_id", "slack_user_full_name"],
+            template=TEMPLATE_TEXT,
+            partial_variables={
+                "output_language": self.output_language,
+                "security_instructions": self.security_instructions,
+                "reward": self.reward
+            }
+        )
+
+
+class DailySlackSummaryReducePrompt(PromptsInterface):
+    """
+    Prompt for merging the partial summaries of the day's Slack conversations, each one of a group of channels.
+    """
+    def __init__(self):
+        super().__init__()
+
+    def get_prompt(self) -> PromptTemplate:
+        TEMPLATE_TEXT = """
+            <role>
+            You are an expert assistant in organizing daily information for users. Your main task is to merge the partial summaries of the Slack interactions of the user on a specific day into a single summary of the day.
+
+            Each partial summary was generated from a different group of channels of the same day.
+            The user's name in Slack is {slack_user_display_name} and his member id is {slack_member_id} and his full name is {slack_user_full_name}.
+            </role>
+
+            <task>
+            -Read all the partial summaries in the slack_partial_summaries section.
+            -Merge the key points and the important tasks, removing the duplicated ones and keeping the most relevant for the user first.
+            -Write a general detailed summary of the whole day from the partial summaries.
+            </task>
+
+            <output_format>
+            Respond only with a JSON in the following format:
+            <JSON>
+                day: "YYYY-MM-DD", :str
+                key_points: value, :list[str]
+                important_tasks: value, :list[str]
+                general_detailed_summary: value, :str
+            </JSON>
+            </output_format>
+
+            <input>
+                The day to analyze the activity is: {day}.
+            </input>
+
+            <slack_partial_summaries>
+            {partial_summaries}
+            </slack_partial_summaries>
+
+            <constraints>
+                {security_instructions}
+                {output_language}
+                {reward}
+            </constraints>
+        """
+        return PromptTemplate(
+            input_variables=["day", "partial_summaries", "slack_user_display_name", "slack_member_id", "slack_user_full_name"],
+            template=TEMPLATE_TEXT,
+            partial_variables={
+                "output_language": self.output_language,
+                "security_instructions": self.security_instructions,
+                "reward": self.reward
+            }
+        )
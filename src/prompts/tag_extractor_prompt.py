@@ -116,4 +116,80 @@ class TagExtractorPrompt(PromptsInterface):
                     "security_instructions": self.security_instructions,
                     "reward": self.reward
                 }
-            )
\ No newline at end of file
+            )
+
+class TagCatalogueExtractorPrompt(PromptsInterface):
+    """
+    Prompt for extracting the contextual tags of a daily summary in a single call, without tools.
+    The existing tags are given in the prompt and the new tags are created by the application.
+    """
+    def __init__(self):
+        super().__init__()
+
+    def get_prompt(self) -> PromptTemplate:
+        TEMPLATE_TEXT = """
+            <role>
+            You are an expert assistant in semantic text analysis and metadata extraction.
+            Your task is to receive a pre-generated daily summary, analyze it and identify key entities
+            related to projects, areas and people mentioned in that summary.
+            </role>
+
+            <task>
+            Steps:
+            1. Read the provided daily summary.
+            2. Identify references to projects, areas and people.
+            3. For each identified entity, check if it is one of the existing tags. If it is, use the exact name of the existing tag.
+            4. Create relationships between projects and people
+            </task>
+
+            <rules>
+            - Do not include the original summary in the response
+            - Focus on extracting entities of type "project", "area" and "person"
+            - If an entity is one of the existing tags or is very similar to one of them, ALWAYS use the existing tag name instead of a new one.
+            - The tags must be as general as possible, not very specific. for example:
+                - "Presentation" is a project, but "Presentation" is not a tag, it's a part of a project.
+                - "Bryan" is a person, but "Bryan" is not a tag, it's a name of a person.
+                - "David" is a person, but "David" is not a tag, it's a name of a person.
+            - The tags must be unique and not similar to other existing tags.
+            - The tags must be reusable and not specific to a single summary, think about the future use of the tag before using a new tag. Only use new tags that will be used in the future.
+            - Avoid duplicate tags or tags with the same name or similar names.
+            </rules>
+
+            <existing_tags>
+            {existing_tags}
+            </existing_tags>
+
+            <input>
+            {daily_summary}
+            </input>
+
+            <output_format>
+            Respond only with a JSON in the following format:
+                <JSON>
+                    "tags": [
+                        <JSON Item>
+                            "name": "string",
+                            "type": "string", # it must be "project", "area" or "person"
+                            "related_projects": ["string"],
+                            "related_people": ["string"],
+                        </JSON Item>
+                        ...
+                    ]
+                <JSON>
+            </output_format>
+
+            <constraints>
+                {security_instructions}
+                {output_language}
+                {reward}
+            </constraints>
+        """
+        return PromptTemplate(
+                input_variables=["daily_summary", "existing_tags"],
+                template=TEMPLATE_TEXT,
+                partial_variables={
+                    "output_language": self.output_language,
+                    "security_instructions": self.security_instructions,
+                    "reward": self.reward
+                }
+            )
@@ -1,10 +1,13 @@
 from .dynamo.dynamo_db_service import DynamoDbService
 from .pinecone_service import PineconeService
 from .summarizer_service import SummarizerService
+from .warm_state_service import WarmStateService, warm_state_service
 
 __all__ = [
     "DynamoDbService",
     "PineconeService",
-    "SummarizerService"
+    "SummarizerService",
+    "WarmStateService",
+    "warm_state_service"
 ]
 
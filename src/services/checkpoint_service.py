@@ -0,0 +1,142 @@
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Tuple
+from core.settings import settings
+from .dynamo.dynamo_db_service import DynamoDbService
+
+
+class CheckpointStoreInterface(ABC):
+    """
+    Interface for the stores of the summarizer pipeline checkpoints
+    Each stage output (gmail, slack, general, tags, sinks) is stored under a (run_key, stage) key
+    """
+
+    @abstractmethod
+    def get(self, run_key: str, stage: str) -> Optional[Any]:
+        """
+        Get the stored output of a stage, None if the stage has not been completed
+        """
+        pass
+
+    @abstractmethod
+    def save(self, run_key: str, stage: str, output: Any) -> None:
+        """
+        Store the output of a completed stage
+        """
+        pass
+
+    @abstractmethod
+    def delete(self, run_key: str, stage: str) -> None:
+        """
+        Delete the stored output of a stage, the stage will be executed again
+        """
+        pass
+
+    @staticmethod
+    def build_key(run_key: str, stage: str) -> str:
+        return f"{run_key}#{stage}"
+
+    @staticmethod
+    def serialize_output(output: Any) -> str:
+        """
+        Serialize a stage output to JSON without the raw tool outputs of its tool usage
+        The raw source data (slack conversations, emails) is already summarized by the stage and is not needed to resume it
+        """
+        if isinstance(output, dict) and isinstance(output.get("tool_usage"), list):
+            output = {
+                **output,
+                "tool_usage": [
+                    {key: value for key, value in tool_call.items() if key != "tool_output"} if isinstance(tool_call, dict) else tool_call
+                    for tool_call in output["tool_usage"]
+                ]
+            }
+        return json.dumps(output, ensure_ascii=False)
+
+
+class InMemoryCheckpointStore(CheckpointStoreInterface):
+    """
+    Local checkpoint store, lives as long as the lambda container (or the local process)
+    """
+
+    def __init__(self, ttl_seconds: int = settings.CHECKPOINT_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._checkpoints: Dict[str, Tuple[float, str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, run_key: str, stage: str) -> Optional[Any]:
+        with self._lock:
+            checkpoint = self._checkpoints.get(self.build_key(run_key, stage))
+        if checkpoint is None:
+            return None
+
+        expires_at, output = checkpoint
+        if expires_at < time.time():
+            return None
+        return json.loads(output)
+
+    def save(self, run_key: str, stage: str, output: Any) -> None:
+        # The output is serialized to store a snapshot, later mutations of the output do not change the checkpoint
+        checkpoint = (time.time() + self.ttl_seconds, self.serialize_output(output))
+        with self._lock:
+            self._checkpoints[self.build_key(run_key, stage)] = checkpoint
+
+    def delete(self, run_key: str, stage: str) -> None:
+        with self._lock:
+            self._checkpoints.pop(self.build_key(run_key, stage), None)
+
+
+class DynamoCheckpointStore(CheckpointStoreInterface):
+    """
+    Checkpoint store in DynamoDB, shared by every lambda container so a retry can resume the pipeline
+    The output is stored as a JSON string to avoid the float/Decimal conversions of DynamoDB
+    The expires_at attribute is the TTL attribute of the table
+    An output over max_bytes is not stored, its stage is executed again on a resume
+    """
+
+    def __init__(
+        self,
+        table_name: str = settings.CHECKPOINTS_TABLE,
+        ttl_seconds: int = settings.CHECKPOINT_TTL_SECONDS,
+        max_bytes: int = settings.CHECKPOINT_MAX_BYTES
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.checkpoints_db = DynamoDbService(table_name=table_name)
+
+    def get(self, run_key: str, stage: str) -> Optional[Any]:
+        checkpoint = self.checkpoints_db.find_by_pk(self.build_key(run_key, stage))
+        if not checkpoint or int(checkpoint.get('expires_at', 0)) < time.time():
+            return None
+        return json.loads(checkpoint['output'])
+
+    def save(self, run_key: str, stage: str, output: Any) -> None:
+        serialized_output = self.serialize_output(output)
+        output_bytes = len(serialized_output.encode("utf-8"))
+        if output_bytes > self.max_bytes:
+            logging.warning(f"Checkpoint of stage {stage} for run {run_key} not stored, its {output_bytes} bytes are over the item size limit")
+            return
+
+        self.checkpoints_db.upsert(
+            self.build_key(run_key, stage),
+            {
+                "run_key": run_key,
+                "stage": stage,
+                "output": serialized_output,
+                "expires_at": int(time.time() + self.ttl_seconds)
+            }
+        )
+
+    def delete(self, run_key: str, stage: str) -> None:
+        self.checkpoints_db.delete_by_pk(self.build_key(run_key, stage))
+
+
+def get_checkpoint_store() -> CheckpointStoreInterface:
+    """
+    Get the checkpoint store, DynamoDB if the checkpoints table is configured, in memory otherwise
+    """
+    if settings.CHECKPOINTS_TABLE:
+        return DynamoCheckpointStore(table_name=settings.CHECKPOINTS_TABLE)
+    return InMemoryCheckpointStore()
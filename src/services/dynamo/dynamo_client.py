@@ -1,7 +1,13 @@
+from core.registry import registry
 from core.settings import settings
 import boto3
 
+registry.register("dynamodb", lambda: boto3.resource('dynamodb', region_name=settings.DYNAMODB_REGION_NAME))
+
 class DynamoBaseClient:
     """Base class for DynamoDB clients"""
-    dynamodb = boto3.resource('dynamodb', region_name=settings.DYNAMODB_REGION_NAME)
-    """The DynamoDB resource"""
\ No newline at end of file
+
+    @property
+    def dynamodb(self):
+        """The DynamoDB resource, created on the first use"""
+        return registry.get("dynamodb")
@@ -5,6 +5,7 @@ import uuid
 from datetime import datetime, timezone
 from .dynamo_client import DynamoBaseClient
 from decimal import Decimal
+from core.metrics import timed_stage
 
 
 class DynamoDbService(DynamoBaseClient):
@@ -17,7 +18,14 @@ class DynamoDbService(DynamoBaseClient):
         if not hasattr(self, '_initialized'):
             self._initialized = True
             self.table_name = table_name
-            self.table = self._get_table(table_name)
+            self._table = None
+
+    @property
+    def table(self) -> Any:
+        """The table, it is validated (table.load) on the first use instead of when the service is created"""
+        if self._table is None:
+            self._table = self._get_table(self.table_name)
+        return self._table
 
     def _get_table(self, table_name: str) -> Any:
         """Gets and validates table exists in DynamoDB"""
@@ -94,6 +102,7 @@ class DynamoDbService(DynamoBaseClient):
             logging.error(traceback.format_exc())
             raise e
 
+    @timed_stage()
     def create(self, item: Dict) -> Dict:
         """
         Creates a new item in DynamoDB
@@ -112,6 +121,104 @@ class DynamoDbService(DynamoBaseClient):
             logging.error(traceback.format_exc())
             raise e
 
+    @timed_stage()
+    def upsert(self, primary_key: str, item: Dict) -> Dict:
+        """
+        Creates or replaces an item in DynamoDB using a deterministic primary key
+        :param primary_key: Primary key of the item
+        :param item: Dictionary with the item data
+        :return: Stored item
+        """
+        try:
+            item['uuid'] = primary_key
+            item['updated_at'] = datetime.now(timezone.utc).isoformat()
+            self.table.put_item(Item=item)
+
+            return item
+        except ClientError as e:
+            logging.error(f"Error upserting {self.table.name}: {e}")
+            logging.error(traceback.format_exc())
+            raise e
+
+    @timed_stage()
+    def update(self, primary_key: str, fields: Dict) -> None:
+        """
+        Sets some fields of an existing item, the floats are stored as Decimal
+        :param primary_key: Primary key of the item
+        :param fields: Dictionary with the fields to set
+        """
+        try:
+            names = {f"#f{index}": field for index, field in enumerate(fields)}
+            values = {f":v{index}": self.to_dynamo(value) for index, value in enumerate(fields.values())}
+            self.table.update_item(
+                Key={'uuid': primary_key},
+                UpdateExpression="SET " + ", ".join(f"#f{index} = :v{index}" for index in range(len(fields))),
+                ConditionExpression="attribute_exists(#pk)",
+                ExpressionAttributeNames={**names, "#pk": "uuid"},
+                ExpressionAttributeValues=values
+            )
+        except ClientError as e:
+            logging.error(f"Error updating {self.table.name}: {e}")
+            logging.error(traceback.format_exc())
+            raise e
+
+    @timed_stage()
+    def increment(self, primary_key: str, counters: Dict[str, float]) -> Dict:
+        """
+        Atomically adds the counters to an item, the item and the missing counters are created at 0
+        Concurrent increments of the same item are not lost
+        :param primary_key: Primary key of the item
+        :param counters: Dictionary with counter name -> amount to add
+        :return: Item with the updated counters
+        """
+        try:
+            names = {f"#c{index}": counter for index, counter in enumerate(counters)}
+            values = {f":v{index}": self.to_dynamo(amount) for index, amount in enumerate(counters.values())}
+            response = self.table.update_item(
+                Key={'uuid': primary_key},
+                UpdateExpression=(
+                    "ADD " + ", ".join(f"#c{index} :v{index}" for index in range(len(counters)))
+                    + " SET #updated_at = :updated_at"
+                ),
+                ExpressionAttributeNames={**names, "#updated_at": "updated_at"},
+                ExpressionAttributeValues={**values, ":updated_at": datetime.now(timezone.utc).isoformat()},
+                ReturnValues="ALL_NEW"
+            )
+            return response.get('Attributes', {})
+        except ClientError as e:
+            logging.error(f"Error incrementing {self.table.name}: {e}")
+            logging.error(traceback.format_exc())
+            raise e
+
+    def find_by_pk(self, primary_key: str) -> Optional[Dict]:
+        """
+        Gets an item by its primary key without raising an error when it does not exist
+        :param primary_key: Primary key of the item to get
+        :return: Found item or None
+        """
+        try:
+            response = self.table.get_item(
+                Key={'uuid': primary_key},
+                ConsistentRead=True
+            )
+            return response.get('Item')
+        except ClientError as e:
+            logging.error(f"Error finding by id: {e}")
+            logging.error(traceback.format_exc())
+            raise e
+
+    def delete_by_pk(self, primary_key: str) -> None:
+        """
+        Deletes an item by its primary key, it does nothing if the item does not exist
+        :param primary_key: Primary key of the item to delete
+        """
+        try:
+            self.table.delete_item(Key={'uuid': primary_key})
+        except ClientError as e:
+            logging.error(f"Error deleting by id: {e}")
+            logging.error(traceback.format_exc())
+            raise e
+
     def bulk_create(self, items: List[Dict]) -> Dict:
         """
         Creates multiple items in DynamoDB using batch operations
@@ -136,6 +243,19 @@ class DynamoDbService(DynamoBaseClient):
             logging.error(f"Error in batch write: {e}")
             raise e
     
+    @staticmethod
+    def to_dynamo(value: Any) -> Any:
+        """
+        Converts the floats of a value to Decimal, boto3 does not accept floats
+        """
+        if isinstance(value, dict):
+            return {key: DynamoDbService.to_dynamo(item) for key, item in value.items()}
+        elif isinstance(value, list):
+            return [DynamoDbService.to_dynamo(item) for item in value]
+        elif isinstance(value, float):
+            return Decimal(str(value))
+        return value
+
     @staticmethod
     def parse_dynamo_response(dynamo_data: Any) -> Any:
         """
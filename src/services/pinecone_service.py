@@ -1,6 +1,7 @@
 """
 Pinecone service based on the Langchain documentation: https://python.langchain.com/docs/integrations/vectorstores/pinecone/
 """
+import threading
 import time
 from uuid import uuid4
 from typing import List
@@ -10,6 +11,8 @@ from langchain_openai import OpenAIEmbeddings
 from langchain_pinecone import PineconeVectorStore
 from langchain_core.documents import Document
 import json
+from core.metrics import measure_stage, timed_stage
+from core.token_usage import EMBEDDINGS_AGENT, count_tokens, record_usage
 
 class PineconeService:
     """
@@ -26,22 +29,35 @@ class PineconeService:
     def __init__(self, index_name: str = settings.BASE_PINECONE_INDEX_NAME):
         if not self._initialized:
             self._index_name = index_name
-            self._client = Pinecone(api_key=settings.PINECONE_API_KEY)
-            self._embeddings = OpenAIEmbeddings(
-                model=settings.DEFAULT_OPENAI_EMBEDDING_MODEL
-            )
-            self._index = self._get_or_create_index()
-            self._vector_store = PineconeVectorStore(
-                index=self._index, 
-                embedding=self._embeddings
-            )
+            # The client, index and vector store are created on the first use of the vector store
+            self._vector_store = None
+            self._vector_store_lock = threading.Lock()
             self._initialized = True
 
     @property
     def vector_store(self) -> PineconeVectorStore:
         """Controlled access to the vector store"""
+        if self._vector_store is None:
+            with self._vector_store_lock:
+                if self._vector_store is None:
+                    with measure_stage("init:pinecone_vector_store"):
+                        self._vector_store = self._build_vector_store()
         return self._vector_store
 
+    def _build_vector_store(self) -> PineconeVectorStore:
+        """
+        Create the Pinecone client and the vector store of the index, the index is created if it does not exist
+        """
+        self._client = Pinecone(api_key=settings.PINECONE_API_KEY)
+        self._embeddings = OpenAIEmbeddings(
+            model=settings.DEFAULT_OPENAI_EMBEDDING_MODEL
+        )
+        self._index = self._get_or_create_index()
+        return PineconeVectorStore(
+            index=self._index, 
+            embedding=self._embeddings
+        )
+
     def _get_or_create_index(self):
         """
         Get or create the index
@@ -63,16 +79,27 @@ class PineconeService:
 
         return self._client.Index(self._index_name)
 
-    def add_documents(self, documents: List[Document]):
+    @timed_stage()
+    def add_documents(self, documents: List[Document], ids: List[str] = None):
         """
         Add documents to the vector store
         :param documents: List[Document] with the documents to add
+        :param ids: List[str] with deterministic ids of the documents, an existing id is overwritten (random uuids by default)
         :return: dict with the result of the operation
         """
-        uuids = [str(uuid4()) for _ in range(len(documents))]
+        uuids = ids if ids is not None else [str(uuid4()) for _ in range(len(documents))]
         result = self.vector_store.add_documents(documents=documents, ids=uuids)
+        self._record_embedding_usage([document.page_content for document in documents])
         return result
 
+    def _record_embedding_usage(self, texts: List[str]) -> None:
+        """
+        Account the embedding tokens of the texts in the usage of the current run
+        The embeddings client does not return the usage, the tokens are counted with the model tokenizer
+        """
+        embedding_model = settings.DEFAULT_OPENAI_EMBEDDING_MODEL
+        record_usage(EMBEDDINGS_AGENT, embedding_model, prompt_tokens=count_tokens(texts, embedding_model))
+
     def query(self, text_to_search: str, returned_documents: int = 10, filters_by_metadata: dict = None):
         """
         Query the vector store
@@ -86,6 +113,7 @@ class PineconeService:
             k=returned_documents,
             filter=filters_by_metadata
         )
+        self._record_embedding_usage([text_to_search])
         return results
 
     @staticmethod
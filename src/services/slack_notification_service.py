@@ -1,8 +1,13 @@
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
 from core.settings import settings
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.utils.json import parse_json_markdown
 import logging
+import threading
+import time
 
 
 class SlackNotificationService():
@@ -22,4 +27,131 @@ class SlackNotificationService():
             return True
         except SlackApiError as e:
             logging.error(f"Error sending message to Slack: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+
+    def post_message(self, message: str, channel: str = '#daily-bot') -> Optional[Dict[str, str]]:
+        """
+        Post a message that is updated later
+        :return: dict with the channel id and the ts of the message, None if it was not posted
+        """
+        try:
+            response = self.client.chat_postMessage(channel=channel, text=message)
+            return {"channel": response["channel"], "ts": response["ts"]}
+        except SlackApiError as e:
+            logging.error(f"Error sending message to Slack: {str(e)}")
+            return None
+
+    def update_message(self, message: str, channel: str, ts: str) -> bool:
+        """
+        Replace the text of a posted message
+        """
+        try:
+            self.client.chat_update(channel=channel, ts=ts, text=message)
+            return True
+        except SlackApiError as e:
+            logging.error(f"Error updating message in Slack: {str(e)}")
+            return False
+
+
+class StreamingSlackMessage:
+    """
+    Slack message updated while the summary is generated
+    A placeholder is posted at the start, the partial texts are pushed with chat_update at most once per interval
+    (the texts in between are skipped) and the final text is pushed when the message is finalized
+    """
+
+    def __init__(
+        self,
+        notification_service: SlackNotificationService,
+        channel: str = '#daily-bot',
+        update_interval_seconds: float = None,
+        placeholder: str = "Generando el resumen del día..."
+    ):
+        self.notification_service = notification_service
+        self.channel = channel
+        self.update_interval_seconds = update_interval_seconds if update_interval_seconds is not None else settings.SLACK_STREAMING_UPDATE_INTERVAL_SECONDS
+        self.placeholder = placeholder
+        self.message: Optional[Dict[str, str]] = None
+        self._pushed_text: str = None
+        self._pushed_at: float = 0.0
+        self._lock = threading.Lock()
+
+    def start(self) -> "StreamingSlackMessage":
+        """
+        Post the placeholder message, the streaming is disabled if it can not be posted
+        """
+        self.message = self.notification_service.post_message(self.placeholder, channel=self.channel)
+        return self
+
+    def _push(self, text: str) -> bool:
+        if self.message is None or text == self._pushed_text:
+            return self.message is not None
+        updated = self.notification_service.update_message(text, channel=self.message["channel"], ts=self.message["ts"])
+        if updated:
+            self._pushed_text = text
+        self._pushed_at = time.monotonic()
+        return updated
+
+    def is_update_due(self) -> bool:
+        """
+        Check if the update interval has passed since the last push
+        """
+        return self.message is not None and time.monotonic() - self._pushed_at >= self.update_interval_seconds
+
+    def update(self, text: str) -> None:
+        """
+        Push a partial text if the update interval has passed since the last push
+        """
+        if not text:
+            return
+        with self._lock:
+            if time.monotonic() - self._pushed_at >= self.update_interval_seconds:
+                self._push(text)
+
+    def finalize(self, text: str) -> bool:
+        """
+        Push the final text of the message
+        :return: True if the final text is in the message
+        """
+        with self._lock:
+            return self._push(text)
+
+
+class SlackStreamingCallbackHandler(BaseCallbackHandler):
+    """
+    Langchain callback handler that pushes the summary field of the JSON being generated to a streaming slack message
+    Each LLM call starts a new text, the calls without content (tool calls) do not update the message
+    The tokens are only joined and parsed when an update is due, at most once per update interval
+    """
+
+    def __init__(self, streaming_message: StreamingSlackMessage, field: str = "daily_summary"):
+        self.streaming_message = streaming_message
+        self.field = field
+        self._tokens: Dict[UUID, List[str]] = {}
+        self._parsed_at: float = 0.0
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._tokens[run_id] = []
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._tokens[run_id] = []
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        tokens = self._tokens.setdefault(run_id, [])
+        tokens.append(token)
+        if not self.streaming_message.is_update_due() or time.monotonic() - self._parsed_at < self.streaming_message.update_interval_seconds:
+            return
+
+        self._parsed_at = time.monotonic()
+        try:
+            partial_output = parse_json_markdown("".join(tokens))
+        except Exception:
+            return
+        if isinstance(partial_output, dict) and isinstance(partial_output.get(self.field), str):
+            self.streaming_message.update(partial_output[self.field])
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._tokens.pop(run_id, None)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._tokens.pop(run_id, None)
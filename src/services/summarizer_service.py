@@ -1,96 +1,694 @@
+import asyncio
+import copy
 import logging
 import traceback
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
 from agents import SlackSummarizerAgent, GmailSummarizerAgent, GeneralSummarizerAgent, TagExtractorAgent
 from .pinecone_service import PineconeService
 from .dynamo.dynamo_db_service import DynamoDbService
 from langchain_core.documents import Document
 from tenacity import retry, stop_after_attempt, wait_exponential
-from .slack_notification_service import SlackNotificationService
+from .slack_notification_service import SlackNotificationService, StreamingSlackMessage, SlackStreamingCallbackHandler
+from .checkpoint_service import CheckpointStoreInterface, get_checkpoint_store
+from .summary_cache_service import SummaryResultCache
+from .usage_service import UsageService
 import logging
 from core.settings import settings
+from core.concurrency import run_in_threads
+from core.metrics import measure_stage, timed_stage
+from core.token_usage import usage_scope
+from core.user_profile import UserProfile, get_default_user_profile
 from langsmith import traceable
+from datetime import datetime, timezone
+
+PIPELINE_STAGES = ["gmail", "slack", "general", "tags", "sinks"]
 
 class SummarizerService:
     """
     Service to execute the summarizer workflow
     Get the summary from the different work sources and send the summary to the slack channel
+    Each stage output is stored as a checkpoint, a re-invocation for the same day resumes from the first incomplete stage
+    The agents, clients and caches of the service are shared by every user and day summarized in the container
+    A stored summary of the same user, day and pipeline version is returned without executing the pipeline again,
+    the sinks that failed in its run are dispatched again first
+    The tokens and cost of each run are stored with the summary and added to the daily and monthly usage totals
     """
-    def __init__(self, slack_notification_service: SlackNotificationService = None):
+    def __init__(self, slack_notification_service: SlackNotificationService = None, checkpoint_store: CheckpointStoreInterface = None):
         self.slack_notification_service = slack_notification_service if slack_notification_service is not None else SlackNotificationService()
-        self.gmail_summarizer = GmailSummarizerAgent(dummy_mode=True)
+        self.checkpoints = checkpoint_store if checkpoint_store is not None else get_checkpoint_store()
+        self.gmail_summarizer = GmailSummarizerAgent(dummy_mode=settings.GMAIL_DUMMY_MODE)
         self.slack_summarizer = SlackSummarizerAgent(dummy_mode=False)
         self.general_summarizer = GeneralSummarizerAgent()
         self.vector_store = PineconeService()
         self.tag_extractor = TagExtractorAgent()
         self.summaries_db = DynamoDbService(table_name=settings.SUMMARY_TABLE)
+        self.result_cache = SummaryResultCache(self.summaries_db)
+        self.usage_service = UsageService(table_name=settings.USAGE_TABLE) if settings.USAGE_TABLE else None
+
+    def _get_run_key(self, day: str, user_profile: UserProfile) -> str:
+        """
+        Get the key of the pipeline run (user, day and pipeline version)
+        It is used to store the stage checkpoints and as the deterministic key of the stored summary
+        """
+        return self.result_cache.build_key(user_profile.user_id, day)
+
+    def _reset_checkpoints(self, run_key: str) -> None:
+        """
+        Delete the checkpoints of every stage of the run, a forced run executes all the stages again
+        """
+        for stage in PIPELINE_STAGES:
+            self.checkpoints.delete(run_key, stage)
+
+    @staticmethod
+    def _build_cached_response(cached_summary: dict) -> dict:
+        """
+        Build the summarizer response of a summary found in the result cache
+        """
+        return {
+            "general_summary_result": cached_summary,
+            "slack_summary_result": None,
+            "gmail_summary_result": None,
+            "sinks_result": {},
+            "cache_hit": True
+        }
+
+    def _has_pending_sinks(self, run_key: str) -> bool:
+        """
+        Check if a sink failed in the sinks checkpoint of the run, its stored summary is not complete until it is retried
+        A run without sinks checkpoint (expired) has no pending sinks, its stored summary is complete
+        """
+        previous_sinks_result = self.checkpoints.get(run_key, "sinks") or {}
+        return any(not sink_result.get("success") for sink_result in previous_sinks_result.values())
+
+    def _build_resumed_response(self, cached_summary: dict, sinks_result: Dict[str, dict]) -> dict:
+        """
+        Build the summarizer response of a stored summary whose pending sinks were dispatched again
+        """
+        return {
+            "general_summary_result": cached_summary,
+            "slack_summary_result": None,
+            "gmail_summary_result": None,
+            "sinks_result": sinks_result,
+            "cache_hit": False
+        }
+
+    def _get_cached_semantic_summary(self, cached_summary: dict) -> str:
+        return self._build_semantic_summary(cached_summary['summary_result']['daily_summary'], cached_summary.get('tags', []))
+
+    def _save_checkpoint(self, run_key: str, stage: str, stage_output: Any) -> None:
+        """
+        Store the checkpoint of a stage, an error storing it is logged, it does not fail the run
+        """
+        try:
+            self.checkpoints.save(run_key, stage, stage_output)
+        except Exception as e:
+            logging.error(f"Error storing the checkpoint of stage {stage} for run {run_key}: {e}")
+
+    def _run_stage(self, run_key: str, stage: str, stage_task: Callable[[], Any]) -> Any:
+        """
+        Execute a pipeline stage or resume its output from the checkpoint store
+        :param run_key: str with the key of the pipeline run
+        :param stage: str with the stage name (gmail, slack, general, tags)
+        :param stage_task: callable without arguments that executes the stage
+        :return: the stage output
+        """
+        stage_output = self.checkpoints.get(run_key, stage)
+        if stage_output is not None:
+            logging.info(f"Resuming stage {stage} from checkpoint for run {run_key}")
+            return stage_output
+
+        with measure_stage(f"stage:{stage}"):
+            stage_output = stage_task()
+        self._save_checkpoint(run_key, stage, stage_output)
+        return stage_output
+
+    async def _arun_stage(self, run_key: str, stage: str, stage_task: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Async version of _run_stage, the checkpoint store calls are offloaded to a worker thread
+        """
+        stage_output = await asyncio.to_thread(self.checkpoints.get, run_key, stage)
+        if stage_output is not None:
+            logging.info(f"Resuming stage {stage} from checkpoint for run {run_key}")
+            return stage_output
+
+        with measure_stage(f"stage:{stage}"):
+            stage_output = await stage_task()
+        await asyncio.to_thread(self._save_checkpoint, run_key, stage, stage_output)
+        return stage_output
     
+    def _execute_source_agents(self, run_key: str, day: str, previous_day: str, next_day: str, user_profile: UserProfile) -> tuple[dict, dict]:
+        """
+        Execute the independent source agents (gmail and slack) concurrently and join their results
+        The agents have no data dependency between them, so the wall-clock time is the slowest agent instead of the sum
+        :param run_key: str with the key of the pipeline run
+        :param day: YYYY-MM-DD str with the day to summarize
+        :param previous_day: YYYY-MM-DD str with the previous day
+        :param next_day: YYYY-MM-DD str with the next day
+        :param user_profile: UserProfile with the user to summarize
+        :return: tuple with the gmail summary result and the slack summary result
+        """
+        source_agents = {
+            "gmail": self.gmail_summarizer,
+            "slack": self.slack_summarizer
+        }
+        results = run_in_threads(
+            {
+                source_name: partial(
+                    self._run_stage,
+                    run_key,
+                    source_name,
+                    partial(agent.execute_agent, day=day, previous_day=previous_day, next_day=next_day, user_profile=user_profile)
+                )
+                for source_name, agent in source_agents.items()
+            },
+            max_workers=len(source_agents)
+        )
+        return results["gmail"], results["slack"]
+
+    @staticmethod
+    def _build_semantic_summary(raw_summary: str, summary_tags: list) -> str:
+        """
+        Add the people, projects and areas found by the tag extractor to the raw summary
+        :param raw_summary: str with the daily summary
+        :param summary_tags: list with the extracted tags
+        :return: str with the summary enriched with the tags
+        """
+        people = [tag['name'] for tag in summary_tags if tag['type'] == 'person']
+        projects = [tag['name'] for tag in summary_tags if tag['type'] == 'project']
+        areas = [tag['name'] for tag in summary_tags if tag['type'] == 'area']
+        
+        people_str = f"Personas involucradas: {', '.join(people)}"
+        projects_str = f"Proyectos involucrados: {', '.join(projects)}"
+        areas_str = f"Areas involucradas: {', '.join(areas)}"
+        
+        return f"{raw_summary}\n\n{str(people_str)}\n\n{str(projects_str)}\n\n{str(areas_str)}"
+
+    def _start_streaming_message(self, run_key: str, user_profile: UserProfile) -> Optional[StreamingSlackMessage]:
+        """
+        Post the placeholder of the streamed summary in the slack channel of the user, only in streaming mode
+        A resumed run that already sent the summary to slack does not post it again
+        :return: the streaming message, None if the summary is not streamed
+        """
+        if not self.general_summarizer.streaming:
+            return None
+        previous_sinks_result = self.checkpoints.get(run_key, "sinks") or {}
+        if previous_sinks_result.get("slack", {}).get("success"):
+            return None
+        streaming_message = StreamingSlackMessage(self.slack_notification_service, channel=user_profile.notification_channel).start()
+        return streaming_message if streaming_message.message is not None else None
+
+    @staticmethod
+    def _get_streaming_callbacks(streaming_message: Optional[StreamingSlackMessage]) -> Optional[List[SlackStreamingCallbackHandler]]:
+        """
+        Callbacks of the general summarizer that push the summary being generated to the streaming message
+        """
+        if streaming_message is None:
+            return None
+        return [SlackStreamingCallbackHandler(streaming_message)]
+
+    @staticmethod
+    def _fail_streaming_message(streaming_message: Optional[StreamingSlackMessage]) -> None:
+        """
+        Replace the partial summary of the streaming message when the run fails
+        """
+        if streaming_message is not None:
+            streaming_message.finalize("No se pudo generar el resumen del día.")
+
+    def _get_sink_tasks(
+        self,
+        run_key: str,
+        semantic_raw_summary: str,
+        general_summary_result: dict,
+        user_profile: UserProfile,
+        streaming_message: StreamingSlackMessage = None
+    ) -> Dict[str, Callable[[], Any]]:
+        """
+        Build the post-processing sinks of the summary, none of them depends on another
+        - slack: send the summary to the slack channel of the user, or finalize the streaming message with the tags
+        - pinecone: embed and store the summary in the vector store
+        - dynamo: store the summary in the summaries table
+        The run key is the id of the summary in pinecone and dynamo, a re-run replaces the summary instead of duplicating it
+        :param run_key: str with the key of the pipeline run
+        :param semantic_raw_summary: str with the summary enriched with the tags
+        :param general_summary_result: dict with the general summary result and its tags
+        :param user_profile: UserProfile with the user of the summary
+        :param streaming_message: StreamingSlackMessage with the streamed summary, None if it was not streamed
+        :return: dict with sink_name -> callable
+        """
+        flattened_metadata = self.vector_store.flatten_metadata(general_summary_result)
+        summary_document = Document(page_content=semantic_raw_summary, metadata=flattened_metadata)
+
+        return {
+            "slack": partial(self._send_summary_notification, semantic_raw_summary, user_profile.notification_channel, streaming_message),
+            "pinecone": partial(self.vector_store.add_documents, [summary_document], ids=[run_key]),
+            "dynamo": partial(self._store_summary_item, run_key, copy.deepcopy(general_summary_result))
+        }
+
+    def _store_summary_item(self, run_key: str, summary_item: dict) -> dict:
+        """
+        Store the summary in the summaries table with the run key as its primary key
+        """
+        summary_item['created_at'] = datetime.now(timezone.utc).isoformat()
+        return self.summaries_db.upsert(run_key, summary_item)
+
+    @timed_stage()
+    def _send_summary_notification(self, semantic_raw_summary: str, channel: str = '#daily-bot', streaming_message: StreamingSlackMessage = None) -> bool:
+        """
+        Send the summary to the slack channel, raise an error if the notification was not sent
+        The streaming message is finalized with the summary instead, a new message is sent if it can not be updated
+        """
+        if streaming_message is not None and streaming_message.finalize(semantic_raw_summary):
+            return True
+
+        sent = self.slack_notification_service.send_notification(
+                semantic_raw_summary,
+                channel=channel
+        )
+        if not sent:
+            raise RuntimeError("The summary notification was not sent to slack")
+        return sent
+
+    @staticmethod
+    def _collect_sinks_result(sink_results: Dict[str, Any]) -> Dict[str, dict]:
+        """
+        Collect the success or failure of each sink, a failed sink does not stop the others
+        The dynamo sink keeps the uuid and created_at of the created item
+        :param sink_results: dict with sink_name -> sink result or raised exception
+        :return: dict with sink_name -> {"success": bool, "error": str}
+        """
+        sinks_result = {}
+        for sink_name, sink_result in sink_results.items():
+            if isinstance(sink_result, Exception):
+                logging.error(f"Error in summary sink {sink_name}: {sink_result}")
+                sinks_result[sink_name] = {"success": False, "error": str(sink_result)}
+                continue
+
+            sinks_result[sink_name] = {"success": True}
+            if sink_name == "dynamo":
+                sinks_result[sink_name]['uuid'] = sink_result['uuid']
+                sinks_result[sink_name]['created_at'] = sink_result['created_at']
+
+        return sinks_result
+
+    def _get_pending_sink_tasks(
+        self,
+        run_key: str,
+        semantic_raw_summary: str,
+        general_summary_result: dict,
+        user_profile: UserProfile,
+        streaming_message: StreamingSlackMessage = None
+    ) -> tuple[dict, dict]:
+        """
+        Get the sinks that are not completed in the sinks checkpoint of the run
+        A resumed run only retries the failed sinks, so it does not duplicate the slack message or the stored summary
+        :return: tuple with the completed sinks result and the pending sink tasks
+        """
+        previous_sinks_result = self.checkpoints.get(run_key, "sinks") or {}
+        completed_sinks_result = {
+            sink_name: sink_result
+            for sink_name, sink_result in previous_sinks_result.items()
+            if sink_result.get("success")
+        }
+        sink_tasks = self._get_sink_tasks(run_key, semantic_raw_summary, general_summary_result, user_profile, streaming_message)
+        pending_sink_tasks = {
+            sink_name: sink_task
+            for sink_name, sink_task in sink_tasks.items()
+            if sink_name not in completed_sinks_result
+        }
+        return completed_sinks_result, pending_sink_tasks
+
+    def _save_sinks_result(self, run_key: str, sinks_result: Dict[str, dict], general_summary_result: dict) -> Dict[str, dict]:
+        """
+        Store the sinks checkpoint and give the uuid and created_at of the dynamo item to the general summary result
+        """
+        self._save_checkpoint(run_key, "sinks", sinks_result)
+
+        dynamo_result = sinks_result.get("dynamo", {})
+        if dynamo_result.get("success"):
+            general_summary_result['uuid'] = dynamo_result['uuid']
+            general_summary_result['created_at'] = dynamo_result['created_at']
+
+        return sinks_result
+
+    def _dispatch_sinks(
+        self,
+        run_key: str,
+        semantic_raw_summary: str,
+        general_summary_result: dict,
+        user_profile: UserProfile,
+        streaming_message: StreamingSlackMessage = None
+    ) -> Dict[str, dict]:
+        """
+        Dispatch the pending summary sinks concurrently and collect the per-sink result
+        :param run_key: str with the key of the pipeline run
+        :param semantic_raw_summary: str with the summary enriched with the tags
+        :param general_summary_result: dict with the general summary result and its tags
+        :param user_profile: UserProfile with the user of the summary
+        :param streaming_message: StreamingSlackMessage with the streamed summary, None if it was not streamed
+        :return: dict with sink_name -> {"success": bool, "error": str}
+        """
+        completed_sinks_result, pending_sink_tasks = self._get_pending_sink_tasks(
+            run_key, semantic_raw_summary, general_summary_result, user_profile, streaming_message
+        )
+        if completed_sinks_result:
+            logging.info(f"Resuming sinks for run {run_key}, completed sinks: {list(completed_sinks_result)}")
+
+        with measure_stage("stage:sinks"):
+            sink_results = run_in_threads(pending_sink_tasks, return_exceptions=True)
+        sinks_result = {**completed_sinks_result, **self._collect_sinks_result(sink_results)}
+        return self._save_sinks_result(run_key, sinks_result, general_summary_result)
+
+    async def _adispatch_sinks(
+        self,
+        run_key: str,
+        semantic_raw_summary: str,
+        general_summary_result: dict,
+        user_profile: UserProfile,
+        streaming_message: StreamingSlackMessage = None
+    ) -> Dict[str, dict]:
+        """
+        Async version of _dispatch_sinks, each blocking sink runs in a worker thread
+        """
+        completed_sinks_result, pending_sink_tasks = await asyncio.to_thread(
+            self._get_pending_sink_tasks, run_key, semantic_raw_summary, general_summary_result, user_profile, streaming_message
+        )
+        with measure_stage("stage:sinks"):
+            results = await asyncio.gather(
+                *(asyncio.to_thread(sink_task) for sink_task in pending_sink_tasks.values()),
+                return_exceptions=True
+            )
+        sink_results = dict(zip(pending_sink_tasks.keys(), results))
+        sinks_result = {**completed_sinks_result, **self._collect_sinks_result(sink_results)}
+        return await asyncio.to_thread(self._save_sinks_result, run_key, sinks_result, general_summary_result)
+
+    def _store_run_usage(self, run_key: str, run_usage: dict, sinks_result: Dict[str, dict]) -> None:
+        """
+        Store the token usage of the run with the stored summary and add it to the daily and monthly totals
+        An error in the usage accounting is logged, it does not fail the run
+        :param run_key: str with the key of the pipeline run
+        :param run_usage: dict with the usage of the run by agent
+        :param sinks_result: dict with the result of each sink, the usage is stored only if the summary was stored
+        """
+        try:
+            if sinks_result.get("dynamo", {}).get("success"):
+                self.summaries_db.update(run_key, {"usage": run_usage})
+            if self.usage_service is not None:
+                self.usage_service.record_run(run_usage)
+        except Exception as e:
+            logging.error(f"Error storing the usage of run {run_key}: {e}")
+
     @traceable
-    def execute_summarizer(self, day: str, previous_day: str, next_day: str) -> dict:
+    @timed_stage()
+    def execute_summarizer(
+        self,
+        day: str,
+        previous_day: str,
+        next_day: str,
+        user_profile: UserProfile = None,
+        force: bool = False
+    ) -> dict:
         """
         Execute the summarizer process with the different agents
         :param day: YYYY-MM-DD str with the day to summarize
         :param previous_day: YYYY-MM-DD str with the previous day
         :param next_day: YYYY-MM-DD str with the next day
+        :param user_profile: UserProfile with the user to summarize, the default user if None
+        :param force: if True, ignore the stored summary and the checkpoints and execute every stage again
         :return: dict with the summary result
         """
-        logging.debug(f"Executing summarizer for date: {day} (prev: {previous_day}, next: {next_day})")
+        user_profile = user_profile if user_profile is not None else get_default_user_profile()
+        logging.debug(f"Executing summarizer for user {user_profile.user_id} and date: {day} (prev: {previous_day}, next: {next_day})")
+        run_key = self._get_run_key(day, user_profile)
+        streaming_message = None
         
         try:
-            gmail_summary_result = self.gmail_summarizer.execute_agent(
-            day=day,
-            previous_day=previous_day,
-            next_day=next_day
-            )
-            
-            slack_summary_result = self.slack_summarizer.execute_agent(
+            if force:
+                self._reset_checkpoints(run_key)
+            elif cached_summary := self.result_cache.get(user_profile.user_id, day):
+                if not self._has_pending_sinks(run_key):
+                    logging.info(f"Returning the stored summary of {day} for user {user_profile.user_id}")
+                    return self._build_cached_response(cached_summary)
+
+                logging.info(f"Retrying the pending sinks of the stored summary of {day} for user {user_profile.user_id}")
+                sinks_result = self._dispatch_sinks(run_key, self._get_cached_semantic_summary(cached_summary), cached_summary, user_profile)
+                return self._build_resumed_response(cached_summary, sinks_result)
+
+            with usage_scope() as run_usage:
+                streaming_message = self._start_streaming_message(run_key, user_profile)
+                gmail_summary_result, slack_summary_result = self._execute_source_agents(
+                    run_key=run_key,
+                    day=day,
+                    previous_day=previous_day,
+                    next_day=next_day,
+                    user_profile=user_profile
+                )
+
+                general_summary_result = self._run_stage(run_key, "general", partial(
+                    self.general_summarizer.execute_agent,
+                    day=day,
+                    gmail_summary_json=gmail_summary_result,
+                    slack_summary_json=slack_summary_result,
+                    callbacks=self._get_streaming_callbacks(streaming_message)
+                ))
+
+                raw_summary = general_summary_result['summary_result']['daily_summary']
+                tag_extractor_result = self._run_stage(run_key, "tags", partial(
+                    self.tag_extractor.execute_agent,
+                    summary=raw_summary
+                ))
+
+                summary_tags = tag_extractor_result['tags_result']['tags']
+                semantic_raw_summary = self._build_semantic_summary(raw_summary, summary_tags)
+                general_summary_result['tags'] = summary_tags
+                general_summary_result['user_id'] = user_profile.user_id
+                general_summary_result['day'] = day
+                general_summary_result['pipeline_version'] = self.result_cache.pipeline_version
+
+                sinks_result = self._dispatch_sinks(run_key, semantic_raw_summary, general_summary_result, user_profile, streaming_message)
+
+            general_summary_result['usage'] = run_usage.summary()
+            self._store_run_usage(run_key, general_summary_result['usage'], sinks_result)
+
+            return {
+                "general_summary_result": general_summary_result,
+                "slack_summary_result": slack_summary_result,
+                "gmail_summary_result": gmail_summary_result,
+                "sinks_result": sinks_result,
+                "cache_hit": False
+            }
+
+        except Exception as e:
+            logging.error(f"Error executing summarizer: {e}")
+            logging.error(traceback.format_exc())
+            self._fail_streaming_message(streaming_message)
+            raise e
+
+    def _execute_summarizer_with_status(
+        self,
+        day: str,
+        previous_day: str,
+        next_day: str,
+        user_profile: UserProfile,
+        force: bool = False
+    ) -> dict:
+        """
+        Execute the summarizer for one user day of a backfill or a batch and build its status
+        :return: dict with the day, the user and its status (skipped, completed, partial_failure or failed)
+        """
+        run_status = {"day": day, "user_id": user_profile.user_id}
+
+        try:
+            summary_result = self.execute_summarizer(
                 day=day,
                 previous_day=previous_day,
-                next_day=next_day
+                next_day=next_day,
+                user_profile=user_profile,
+                force=force
             )
+        except Exception as e:
+            return {**run_status, "status": "failed", "error": str(e)}
 
-            general_summary_result = self.general_summarizer.execute_agent(
-                day=day,
-                gmail_summary_json=gmail_summary_result,
-                slack_summary_json=slack_summary_result
-            )
-                        
-            raw_summary = general_summary_result['summary_result']['daily_summary']
-            tag_extractor_result = self.tag_extractor.execute_agent(
-                summary=raw_summary
-            )
+        if summary_result["cache_hit"]:
+            logging.info(f"Skipping summary of {day} for user {user_profile.user_id}, the summary is already stored")
+            return {**run_status, "status": "skipped"}
 
-            summary_tags = tag_extractor_result['tags_result']['tags']
-            
-            people = [tag['name'] for tag in summary_tags if tag['type'] == 'person']
-            projects = [tag['name'] for tag in summary_tags if tag['type'] == 'project']
-            areas = [tag['name'] for tag in summary_tags if tag['type'] == 'area']
-            
-            people_str = f"Personas involucradas: {', '.join(people)}"
-            projects_str = f"Proyectos involucrados: {', '.join(projects)}"
-            areas_str = f"Areas involucradas: {', '.join(areas)}"
-            
-            semantic_raw_summary = f"{raw_summary}\n\n{str(people_str)}\n\n{str(projects_str)}\n\n{str(areas_str)}"
-
-            self.slack_notification_service.send_notification(
-                    semantic_raw_summary,
-                    channel='#daily-bot'
-            )
+        failed_sinks = [
+            sink_name
+            for sink_name, sink_result in summary_result["sinks_result"].items()
+            if not sink_result.get("success")
+        ]
+        if failed_sinks:
+            return {**run_status, "status": "partial_failure", "failed_sinks": failed_sinks}
+        return {**run_status, "status": "completed"}
+
+    @traceable
+    def backfill(
+        self,
+        days: List[tuple[str, str, str]],
+        max_concurrency: int = settings.BACKFILL_MAX_CONCURRENCY,
+        user_profile: UserProfile = None,
+        force: bool = False
+    ) -> List[dict]:
+        """
+        Execute the summarizer for a range of days in the same invocation
+        The days run with a bounded concurrency and share the warm clients, agents and caches of the service
+        The days with an already stored summary are skipped
+        :param days: list of (day, previous_day, next_day) tuples with YYYY-MM-DD str
+        :param max_concurrency: max number of days summarized at the same time
+        :param user_profile: UserProfile with the user to summarize, the default user if None
+        :param force: if True, summarize again the days with an already stored summary
+        :return: list with the status of each day, in the same order as the days
+        """
+        user_profile = user_profile if user_profile is not None else get_default_user_profile()
+        logging.info(f"Executing backfill for {len(days)} days with max concurrency {max_concurrency}")
 
-            general_summary_result['tags'] = summary_tags
+        days_status = run_in_threads(
+            {
+                day: partial(self._execute_summarizer_with_status, day, previous_day, next_day, user_profile, force)
+                for day, previous_day, next_day in days
+            },
+            max_workers=max_concurrency
+        )
+        return list(days_status.values())
+
+    @traceable
+    def execute_batch_summarizer(
+        self,
+        user_profiles: List[UserProfile],
+        day: str,
+        previous_day: str,
+        next_day: str,
+        max_concurrency: int = settings.BATCH_MAX_CONCURRENCY,
+        force: bool = False
+    ) -> List[dict]:
+        """
+        Execute the summarizer for many users in the same invocation
+        The users run with a bounded concurrency and share the slack user directory, the channels metadata,
+        the tags table and the LLM client, instead of one deployment per user
+        :param user_profiles: list of UserProfile to summarize
+        :param day: YYYY-MM-DD str with the day to summarize
+        :param previous_day: YYYY-MM-DD str with the previous day
+        :param next_day: YYYY-MM-DD str with the next day
+        :param max_concurrency: max number of users summarized at the same time
+        :param force: if True, summarize again the users with an already stored summary
+        :return: list with the status of each user, in the same order as the user profiles
+        """
+        logging.info(f"Executing batch summarizer for {len(user_profiles)} users with max concurrency {max_concurrency}")
+
+        users_status = run_in_threads(
+            {
+                user_profile.user_id: partial(self._execute_summarizer_with_status, day, previous_day, next_day, user_profile, force)
+                for user_profile in user_profiles
+            },
+            max_workers=max_concurrency
+        )
+        return list(users_status.values())
+
+    async def _aexecute_source_agents(self, run_key: str, day: str, previous_day: str, next_day: str, user_profile: UserProfile) -> tuple[dict, dict]:
+        """
+        Async version of _execute_source_agents, the source agents run concurrently in the event loop
+        :param run_key: str with the key of the pipeline run
+        :param day: YYYY-MM-DD str with the day to summarize
+        :param previous_day: YYYY-MM-DD str with the previous day
+        :param next_day: YYYY-MM-DD str with the next day
+        :param user_profile: UserProfile with the user to summarize
+        :return: tuple with the gmail summary result and the slack summary result
+        """
+        gmail_summary_result, slack_summary_result = await asyncio.gather(
+            self._arun_stage(run_key, "gmail", partial(
+                self.gmail_summarizer.aexecute_agent, day=day, previous_day=previous_day, next_day=next_day, user_profile=user_profile
+            )),
+            self._arun_stage(run_key, "slack", partial(
+                self.slack_summarizer.aexecute_agent, day=day, previous_day=previous_day, next_day=next_day, user_profile=user_profile
+            ))
+        )
+        return gmail_summary_result, slack_summary_result
+
+    @traceable
+    @timed_stage()
+    async def aexecute_summarizer(
+        self,
+        day: str,
+        previous_day: str,
+        next_day: str,
+        user_profile: UserProfile = None,
+        force: bool = False
+    ) -> dict:
+        """
+        Async version of execute_summarizer, many summaries can be driven concurrently from a single event loop
+        The blocking sinks (slack, pinecone and dynamo clients) are offloaded to worker threads
+        :param day: YYYY-MM-DD str with the day to summarize
+        :param previous_day: YYYY-MM-DD str with the previous day
+        :param next_day: YYYY-MM-DD str with the next day
+        :param user_profile: UserProfile with the user to summarize, the default user if None
+        :param force: if True, ignore the stored summary and the checkpoints and execute every stage again
+        :return: dict with the summary result
+        """
+        user_profile = user_profile if user_profile is not None else get_default_user_profile()
+        logging.debug(f"Executing async summarizer for user {user_profile.user_id} and date: {day} (prev: {previous_day}, next: {next_day})")
+        run_key = self._get_run_key(day, user_profile)
+        streaming_message = None
+
+        try:
+            if force:
+                await asyncio.to_thread(self._reset_checkpoints, run_key)
+            elif cached_summary := await asyncio.to_thread(self.result_cache.get, user_profile.user_id, day):
+                if not await asyncio.to_thread(self._has_pending_sinks, run_key):
+                    logging.info(f"Returning the stored summary of {day} for user {user_profile.user_id}")
+                    return self._build_cached_response(cached_summary)
+
+                logging.info(f"Retrying the pending sinks of the stored summary of {day} for user {user_profile.user_id}")
+                sinks_result = await self._adispatch_sinks(run_key, self._get_cached_semantic_summary(cached_summary), cached_summary, user_profile)
+                return self._build_resumed_response(cached_summary, sinks_result)
+
+            with usage_scope() as run_usage:
+                streaming_message = await asyncio.to_thread(self._start_streaming_message, run_key, user_profile)
+                gmail_summary_result, slack_summary_result = await self._aexecute_source_agents(
+                    run_key=run_key,
+                    day=day,
+                    previous_day=previous_day,
+                    next_day=next_day,
+                    user_profile=user_profile
+                )
+
+                general_summary_result = await self._arun_stage(run_key, "general", partial(
+                    self.general_summarizer.aexecute_agent,
+                    day=day,
+                    gmail_summary_json=gmail_summary_result,
+                    slack_summary_json=slack_summary_result,
+                    callbacks=self._get_streaming_callbacks(streaming_message)
+                ))
+
+                raw_summary = general_summary_result['summary_result']['daily_summary']
+                tag_extractor_result = await self._arun_stage(run_key, "tags", partial(
+                    self.tag_extractor.aexecute_agent,
+                    summary=raw_summary
+                ))
+
+                summary_tags = tag_extractor_result['tags_result']['tags']
+                semantic_raw_summary = self._build_semantic_summary(raw_summary, summary_tags)
+                general_summary_result['tags'] = summary_tags
+                general_summary_result['user_id'] = user_profile.user_id
+                general_summary_result['day'] = day
+                general_summary_result['pipeline_version'] = self.result_cache.pipeline_version
+
+                sinks_result = await self._adispatch_sinks(run_key, semantic_raw_summary, general_summary_result, user_profile, streaming_message)
+
+            general_summary_result['usage'] = run_usage.summary()
+            await asyncio.to_thread(self._store_run_usage, run_key, general_summary_result['usage'], sinks_result)
 
-            flattened_metadata = self.vector_store.flatten_metadata(general_summary_result)
-            self.vector_store.add_documents([Document(page_content=semantic_raw_summary, metadata=flattened_metadata)])
-            
-            self.summaries_db.create(general_summary_result)
-            
             return {
                 "general_summary_result": general_summary_result,
                 "slack_summary_result": slack_summary_result,
-                "gmail_summary_result": gmail_summary_result
+                "gmail_summary_result": gmail_summary_result,
+                "sinks_result": sinks_result,
+                "cache_hit": False
             }
 
         except Exception as e:
-            logging.error(f"Error executing summarizer: {e}")
+            logging.error(f"Error executing async summarizer: {e}")
             logging.error(traceback.format_exc())
-            raise e
\ No newline at end of file
+            await asyncio.to_thread(self._fail_streaming_message, streaming_message)
+            raise e
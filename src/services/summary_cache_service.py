@@ -0,0 +1,60 @@
+import hashlib
+import json
+from functools import lru_cache
+from typing import Optional
+from core.settings import settings
+from prompts import DailyGmailSummarizerPrompt, DailyGmailMessagesSummarizerPrompt, DailySlackSummarizerPrompt, DailySlackConversationsSummarizerPrompt, DailySlackSummaryReducePrompt, GeneralSummarizerPrompt, TagExtractorPrompt, TagCatalogueExtractorPrompt
+from .dynamo.dynamo_db_service import DynamoDbService
+
+# Prompts used by the pipeline, a change in any of them changes the pipeline version and invalidates the cached summaries
+PIPELINE_PROMPTS = [
+    DailyGmailSummarizerPrompt,
+    DailyGmailMessagesSummarizerPrompt,
+    DailySlackSummarizerPrompt,
+    DailySlackConversationsSummarizerPrompt,
+    DailySlackSummaryReducePrompt,
+    GeneralSummarizerPrompt,
+    TagExtractorPrompt,
+    TagCatalogueExtractorPrompt
+]
+
+@lru_cache()
+def get_pipeline_version() -> str:
+    """
+    Get the version of the summarizer pipeline
+    The manual PIPELINE_VERSION plus a fingerprint of the prompts and the model configuration
+    """
+    fingerprint = json.dumps({
+        "model": settings.DEFAULT_OPEN_AI_MODEL,
+        "temperature": settings.DEFAULT_TEMPERATURE,
+        "prompts": [prompt().get_prompt().template for prompt in PIPELINE_PROMPTS]
+    }, sort_keys=True)
+    fingerprint_hash = hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()[:12]
+    return f"{settings.PIPELINE_VERSION}-{fingerprint_hash}"
+
+
+class SummaryResultCache:
+    """
+    Day level cache of the stored summaries, keyed by (user, day, pipeline version)
+    The summary key is also the primary key of the summary in dynamo and its id in pinecone,
+    so a re-run of the same day replaces the stored summary instead of duplicating it
+    """
+
+    def __init__(self, summaries_db: DynamoDbService, pipeline_version: str = None):
+        self.summaries_db = summaries_db
+        self.pipeline_version = pipeline_version if pipeline_version is not None else get_pipeline_version()
+
+    def build_key(self, user_id: str, day: str) -> str:
+        """
+        Get the key of the summary of a user day for the current pipeline version
+        """
+        return f"{user_id}#{day}#{self.pipeline_version}"
+
+    def get(self, user_id: str, day: str) -> Optional[dict]:
+        """
+        Get the stored summary of a user day, None if the day was not summarized with the current pipeline version
+        """
+        stored_summary = self.summaries_db.find_by_pk(self.build_key(user_id, day))
+        if not stored_summary:
+            return None
+        return DynamoDbService.parse_dynamo_response(stored_summary)
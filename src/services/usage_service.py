@@ -0,0 +1,84 @@
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from core.settings import settings
+from .dynamo.dynamo_db_service import DynamoDbService
+
+USAGE_COUNTERS = ["llm_calls", "prompt_tokens", "completion_tokens", "total_tokens", "cost_usd"]
+TOTAL_USAGE_KEY = "total"
+
+
+class UsageService:
+    """
+    Daily and monthly totals of the token usage and cost of the pipeline runs, by agent
+    Each period is one item of the usage table (daily#YYYY-MM-DD, monthly#YYYY-MM) with a flat counter per agent
+    (gmail_summarizer_agent:total_tokens, total:cost_usd, ...), the counters are added atomically so concurrent runs are not lost
+    The period is the date of the run (when the tokens are billed), not the summarized day
+    """
+
+    def __init__(self, table_name: str = settings.USAGE_TABLE):
+        self.usage_db = DynamoDbService(table_name=table_name)
+
+    @staticmethod
+    def _get_period_keys(run_date: datetime) -> list[str]:
+        return [f"daily#{run_date.strftime('%Y-%m-%d')}", f"monthly#{run_date.strftime('%Y-%m')}"]
+
+    @staticmethod
+    def _build_counters(run_usage: dict) -> Dict[str, float]:
+        """
+        Flatten the usage of a run in counters by agent plus the total counters and the number of runs
+        """
+        counters = {"runs": 1}
+        usage_by_agent = {**run_usage["agents"], TOTAL_USAGE_KEY: run_usage["total"]}
+        for agent, agent_usage in usage_by_agent.items():
+            for counter in USAGE_COUNTERS:
+                counters[f"{agent}:{counter}"] = agent_usage[counter]
+        return counters
+
+    @staticmethod
+    def _parse_counters(usage_item: Optional[dict]) -> dict:
+        """
+        Build the usage by agent of a period item
+        """
+        if not usage_item:
+            return {"runs": 0, "agents": {}, "total": {counter: 0 for counter in USAGE_COUNTERS}}
+
+        usage_item = DynamoDbService.parse_dynamo_response(usage_item)
+        usage_by_agent: Dict[str, dict] = {}
+        for attribute, value in usage_item.items():
+            if ":" not in attribute:
+                continue
+            agent, counter = attribute.rsplit(":", 1)
+            usage_by_agent.setdefault(agent, {})[counter] = value if counter == "cost_usd" else int(value)
+
+        return {
+            "runs": int(usage_item.get("runs", 0)),
+            "agents": {agent: usage for agent, usage in usage_by_agent.items() if agent != TOTAL_USAGE_KEY},
+            "total": usage_by_agent.get(TOTAL_USAGE_KEY, {counter: 0 for counter in USAGE_COUNTERS})
+        }
+
+    def record_run(self, run_usage: dict, run_date: datetime = None) -> None:
+        """
+        Add the usage of a run to the daily and monthly totals
+        :param run_usage: dict with the usage of the run (RunUsage.summary)
+        :param run_date: datetime of the run, now by default
+        """
+        run_date = run_date if run_date is not None else datetime.now(timezone.utc)
+        counters = self._build_counters(run_usage)
+        for period_key in self._get_period_keys(run_date):
+            self.usage_db.increment(period_key, counters)
+        logging.info(f"Recorded run usage: {run_usage['total']}")
+
+    def get_daily_usage(self, day: str) -> dict:
+        """
+        Get the token usage and cost of a day by agent
+        :param day: YYYY-MM-DD str with the day
+        """
+        return self._parse_counters(self.usage_db.find_by_pk(f"daily#{day}"))
+
+    def get_monthly_usage(self, month: str) -> dict:
+        """
+        Get the token usage and cost of a month by agent
+        :param month: YYYY-MM str with the month
+        """
+        return self._parse_counters(self.usage_db.find_by_pk(f"monthly#{month}"))
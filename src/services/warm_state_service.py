@@ -0,0 +1,235 @@
+import base64
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+from core.settings import settings
+from core.metrics import timed_stage
+from .dynamo.dynamo_db_service import DynamoDbService
+from tools.slack.get_users import SlackGetUsers
+from tools.slack.get_channel import SlackGetChannel
+from tools.summary_tags.tag_catalogue import tag_catalogue
+
+# Format of the snapshot, a snapshot of another version is ignored
+SNAPSHOT_VERSION = 1
+# Items over this size are not stored in DynamoDB (the item limit is 400KB)
+MAX_SHARED_SNAPSHOT_BYTES = 350 * 1024
+
+
+class WarmStateService:
+    """
+    Snapshot of the warm caches of the container: slack users directory, slack channels and tags catalogue
+    A new container hydrates the caches from the local /tmp copy or the shared copy in DynamoDB,
+    so its first invocation does not fetch them again, then the caches are refreshed in a background thread
+    The snapshot is a gzipped JSON with its version and creation time, it expires after WARM_STATE_TTL_SECONDS
+    Each section is an object with export_state, hydrate_state and refresh
+    """
+
+    def __init__(
+        self,
+        enabled: bool = settings.WARM_STATE_ENABLED,
+        path: str = settings.WARM_STATE_PATH,
+        table_name: str = settings.WARM_STATE_TABLE,
+        ttl_seconds: int = settings.WARM_STATE_TTL_SECONDS,
+        sections: Dict[str, Any] = None
+    ):
+        self.enabled = enabled
+        self.path = path
+        self.table_name = table_name
+        self.ttl_seconds = ttl_seconds
+        self.sections = sections if sections is not None else {
+            "slack_users": SlackGetUsers(),
+            "slack_channels": SlackGetChannel(),
+            "tag_catalogue": tag_catalogue
+        }
+        self._shared_db: Optional[DynamoDbService] = None
+        self._hydrated = False
+        self._saved_at: float = None
+        self._lock = threading.Lock()
+
+    @property
+    def shared_db(self) -> Optional[DynamoDbService]:
+        if self._shared_db is None and self.table_name:
+            self._shared_db = DynamoDbService(table_name=self.table_name)
+        return self._shared_db
+
+    @staticmethod
+    def build_key() -> str:
+        return f"warm_state#v{SNAPSHOT_VERSION}"
+
+    def _encode(self, snapshot: dict) -> bytes:
+        return gzip.compress(json.dumps(snapshot, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+    def _decode(self, data: bytes) -> Optional[dict]:
+        """
+        Decode a snapshot, None if it is of another version or expired
+        A snapshot without its creation time or sections raises a ValueError, it is read as a miss
+        """
+        snapshot = json.loads(gzip.decompress(data).decode("utf-8"))
+        if not isinstance(snapshot, dict):
+            raise ValueError("the warm state snapshot is not an object")
+        if snapshot.get("version") != SNAPSHOT_VERSION or snapshot.get("expires_at", 0) < time.time():
+            return None
+        if not isinstance(snapshot.get("created_at"), (int, float)) or not isinstance(snapshot.get("sections"), dict):
+            raise ValueError("the warm state snapshot has no created_at or sections")
+        return snapshot
+
+    def _read_local(self) -> Optional[dict]:
+        if not self.path or not os.path.exists(self.path):
+            return None
+        with open(self.path, "rb") as snapshot_file:
+            return self._decode(snapshot_file.read())
+
+    def _write_local(self, data: bytes) -> None:
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Written to a temporary file first so another process never reads a partial snapshot
+        temporary_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as snapshot_file:
+            snapshot_file.write(data)
+        os.replace(temporary_path, self.path)
+
+    def _read_shared(self) -> Optional[dict]:
+        if self.shared_db is None:
+            return None
+        item = self.shared_db.find_by_pk(self.build_key())
+        if not item:
+            return None
+        return self._decode(base64.b64decode(item["snapshot"]))
+
+    def _write_shared(self, data: bytes, expires_at: float) -> None:
+        if self.shared_db is None:
+            return
+        if len(data) > MAX_SHARED_SNAPSHOT_BYTES:
+            logging.warning(f"Warm state snapshot of {len(data)} bytes not stored in {self.table_name}, it is over the item size limit")
+            return
+        self.shared_db.upsert(self.build_key(), {
+            "snapshot": base64.b64encode(data).decode("ascii"),
+            "expires_at": int(expires_at)
+        })
+
+    def _hydrate_sections(self, snapshot: dict) -> None:
+        """
+        Hydrate each section from its state, a section that can not be hydrated is logged and left cold
+        """
+        age_seconds = max(0.0, time.time() - snapshot["created_at"])
+        for name, state in snapshot["sections"].items():
+            section = self.sections.get(name)
+            if section is None or state is None:
+                continue
+            try:
+                section.hydrate_state(state, age_seconds=age_seconds)
+            except Exception as e:
+                logging.warning(f"Error hydrating the {name} warm state: {e}")
+
+    @timed_stage()
+    def hydrate(self) -> bool:
+        """
+        Hydrate the caches from the snapshot once per container, the local copy first and the shared copy otherwise
+        A hydrated container refreshes the caches in the background and stores the new snapshot
+        :return: True if the caches were hydrated from a snapshot
+        """
+        with self._lock:
+            if self._hydrated or not self.enabled:
+                return False
+            self._hydrated = True
+
+        for source, read in (("local", self._read_local), ("shared", self._read_shared)):
+            try:
+                snapshot = read()
+            except Exception as e:
+                logging.warning(f"Error reading the {source} warm state snapshot: {e}")
+                continue
+            if snapshot is None:
+                continue
+
+            self._hydrate_sections(snapshot)
+            self._saved_at = snapshot["created_at"]
+            logging.info(f"Caches hydrated from the {source} warm state snapshot of {snapshot['created_at']}")
+            if source == "shared":
+                try:
+                    self._write_local(self._encode(snapshot))
+                except Exception as e:
+                    logging.warning(f"Error writing the local warm state snapshot: {e}")
+            self.refresh_in_background()
+            return True
+        return False
+
+    def save(self) -> bool:
+        """
+        Store the snapshot of the caches in the local and shared copies, the sections without state are skipped
+        The background refresh and the invocations save under the lock, so only one snapshot is written at a time
+        :return: True if a snapshot was stored
+        """
+        with self._lock:
+            sections = {}
+            for name, section in self.sections.items():
+                state = section.export_state()
+                if state is not None:
+                    sections[name] = DynamoDbService.parse_dynamo_response(state)
+            if not sections:
+                return False
+
+            created_at = time.time()
+            snapshot = {
+                "version": SNAPSHOT_VERSION,
+                "created_at": created_at,
+                "expires_at": created_at + self.ttl_seconds,
+                "sections": sections
+            }
+            data = self._encode(snapshot)
+            saved = False
+            for source, write in (("local", lambda: self._write_local(data)), ("shared", lambda: self._write_shared(data, snapshot["expires_at"]))):
+                try:
+                    write()
+                    saved = True
+                except Exception as e:
+                    logging.warning(f"Error writing the {source} warm state snapshot: {e}")
+            if saved:
+                self._saved_at = created_at
+            return saved
+
+    def save_if_needed(self) -> bool:
+        """
+        Store the snapshot after an invocation if this container has not stored one in the last half of the TTL,
+        so the first invocation of a container that was not hydrated leaves a snapshot for the next containers
+        The errors are logged, the snapshot never fails the invocation
+        """
+        if not self.enabled or not (self.path or self.table_name):
+            return False
+        if self._saved_at is not None and time.time() - self._saved_at < self.ttl_seconds / 2:
+            return False
+        try:
+            return self.save()
+        except Exception as e:
+            logging.warning(f"Error saving the warm state snapshot: {e}")
+            return False
+
+    def _refresh(self) -> None:
+        for name, section in self.sections.items():
+            try:
+                if section.export_state() is not None:
+                    section.refresh()
+            except Exception as e:
+                logging.warning(f"Error refreshing the {name} warm state: {e}")
+        try:
+            self.save()
+        except Exception as e:
+            logging.warning(f"Error saving the refreshed warm state snapshot: {e}")
+
+    def refresh_in_background(self) -> threading.Thread:
+        """
+        Refresh the hydrated caches from their sources and store the new snapshot in a daemon thread
+        """
+        thread = threading.Thread(target=self._refresh, name="warm-state-refresh", daemon=True)
+        thread.start()
+        return thread
+
+
+warm_state_service = WarmStateService()
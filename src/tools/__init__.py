@@ -1,14 +1,23 @@
-from .gmail_tool import gmail_toolkit
-from .tavily_search_tool import tavily_search_tool
+from .gmail_tool import get_gmail_toolkit, get_gmail_api_resource
+from .gmail_messages import GmailMessagesFetcher
+from .memoized_tool import MemoizedTool, tool_run_scope
+from .tavily_search_tool import TavilySearch, GlossarySearchTool
 from .slack import slack_search_toolkit, slack_send_message_tool
-from .summary_tags import get_tags_tool, create_tags_tool
+from .summary_tags import get_tags_tool, create_tags_tool, TagCatalogue, tag_catalogue
 
 
 __all__ = [
-    "gmail_toolkit",
-    "tavily_search_tool",
+    "get_gmail_toolkit",
+    "get_gmail_api_resource",
+    "GmailMessagesFetcher",
+    "MemoizedTool",
+    "tool_run_scope",
+    "TavilySearch",
+    "GlossarySearchTool",
     "slack_search_toolkit",
     "slack_send_message_tool",
     "get_tags_tool",
-    "create_tags_tool"
+    "create_tags_tool",
+    "TagCatalogue",
+    "tag_catalogue"
 ]
\ No newline at end of file
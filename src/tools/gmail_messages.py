@@ -0,0 +1,143 @@
+import base64
+import email
+import email.policy
+import logging
+from email.message import Message
+from typing import Any, Dict, List, Optional
+from googleapiclient.discovery import Resource
+from langchain_google_community.gmail.utils import clean_email_body
+from core.metrics import timed_stage
+
+# Gmail accepts up to 100 calls per batch request but recommends batches of 50 to avoid rate limits
+GMAIL_BATCH_SIZE = 50
+
+
+class GmailMessagesFetcher:
+    """
+    Fetch the emails of a day window from the gmail api without an agent
+    The message ids are listed with a single query and the messages are downloaded with batch requests,
+    each message is reduced to a compact digest (headers, labels and the cleaned and truncated body)
+    The messages that can not be downloaded or parsed are logged and skipped, they do not fail the day
+    """
+
+    def __init__(self, api_resource: Resource, max_messages: int = 100, body_max_chars: int = 1500):
+        self.api_resource = api_resource
+        self.max_messages = max_messages
+        self.body_max_chars = body_max_chars
+
+    @staticmethod
+    def build_day_query(previous_day: str, next_day: str) -> str:
+        """
+        Gmail query of the emails between the previous and the next day (YYYY-MM-DD)
+        """
+        return f"after:{previous_day.replace('-', '/')} before:{next_day.replace('-', '/')}"
+
+    def _list_message_ids(self, query: str) -> List[str]:
+        """
+        List the ids of the messages of the query, following the pages up to max_messages
+        """
+        message_ids: List[str] = []
+        page_token = None
+        while len(message_ids) < self.max_messages:
+            response = self.api_resource.users().messages().list(
+                userId="me",
+                q=query,
+                maxResults=min(500, self.max_messages - len(message_ids)),
+                pageToken=page_token
+            ).execute()
+            message_ids.extend(message["id"] for message in response.get("messages", []))
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                break
+        return message_ids[:self.max_messages]
+
+    def _get_messages(self, message_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Download the raw messages with batch requests, the messages that fail are logged and skipped
+        """
+        messages: Dict[str, Dict[str, Any]] = {}
+
+        def _collect(request_id: str, response: Optional[dict], exception: Optional[Exception]) -> None:
+            if exception is not None:
+                logging.warning(f"Error getting gmail message {request_id}: {exception}")
+                return
+            messages[request_id] = response
+
+        for start in range(0, len(message_ids), GMAIL_BATCH_SIZE):
+            batch = self.api_resource.new_batch_http_request(callback=_collect)
+            for message_id in message_ids[start:start + GMAIL_BATCH_SIZE]:
+                batch.add(
+                    self.api_resource.users().messages().get(userId="me", id=message_id, format="raw"),
+                    request_id=message_id
+                )
+            batch.execute()
+
+        return [messages[message_id] for message_id in message_ids if message_id in messages]
+
+    @staticmethod
+    def _get_body(email_message: Message) -> str:
+        """
+        Get the text body of the email, the plain text part is preferred over the html part
+        """
+        parts = list(email_message.walk()) if email_message.is_multipart() else [email_message]
+        bodies = {}
+        for part in parts:
+            content_type = part.get_content_type()
+            if content_type in ("text/plain", "text/html") and content_type not in bodies and "attachment" not in str(part.get("Content-Disposition")):
+                payload = part.get_payload(decode=True) or b""
+                bodies[content_type] = payload.decode(part.get_content_charset() or "utf-8", errors="replace")
+        return bodies.get("text/plain") or bodies.get("text/html") or ""
+
+    @staticmethod
+    def _get_header(email_message: Message, name: str) -> Optional[str]:
+        """
+        Get the decoded value of a header as str, None if the email does not have it
+        """
+        value = email_message[name]
+        return str(value) if value is not None else None
+
+    def _build_digest(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Compact digest of a raw message with the information needed by the summary
+        The default policy decodes the RFC 2047 headers (non-ASCII names and subjects)
+        """
+        email_message = email.message_from_bytes(base64.urlsafe_b64decode(message["raw"]), policy=email.policy.default)
+        body = " ".join(clean_email_body(self._get_body(email_message)).split())
+        label_ids = message.get("labelIds", [])
+        return {
+            "id": message["id"],
+            "thread_id": message.get("threadId"),
+            "date": self._get_header(email_message, "Date"),
+            "subject": self._get_header(email_message, "Subject"),
+            "sender": self._get_header(email_message, "From"),
+            "recipients": self._get_header(email_message, "To"),
+            "cc": self._get_header(email_message, "Cc"),
+            "sent_by_user": "SENT" in label_ids,
+            "labels": label_ids,
+            "body": body[:self.body_max_chars],
+            "is_truncated": len(body) > self.body_max_chars
+        }
+
+    def _build_digests(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Build the digest of each message, the messages that fail (unknown charset, bad base64, invalid headers) are logged and skipped
+        """
+        digests = []
+        for message in messages:
+            try:
+                digests.append(self._build_digest(message))
+            except Exception as e:
+                logging.warning(f"Error parsing gmail message {message.get('id')}: {e}")
+        return digests
+
+    @timed_stage()
+    def get_day_messages(self, previous_day: str, next_day: str) -> List[Dict[str, Any]]:
+        """
+        Get the digests of the emails between the previous and the next day, newest first
+        :param previous_day: YYYY-MM-DD str with the day before the summarized day
+        :param next_day: YYYY-MM-DD str with the day after the summarized day
+        :return: list with the digest of each email
+        """
+        message_ids = self._list_message_ids(self.build_day_query(previous_day, next_day))
+        logging.info(f"Fetching {len(message_ids)} gmail messages between {previous_day} and {next_day}")
+        return self._build_digests(self._get_messages(message_ids))
@@ -1,9 +1,15 @@
+import threading
+from functools import lru_cache
+from typing import Any, List
+import google_auth_httplib2
+from core.registry import registry
 from core.settings import settings
+from langchain_core.tools import BaseTool
+from googleapiclient import discovery
+from googleapiclient.discovery import Resource
+from googleapiclient.http import HttpRequest, build_http
 from langchain_google_community import GmailToolkit
-from langchain_google_community.gmail.utils import (
-    build_resource_service,
-    get_gmail_credentials,
-)
+from langchain_google_community.gmail.utils import get_gmail_credentials
 
 SCOPES = [
     "https://www.googleapis.com/auth/gmail.readonly",
@@ -11,13 +17,53 @@ SCOPES = [
     "https://mail.google.com/"
 ]
 
-credentials = get_gmail_credentials(
-    service_account_file=settings.GOOGLE_CREDENTIALS_PATH,
-    scopes=SCOPES,
-    use_domain_wide=True,
-    delegated_user=settings.GOOGLE_DELEGATED_USER
-)
-api_resource = build_resource_service(credentials=credentials)
-toolkit = GmailToolkit(api_resource=api_resource)
 
-gmail_toolkit = toolkit.get_tools()
+class ThreadLocalHttpRequestBuilder:
+    """
+    Request builder of the gmail api resource that sends each request with an http client of the calling thread
+    httplib2 clients are not thread-safe, the resource is shared by the concurrent days and users of the container,
+    so each thread gets its own authorized client and keeps its connections between requests
+    """
+
+    def __init__(self, credentials: Any):
+        self.credentials = credentials
+        self._local = threading.local()
+
+    def _get_http(self) -> google_auth_httplib2.AuthorizedHttp:
+        if not hasattr(self._local, "http"):
+            self._local.http = google_auth_httplib2.AuthorizedHttp(self.credentials, http=build_http())
+        return self._local.http
+
+    def __call__(self, http: Any, *args: Any, **kwargs: Any) -> HttpRequest:
+        return HttpRequest(self._get_http(), *args, **kwargs)
+
+
+@lru_cache(maxsize=None)
+def get_gmail_api_resource(delegated_user: str) -> Resource:
+    """
+    Get the gmail api resource of a delegated user, the credentials and the api resource are built once per user
+    The resource can be used from many threads, its requests are sent with an http client per thread
+    :param delegated_user: email of the user impersonated by the service account
+    :return: gmail api resource
+    """
+    credentials = get_gmail_credentials(
+        service_account_file=settings.GOOGLE_CREDENTIALS_PATH,
+        scopes=SCOPES,
+        use_domain_wide=True,
+        delegated_user=delegated_user
+    )
+    return discovery.build("gmail", "v1", credentials=credentials, requestBuilder=ThreadLocalHttpRequestBuilder(credentials))
+
+@lru_cache(maxsize=None)
+def get_gmail_toolkit(delegated_user: str) -> List[BaseTool]:
+    """
+    Get the gmail tools of a delegated user, they share the api resource of the user
+    :param delegated_user: email of the user impersonated by the service account
+    :return: list with the gmail tools
+    """
+    toolkit = GmailToolkit(api_resource=get_gmail_api_resource(delegated_user))
+
+    return toolkit.get_tools()
+
+# The tools of the default mailbox, the credentials and the api resource are built on the first use
+registry.register("gmail_toolkit", lambda: get_gmail_toolkit(settings.GOOGLE_DELEGATED_USER))
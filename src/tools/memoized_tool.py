@@ -0,0 +1,122 @@
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForToolRun, CallbackManagerForToolRun
+from langchain_core.tools import BaseTool
+
+
+class ToolRunCache:
+    """
+    Results of the tool calls of one agent run, keyed by tool name and normalized arguments
+    """
+
+    def __init__(self):
+        self._results: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        with self._lock:
+            if key not in self._results:
+                return False, None
+            self.hits += 1
+            return True, self._results[key]
+
+    def set(self, key: str, result: Any) -> None:
+        with self._lock:
+            self._results[key] = result
+
+
+# Cache of the current agent run, each run opens its own scope so the concurrent runs never share results
+_current_tool_cache: ContextVar[Optional[ToolRunCache]] = ContextVar("current_tool_cache", default=None)
+
+
+@contextmanager
+def tool_run_scope() -> Iterator[ToolRunCache]:
+    """
+    Open the tool results cache of an agent run, the memoized tools called inside the scope share it
+    """
+    cache = ToolRunCache()
+    token = _current_tool_cache.set(cache)
+    try:
+        yield cache
+    finally:
+        _current_tool_cache.reset(token)
+
+
+def _is_error_result(result: Any) -> bool:
+    """
+    Check if a tool result is an error message, the tools of the repo catch the API errors and return "Error ..." texts
+    """
+    return isinstance(result, str) and result.startswith("Error")
+
+
+def _normalize_arguments(value: Any) -> Any:
+    """
+    Normalize the tool arguments so the equivalent calls get the same key: stripped strings and no empty arguments
+    """
+    if isinstance(value, dict):
+        return {key: _normalize_arguments(item) for key, item in value.items() if item is not None}
+    if isinstance(value, (list, tuple)):
+        return [_normalize_arguments(item) for item in value]
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+class MemoizedTool(BaseTool):
+    """
+    Wrapper of a read-only tool that answers the repeated calls of an agent run from the run cache
+    The wrapper has the name, description and arguments of the tool, outside a run scope every call reaches the tool
+    The failed calls are not cached: the wrapped tool runs without its error handlers, so its errors reach the wrapper,
+    which handles them as the tool would, and the error messages returned by the tool are not stored
+    """
+    tool: BaseTool
+
+    def __init__(self, tool: BaseTool, **kwargs: Any):
+        super().__init__(
+            tool=tool.model_copy(update={"handle_tool_error": False, "handle_validation_error": False}),
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+            return_direct=tool.return_direct,
+            handle_tool_error=tool.handle_tool_error,
+            handle_validation_error=tool.handle_validation_error,
+            **kwargs
+        )
+
+    def _build_key(self, tool_input: Dict[str, Any]) -> str:
+        return f"{self.name}:{json.dumps(_normalize_arguments(tool_input), sort_keys=True, ensure_ascii=False, default=str)}"
+
+    def _run(self, *args: Any, run_manager: Optional[CallbackManagerForToolRun] = None, **kwargs: Any) -> Any:
+        cache = _current_tool_cache.get()
+        key = self._build_key(kwargs)
+        if cache is not None:
+            cached, result = cache.get(key)
+            if cached:
+                logging.info(f"Tool {self.name} answered from the run cache")
+                return result
+
+        # The wrapped tool runs without the callbacks of the run, the call is already traced by the wrapper
+        result = self.tool.run(kwargs)
+        if cache is not None and not _is_error_result(result):
+            cache.set(key, result)
+        return result
+
+    async def _arun(self, *args: Any, run_manager: Optional[AsyncCallbackManagerForToolRun] = None, **kwargs: Any) -> Any:
+        cache = _current_tool_cache.get()
+        key = self._build_key(kwargs)
+        if cache is not None:
+            cached, result = cache.get(key)
+            if cached:
+                logging.info(f"Tool {self.name} answered from the run cache")
+                return result
+
+        result = await self.tool.arun(kwargs)
+        if cache is not None and not _is_error_result(result):
+            cache.set(key, result)
+        return result
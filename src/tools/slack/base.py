@@ -1,10 +1,22 @@
 """Base class for Slack tools."""
 
+from typing import Any
 from langchain_core.tools import BaseTool
 from slack_sdk import WebClient
+from slack_sdk.http_retry.builtin_handlers import RateLimitErrorRetryHandler
 from core.settings import settings
+from .rate_limit import slack_rate_limiter
 
 class SlackBaseTool(BaseTool):
     """Base class for Slack tools."""
-    client: WebClient = WebClient(token=settings.SLACK_USER_TOKEN)
+    client: WebClient = WebClient(
+        token=settings.SLACK_USER_TOKEN,
+        # The 429 responses are retried after their Retry-After
+        retry_handlers=[RateLimitErrorRetryHandler(max_retry_count=settings.SLACK_RATE_LIMIT_RETRIES)]
+    )
     """The WebClient object."""
+
+    def _call_api(self, method: str, **kwargs: Any) -> Any:
+        """Call a Slack API method (e.g. conversations.history) within the client-side rate limit of its tier"""
+        slack_rate_limiter.acquire(method)
+        return getattr(self.client, method.replace(".", "_"))(**kwargs)
@@ -1,10 +1,17 @@
 import json
 import logging
+import threading
+import time
 from typing import Any, Optional
 
 from langchain_core.callbacks import CallbackManagerForToolRun
+from core.settings import settings
 from .base import SlackBaseTool
 
+# Channels metadata shared by every run (and every user) of the container
+_channels_cache = {"expires_at": 0.0, "channels": None}
+_channels_cache_lock = threading.Lock()
+
 class SlackGetChannel(SlackBaseTool):
     """Tool that gets Slack channel information."""
 
@@ -13,14 +20,24 @@ class SlackGetChannel(SlackBaseTool):
         "Use this tool to get channelid-name dict. There is no input to this tool"
     )
 
-    def _run(
-        self, *args: Any, run_manager: Optional[CallbackManagerForToolRun] = None
-    ) -> str:
-        try:
-            logging.getLogger(__name__)
+    def _list_channels(self) -> list:
+        """Get every page of the workspace channels, following the conversations.list cursor"""
+        channels = []
+        cursor = None
+        while True:
+            response = self._call_api("conversations.list", cursor=cursor, limit=settings.SLACK_CHANNELS_PAGE_SIZE)
+            channels.extend(response["channels"])
+            cursor = (response.get("response_metadata") or {}).get("next_cursor")
+            if not cursor:
+                return channels
+
+    def _get_channels(self, force_refresh: bool = False) -> list:
+        """Get the workspace channels, cached during SLACK_CHANNELS_CACHE_TTL_SECONDS"""
+        with _channels_cache_lock:
+            if not force_refresh and _channels_cache["channels"] is not None and _channels_cache["expires_at"] > time.time():
+                return _channels_cache["channels"]
 
-            result = self.client.conversations_list()
-            channels = result["channels"]
+            channels = self._list_channels()
             filtered_result = [
                 {key: channel[key] for key in ("id", "name", "created", "num_members")}
                 for channel in channels
@@ -29,7 +46,33 @@ class SlackGetChannel(SlackBaseTool):
                 and "created" in channel
                 and "num_members" in channel
             ]
-            return json.dumps(filtered_result, ensure_ascii=False)
+            _channels_cache["channels"] = filtered_result
+            _channels_cache["expires_at"] = time.time() + settings.SLACK_CHANNELS_CACHE_TTL_SECONDS
+            return filtered_result
+
+    @staticmethod
+    def export_state() -> Optional[list]:
+        """Get the cached channels for the warm state snapshot, None if they were not fetched"""
+        return _channels_cache["channels"]
+
+    @staticmethod
+    def hydrate_state(channels: list, age_seconds: float = 0.0) -> None:
+        """Load the channels of a warm state snapshot, they expire with the TTL counted from the snapshot creation"""
+        with _channels_cache_lock:
+            _channels_cache["channels"] = channels
+            _channels_cache["expires_at"] = time.time() - age_seconds + settings.SLACK_CHANNELS_CACHE_TTL_SECONDS
+
+    def refresh(self) -> None:
+        """Fetch the channels again"""
+        self._get_channels(force_refresh=True)
+
+    def _run(
+        self, *args: Any, run_manager: Optional[CallbackManagerForToolRun] = None
+    ) -> str:
+        try:
+            logging.getLogger(__name__)
+
+            return json.dumps(self._get_channels(), ensure_ascii=False)
 
         except Exception as e:
             return "Error creating conversation: {}".format(e)
@@ -1,13 +1,18 @@
-from typing import Optional, Type, List, Dict, Any
-from datetime import datetime
+from typing import Optional, Type, List, Dict, Any, Set
+from datetime import datetime, timedelta
 from pydantic import BaseModel, Field
 from .base import SlackBaseTool
 from .utils import UTC_FORMAT
 from langchain_core.callbacks import CallbackManagerForToolRun
 import json
+from functools import partial
 from slack_sdk.errors import SlackApiError
 import logging
 from .get_users import SlackGetUsers
+from core.concurrency import run_in_threads
+from core.metrics import timed_stage
+from core.settings import settings
+from core.token_budget import get_token_budgeter
 from agents.dummy_agent_responses.slack_extractor import DUMMY_RESPONSE
 
 class GetConversationsSchema(BaseModel):
@@ -47,7 +52,8 @@ class SlackGetConversations(SlackBaseTool):
         
         while True:
             try:
-                response = self.client.conversations_history(
+                response = self._call_api(
+                    "conversations.history",
                     channel=channel_id,
                     cursor=cursor,
                     limit=500,  # Slack's recommended limit
@@ -83,7 +89,8 @@ class SlackGetConversations(SlackBaseTool):
         Returns: List of reply message dictionaries
         """
         try:
-            response = self.client.conversations_replies(
+            response = self._call_api(
+                "conversations.replies",
                 channel=channel_id,
                 ts=thread_ts,
                 oldest=start_ts,
@@ -102,9 +109,23 @@ class SlackGetConversations(SlackBaseTool):
             logging.error(f"Error getting thread replies: {e.response['error']}")
             return []
 
+    @staticmethod
+    def _compact_thread_message(message: Dict[str, Any]) -> Dict[str, Any]:
+        """Keep only the fields of a thread reply used by the summary, the raw Slack fields (blocks, team, etc.) are dropped"""
+        return {
+            "text": message.get("text", ""),
+            "user": message.get("user", ""),
+            "timestamp": message.get("ts", "")
+        }
+
     def _process_messages(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Process the messages to enrich them with user information"""
         enriched_messages = []
+        # The users missing in the directory are looked up at once before enriching the messages
+        self.user_repository.resolve_users(
+            [message.get("user") for message in messages]
+            + [thread_message.get("user") for message in messages for thread_message in message.get("thread_messages", [])]
+        )
         
         for message in messages:
             # Enrich the main message
@@ -130,6 +151,166 @@ class SlackGetConversations(SlackBaseTool):
         
         return enriched_messages
 
+    @timed_stage()
+    def get_day_conversations(self, day: str, user_id: str) -> List[Dict[str, Any]]:
+        """
+        Get the conversations where the user participated in a specific day, with their thread replies.
+
+        Args:
+            day: The day to search for in YYYY-MM-DD format
+            user_id: The Slack user ID to search conversations for
+
+        Returns:
+            List with the channels and the relevant messages of the user
+        """
+        date_obj = datetime.strptime(day, "%Y-%m-%d")
+        start_ts = datetime(
+            date_obj.year, date_obj.month, date_obj.day
+        ).timestamp()
+        end_ts = datetime(
+            date_obj.year, date_obj.month, date_obj.day, 23, 59, 59
+        ).timestamp()
+
+        channels_response = self._call_api(
+            "users.conversations",
+            user=user_id,
+            types="public_channel,private_channel,mpim,im",
+            exclude_archived=True,
+            limit=500
+        )
+        
+        if not channels_response["ok"]:
+            raise SlackApiError("Error getting channels", channels_response)
+        
+        logging.info(f"################## All Slack Channels in workspace: {channels_response}")
+
+        channels = channels_response["channels"]
+        active_channel_ids = self._search_active_channel_ids(day, user_id) if settings.SLACK_SEARCH_PREFILTER_ENABLED else None
+        if active_channel_ids is not None:
+            channels = [channel for channel in channels if channel["id"] in active_channel_ids]
+            logging.info(f"Search prefilter: {len(channels)} of {len(channels_response['channels'])} channels with messages of the user")
+        
+        # The channels are fetched concurrently, then the threads of every channel with a single bounded pool
+        # (a pool per channel would multiply the workers waiting on the rate limit), the conversations keep the order of the channels
+        channel_messages = run_in_threads(
+            {
+                channel["id"]: partial(self._get_relevant_messages, channel, user_id, str(start_ts), str(end_ts))
+                for channel in channels
+            },
+            max_workers=settings.SLACK_FETCH_MAX_CONCURRENCY
+        )
+        thread_replies = run_in_threads(
+            {
+                (channel_id, thread_ts): partial(self._get_thread_replies, channel_id, thread_ts, str(start_ts), str(end_ts))
+                for channel_id, relevant_messages in channel_messages.items()
+                for thread_ts in dict.fromkeys(message["thread_ts"] for message in relevant_messages if "thread_ts" in message)
+            },
+            max_workers=settings.SLACK_FETCH_MAX_CONCURRENCY
+        )
+
+        channel_conversations = [
+            self._build_channel_conversation(channel, channel_messages[channel["id"]], thread_replies)
+            for channel in channels
+            if channel_messages[channel["id"]]
+        ]
+        return channel_conversations
+
+    def _search_active_channel_ids(self, day: str, user_id: str) -> Optional[Set[str]]:
+        """
+        Get the channels with messages of the user or mentions of the user around the day with search.messages,
+        so the history is only fetched for those channels
+        The search dates are in the timezone of the user, the searched days are the day before, the day and the day after
+        and the history keeps filtering the exact day
+
+        Returns:
+            Set with the ids of the active channels, None if the search is not available (full scan fallback)
+        """
+        date_obj = datetime.strptime(day, "%Y-%m-%d")
+        # The after: and before: bounds are exclusive, two days on each side search the day before and the day after,
+        # which cover the offset between the timezone of the user in the search and the day of the history
+        after = (date_obj - timedelta(days=2)).strftime("%Y-%m-%d")
+        before = (date_obj + timedelta(days=2)).strftime("%Y-%m-%d")
+        channel_ids: Set[str] = set()
+        try:
+            for query in (f"from:<@{user_id}> after:{after} before:{before}", f"<@{user_id}> after:{after} before:{before}"):
+                page, pages = 1, 1
+                while page <= min(pages, settings.SLACK_SEARCH_MAX_PAGES):
+                    response = self._call_api("search.messages", query=query, count=100, page=page)
+                    if not response["ok"]:
+                        logging.warning(f"Search prefilter not available: {response.get('error', 'Unknown error')}")
+                        return None
+                    messages = response.get("messages", {})
+                    channel_ids.update(match["channel"]["id"] for match in messages.get("matches", []) if match.get("channel"))
+                    pages = messages.get("paging", {}).get("pages", 1)
+                    page += 1
+                # The matches over the searched pages may be in channels that were not found, the full scan is used instead
+                if pages > settings.SLACK_SEARCH_MAX_PAGES:
+                    logging.warning(f"Search prefilter with more than {settings.SLACK_SEARCH_MAX_PAGES} pages of matches, using the full scan")
+                    return None
+        except SlackApiError as e:
+            logging.warning(f"Search prefilter not available: {e.response.get('error', str(e))}")
+            return None
+        return channel_ids
+
+    def _get_relevant_messages(self, channel: Dict[str, Any], user_id: str, start_ts: str, end_ts: str) -> List[Dict[str, Any]]:
+        """
+        Get the messages of the day of a channel where the user participated
+
+        Returns:
+            List with the messages of the user or that mention the user, empty if the user did not participate in the channel
+        """
+        if channel.get("name"):
+            logging.info(f"################## Searching Slack Messages in channel: {channel['name']}")
+        # Get messages for the specific day
+        channel_messages = self._get_all_messages(channel["id"], start_ts, end_ts)
+
+        relevant_messages = []
+        for message in channel_messages:
+            # Check if user participated in the message
+            if (message.get("user") == user_id or
+                f"<@{user_id}>" in message.get("text", "")):
+                relevant_messages.append(message)
+        return relevant_messages
+
+    def _build_channel_conversation(
+        self,
+        channel: Dict[str, Any],
+        relevant_messages: List[Dict[str, Any]],
+        thread_replies: Dict[tuple, List[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        Build the conversation of a channel with its relevant messages and the replies of their threads
+        The thread context is added once per thread and without the message itself
+
+        Returns:
+            Dict with the channel and its relevant messages
+        """
+        added_threads = set()
+        messages_data = []
+        for message in relevant_messages:
+            message_data = {
+                "text": message.get("text", ""),
+                "user": message.get("user", ""),
+                "timestamp": message.get("ts", ""),
+                "thread_ts": message.get("thread_ts", ""),
+            }
+            # The thread context is added to the first message of the thread
+            thread_key = (channel["id"], message.get("thread_ts"))
+            if thread_key in thread_replies and thread_key not in added_threads:
+                added_threads.add(thread_key)
+                message_data["thread_messages"] = [
+                    self._compact_thread_message(thread_message) for thread_message in thread_replies[thread_key]
+                    if thread_message.get("ts") != message.get("ts")
+                ]
+            messages_data.append(message_data)
+
+        # Procesar los mensajes antes de agregarlos a las conversaciones
+        return {
+            "channel_id": channel["id"],
+            "channel_name": channel.get("name", "direct-message"),
+            "messages": self._process_messages(messages_data)
+        }
+
     def _run(
         self,
         day: str,
@@ -148,76 +329,8 @@ class SlackGetConversations(SlackBaseTool):
             JSON string containing all relevant conversations
         """
         try:
-            date_obj = datetime.strptime(day, "%Y-%m-%d")
-            start_ts = datetime(
-                date_obj.year, date_obj.month, date_obj.day
-            ).timestamp()
-            end_ts = datetime(
-                date_obj.year, date_obj.month, date_obj.day, 23, 59, 59
-            ).timestamp()
-
-            channels_response = self.client.users_conversations(
-                user=user_id,
-                types="public_channel,private_channel,mpim,im",
-                exclude_archived=True,
-                limit=500
-            )
-            
-            if not channels_response["ok"]:
-                raise SlackApiError("Error getting channels", channels_response)
-            
-            logging.info(f"################## All Slack Channels in workspace: {channels_response}")
-            
-            conversations = []
-            for channel in channels_response["channels"]:
-                
-                if channel["name"]:
-                    logging.info(f"################## Searching Slack Messages in channel: {channel['name']}")
-                # Get messages for the specific day
-                channel_messages = self._get_all_messages(
-                    channel["id"], 
-                    str(start_ts), 
-                    str(end_ts)
-                )
-                
-                relevant_messages = []
-                
-                for message in channel_messages:
-                    # Check if user participated in the message
-                    if (message.get("user") == user_id or 
-                        f"<@{user_id}>" in message.get("text", "")):
-                        
-                        message_data = {
-                            "text": message.get("text", ""),
-                            "user": message.get("user", ""),
-                            "timestamp": message.get("ts", ""),
-                            "thread_ts": message.get("thread_ts", ""),
-                        }
-                        
-                        # Get thread context if applicable
-                        if "thread_ts" in message:
-                            thread_messages = self._get_thread_replies(
-                                channel["id"],
-                                message["thread_ts"],
-                                str(start_ts),
-                                str(end_ts)
-                            )
-                            message_data["thread_messages"] = thread_messages
-                            
-                        relevant_messages.append(message_data)
-                
-                if relevant_messages:
-                    # Procesar los mensajes antes de agregarlos a las conversaciones
-                    enriched_messages = self._process_messages(relevant_messages)
-                    conversations.append({
-                        "channel_id": channel["id"],
-                        "channel_name": channel.get("name", "direct-message"),
-                        "messages": enriched_messages
-                    })
-            
-
-            return json.dumps(conversations, ensure_ascii=False)
-            
+            conversations = get_token_budgeter().fit("slack_conversations", self.get_day_conversations(day, user_id))
+            return conversations if isinstance(conversations, str) else json.dumps(conversations, ensure_ascii=False)
         except Exception as e:
             logging.error(f"Error in get_conversations: {str(e)}", exc_info=True)
             return f"Error getting conversations: {str(e)}"
\ No newline at end of file
@@ -1,42 +1,189 @@
 from .base import SlackBaseTool
-from typing import Dict
+from typing import ClassVar, Dict, Iterable, Optional
 from slack_sdk.errors import SlackApiError
 from pydantic import BaseModel, Field
+from core.concurrency import run_in_threads
+from core.settings import settings
 import logging
+import threading
+import time
+
+UNKNOWN_USER = {"full_name": "Unknown User", "display_name": "unknown"}
+# Seconds before loading the directory again after a failed load, the lookups use users.info meanwhile
+USERS_LOAD_RETRY_SECONDS = 30
 
 class SlackGetUsers(SlackBaseTool):
     """
     Class to get the users from the slack workspace
+    Users directory of the workspace: the users are bulk loaded with all the users.list pages on the first lookup
+    and loaded again when SLACK_USERS_CACHE_TTL_SECONDS expires, the lookups keep using the current directory meanwhile
+    The ids that are not in the directory (new users, other workspaces) are looked up with users.info,
+    the ids that are not found are not looked up again until the TTL expires
+    A failed load keeps the current directory and is retried on a lookup after USERS_LOAD_RETRY_SECONDS
     """
     users_cache: Dict[str, dict] = Field(default_factory=dict, exclude=True)
+    users_fetched: bool = Field(default=False, exclude=True)
+    loaded_at: float = Field(default=0.0, exclude=True)
+    load_retry_at: float = Field(default=0.0, exclude=True)
+    not_found_ids: Dict[str, float] = Field(default_factory=dict, exclude=True)
+    counters: Dict[str, int] = Field(default_factory=lambda: {"hits": 0, "misses": 0, "lookups": 0, "loads": 0}, exclude=True)
+    fetch_lock: ClassVar[threading.Lock] = threading.Lock()
+    counters_lock: ClassVar[threading.Lock] = threading.Lock()
     name: str = "get_users"
     description: str = "Tool that gets information about Slack users in the workspace"
     
-    def __new__(cls):
+    def __new__(cls, **kwargs):
         if not hasattr(cls, 'instance'):
             cls.instance = super(SlackGetUsers, cls).__new__(cls)
-            cls.instance.fetch_all_users()
         return cls.instance
+
+    def __init__(self, **kwargs):
+        # The pydantic fields are not class attributes, the singleton is initialized only once
+        # The users are fetched on the first lookup, not when the tools are imported
+        if "users_cache" in self.__dict__:
+            return
+        super().__init__(**kwargs)
+
+    def _count(self, counter: str, value: int = 1) -> None:
+        with self.counters_lock:
+            self.counters[counter] += value
+
+    def _is_expired(self) -> bool:
+        return time.time() - self.loaded_at > settings.SLACK_USERS_CACHE_TTL_SECONDS and time.time() >= self.load_retry_at
+
+    def _ensure_users(self) -> None:
+        """
+        Load the directory on the first lookup (the lookups wait for it) and refresh it when it expires
+        (only one lookup refreshes it, the others use the current directory)
+        """
+        if self.users_fetched and not self._is_expired():
+            return
+        if self.users_fetched:
+            if self.fetch_lock.acquire(blocking=False):
+                try:
+                    if self._is_expired():
+                        self.fetch_all_users()
+                finally:
+                    self.fetch_lock.release()
+            return
+        if time.time() < self.load_retry_at:
+            return
+        with self.fetch_lock:
+            if not self.users_fetched and time.time() >= self.load_retry_at:
+                self.fetch_all_users()
+
+    @staticmethod
+    def _compact_user(user: dict) -> dict:
+        """Keep only the names of a user, the directory is keyed by the user id"""
+        profile = user.get("profile", {})
+        return {
+            "full_name": user.get("real_name") or profile.get("real_name", ""),
+            "display_name": profile.get("display_name", "")
+        }
     
-    @classmethod
-    def fetch_all_users(cls) -> None:
-        """Get and cache all the users from the workspace"""
+    def fetch_all_users(self) -> None:
+        """
+        Get and cache all the users from the workspace, following the users.list cursor
+        The directory is only replaced when every page was loaded, a failed load keeps the current state
+        """
+        users: Dict[str, dict] = {}
+        cursor = None
         try:
-            response = cls.client.users_list()
-            for user in response["members"]:
-                cls.users_cache[user["id"]] = {
-                    "full_name": user.get("real_name", ""),
-                    "display_name": user.get("profile", {}).get("display_name", "")
-                }
+            while True:
+                response = self._call_api("users.list", cursor=cursor, limit=settings.SLACK_USERS_PAGE_SIZE)
+                for user in response["members"]:
+                    users[user["id"]] = self._compact_user(user)
+                cursor = (response.get("response_metadata") or {}).get("next_cursor")
+                if not cursor:
+                    break
         except SlackApiError as e:
-            print(f"Error getting users information: {e}")
+            logging.error(f"Error getting users information: {e}")
+            self.load_retry_at = time.time() + USERS_LOAD_RETRY_SECONDS
+            return
 
-    def get_user_info(self, user_id: str) -> dict:
-        """Get the information of a specific user"""
-        return self.users_cache.get(user_id, {
-            "full_name": "Unknown User",
-            "display_name": "unknown"
+        # The loaded users are merged, the users found with users.info are kept
+        self.users_cache.update(users)
+        self.not_found_ids.clear()
+        self.loaded_at = time.time()
+        self.load_retry_at = 0.0
+        self.users_fetched = True
+        self._count("loads")
+        logging.info(f"Loaded {len(users)} users in the slack users directory")
+
+    def _lookup_user(self, user_id: str) -> Optional[dict]:
+        """Get a user with users.info, None if it is not found, the API errors are raised"""
+        self._count("lookups")
+        try:
+            response = self._call_api("users.info", user=user_id)
+        except SlackApiError as e:
+            if e.response.get("error") == "user_not_found":
+                return None
+            raise e
+        if not response.get("ok") or not response.get("user"):
+            return None
+        return self._compact_user(response["user"])
+
+    def resolve_users(self, user_ids: Iterable[str]) -> None:
+        """
+        Look up the ids that are not in the directory, concurrently and once per id
+        :param user_ids: ids of the users of a set of messages
+        """
+        self._ensure_users()
+        now = time.time()
+        missing_ids = sorted({
+            user_id for user_id in user_ids
+            if user_id and user_id not in self.users_cache and self.not_found_ids.get(user_id, 0) < now
         })
+        if not missing_ids:
+            return
+
+        users = run_in_threads(
+            {user_id: (lambda user_id=user_id: self._lookup_user(user_id)) for user_id in missing_ids},
+            max_workers=settings.SLACK_USERS_LOOKUP_CONCURRENCY,
+            return_exceptions=True
+        )
+        for user_id, user in users.items():
+            # The ids of a failed lookup are not cached as not found, they are looked up again on the next call
+            if isinstance(user, Exception):
+                logging.warning(f"Error getting the user {user_id}: {user}")
+            elif user is None:
+                self.not_found_ids[user_id] = now + settings.SLACK_USERS_CACHE_TTL_SECONDS
+            else:
+                self.users_cache[user_id] = user
+
+    def export_state(self) -> Optional[Dict[str, dict]]:
+        """Get the users directory for the warm state snapshot, None if it was not fetched"""
+        return dict(self.users_cache) if self.users_fetched else None
+
+    def hydrate_state(self, users: Dict[str, dict], age_seconds: float = 0.0) -> None:
+        """Load the users directory of a warm state snapshot, it expires with the TTL counted from the snapshot creation"""
+        with self.fetch_lock:
+            self.users_cache.update(users)
+            self.loaded_at = time.time() - age_seconds
+            self.load_retry_at = 0.0
+            self.users_fetched = True
+
+    def refresh(self) -> None:
+        """Load the users again, the lookups keep using the current directory meanwhile"""
+        with self.fetch_lock:
+            self.fetch_all_users()
+
+    def get_user_info(self, user_id: str) -> dict:
+        """Get the information of a specific user, it is looked up with users.info if it is not in the directory"""
+        self._ensure_users()
+        user_info = self.users_cache.get(user_id)
+        if user_info is not None:
+            self._count("hits")
+            return user_info
+
+        self._count("misses")
+        self.resolve_users([user_id])
+        return self.users_cache.get(user_id, UNKNOWN_USER)
+
+    def stats(self) -> Dict[str, int]:
+        """Get the lookup counters of the directory since the container started"""
+        with self.counters_lock:
+            return {**self.counters, "users": len(self.users_cache)}
    
     def enrich_messages(self, channel_data: dict) -> dict:
         """Enrich all the messages with user information"""
@@ -0,0 +1,62 @@
+"""Client-side rate limiting of the Slack Web API methods."""
+
+import threading
+import time
+from typing import Dict
+
+from core.settings import settings
+
+# Requests per minute of the Slack rate limit tiers
+RATE_LIMIT_TIERS = {1: 1, 2: 20, 3: 50, 4: 100}
+
+# Tier of the methods called by the tools, the methods not listed are limited as tier 3
+METHOD_TIERS = {
+    "users.list": 2,
+    "conversations.list": 2,
+    "search.messages": 2,
+    "users.conversations": 3,
+    "conversations.history": 3,
+    "conversations.replies": 3,
+    "users.info": 4
+}
+
+
+class SlackRateLimiter:
+    """
+    Token bucket per Slack API method, refilled at the requests per minute of the method tier
+    The bucket holds one minute of requests, Slack allows the bursts within the minute, so a fan-out starts at once
+    and only waits when it goes over the tier. It is shared by every thread of the container,
+    the 429 responses are still retried by the client retry handler
+    """
+
+    def __init__(self, enabled: bool = None):
+        self.enabled = enabled if enabled is not None else settings.SLACK_RATE_LIMIT_ENABLED
+        self._buckets: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_requests_per_minute(method: str) -> int:
+        return RATE_LIMIT_TIERS[METHOD_TIERS.get(method, 3)]
+
+    def acquire(self, method: str) -> None:
+        """
+        Wait until a request of the method is allowed
+        """
+        if not self.enabled:
+            return
+        capacity = self.get_requests_per_minute(method)
+        rate = capacity / 60
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, updated_at = self._buckets.get(method, (capacity, now))
+                tokens = min(capacity, tokens + (now - updated_at) * rate)
+                if tokens >= 1:
+                    self._buckets[method] = (tokens - 1, now)
+                    return
+                self._buckets[method] = (tokens, now)
+                wait_seconds = (1 - tokens) / rate
+            time.sleep(wait_seconds)
+
+
+slack_rate_limiter = SlackRateLimiter()
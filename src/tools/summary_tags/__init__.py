@@ -1,7 +1,10 @@
 from .get_tags_tool import get_tags_tool
 from .create_tags_tool import create_tags_tool
+from .tag_catalogue import TagCatalogue, tag_catalogue
 
 __all__ = [
     get_tags_tool,
-    create_tags_tool
-]
\ No newline at end of file
+    create_tags_tool,
+    TagCatalogue,
+    tag_catalogue
+]
@@ -3,7 +3,9 @@ from langchain_core.callbacks import CallbackManagerForToolRun
 from pydantic import BaseModel, Field, PrivateAttr
 from typing import Optional, List, Any, Type
 from services import DynamoDbService
+from .tag_catalogue import TagCatalogue
 import json
+import threading
 from core.settings import settings
 import logging
 
@@ -63,6 +65,8 @@ class CreateTagsTool(BaseTool):
     
     _usage_count: int = PrivateAttr(default=0)
     _cached_created_tags: List = PrivateAttr(default_factory=list)
+    # The concurrent runs (backfill days, batch users) read, diff and create the tags one at a time to avoid duplicated tags
+    _create_lock: Any = PrivateAttr(default_factory=threading.Lock)
     ########
     _exclude_callback_manager = True
 
@@ -70,6 +74,32 @@ class CreateTagsTool(BaseTool):
         super().__init__(**kwargs)
         self._exclude_callback_manager = True
     ########
+    def _get_existing_tag_names(self) -> set:
+        """
+        Read all the pages of the tags table and get the normalized names of the existing tags
+        """
+        existing_names = set()
+        next_page_token = None
+        while True:
+            response = self.dynamo_service.get_all(last_evaluated_key=next_page_token, limit=500)
+            existing_names.update(TagCatalogue.normalize_name(tag["name"]) for tag in response["items"])
+            next_page_token = response.get("next_page_token")
+            if not next_page_token:
+                return existing_names
+
+    def _create_missing_tags(self, tags: List[dict]) -> dict:
+        """
+        Create only the tags that are not in the table yet, the read and the write are done under the lock
+        """
+        with self._create_lock:
+            existing_names = self._get_existing_tag_names()
+            new_tags = {}
+            for tag in tags:
+                normalized_name = TagCatalogue.normalize_name(tag["name"])
+                if normalized_name not in existing_names:
+                    new_tags.setdefault(normalized_name, tag)
+            return self.dynamo_service.bulk_create(list(new_tags.values()))
+
     def _run(
         self, 
         tags: List[dict],
@@ -90,7 +120,7 @@ class CreateTagsTool(BaseTool):
             if self._usage_count > 0:
                 return json.dumps(self._cached_created_tags['items'], ensure_ascii=False)
 
-            result = self.dynamo_service.bulk_create(validated_tags)
+            result = self._create_missing_tags(validated_tags)
             self._usage_count += 1
             self._cached_created_tags = result
             return json.dumps(result, ensure_ascii=False)
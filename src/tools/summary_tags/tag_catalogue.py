@@ -0,0 +1,137 @@
+import re
+import threading
+import time
+import unicodedata
+import logging
+from typing import Dict, List, Optional
+from services import DynamoDbService
+from core.settings import settings
+from core.metrics import timed_stage
+
+
+class TagCatalogue:
+    """
+    Local index of the tags catalogue, keyed by the normalized tag name
+    The catalogue is read once and reloaded after its TTL, the created tags are added to the index,
+    so the extracted entities are diffed against the existing tags without asking the model to do it
+    """
+
+    def __init__(self, dynamo_service: DynamoDbService = None, ttl_seconds: int = None):
+        self._dynamo_service = dynamo_service
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.TAGS_CATALOGUE_TTL_SECONDS
+        self._tags: Dict[str, dict] = {}
+        self._loaded_at: float = None
+        self._lock = threading.RLock()
+
+    @property
+    def dynamo_service(self) -> DynamoDbService:
+        if self._dynamo_service is None:
+            self._dynamo_service = DynamoDbService(table_name=settings.TAGS_TABLE)
+        return self._dynamo_service
+
+    @staticmethod
+    def normalize_name(name: str) -> str:
+        """
+        Normalize a tag name to compare it with the catalogue: without accents, case, punctuation and extra spaces
+        """
+        without_accents = "".join(
+            char for char in unicodedata.normalize("NFKD", str(name)) if not unicodedata.combining(char)
+        )
+        return " ".join(re.sub(r"[^\w]+", " ", without_accents.casefold()).split())
+
+    def _load(self) -> None:
+        """
+        Read all the pages of the tags table and rebuild the index
+        """
+        tags: Dict[str, dict] = {}
+        next_page_token = None
+        while True:
+            response = self.dynamo_service.get_all(last_evaluated_key=next_page_token, limit=500)
+            for tag in response["items"]:
+                tags.setdefault(self.normalize_name(tag["name"]), tag)
+            next_page_token = response.get("next_page_token")
+            if not next_page_token:
+                break
+        self._tags = tags
+        self._loaded_at = time.monotonic()
+        logging.info(f"Loaded {len(tags)} tags in the tags catalogue")
+
+    def get_tags(self) -> List[dict]:
+        """
+        Get the tags of the catalogue, it is loaded on the first call and when its TTL expires
+        """
+        with self._lock:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl_seconds:
+                self._load()
+            return list(self._tags.values())
+
+    def export_state(self) -> Optional[List[dict]]:
+        """
+        Get the tags of the catalogue for the warm state snapshot, None if it was not loaded
+        """
+        with self._lock:
+            return list(self._tags.values()) if self._loaded_at is not None else None
+
+    def hydrate_state(self, tags: List[dict], age_seconds: float = 0.0) -> None:
+        """
+        Load the tags of a warm state snapshot, the catalogue is reloaded when the TTL counted from the snapshot creation expires
+        """
+        with self._lock:
+            self._tags = {}
+            for tag in tags:
+                self._tags.setdefault(self.normalize_name(tag["name"]), tag)
+            self._loaded_at = time.monotonic() - age_seconds
+
+    def refresh(self) -> None:
+        """
+        Read the tags table again
+        """
+        with self._lock:
+            self._load()
+
+    @timed_stage()
+    def resolve(self, tags: List[dict]) -> dict:
+        """
+        Match the extracted tags with the catalogue by normalized name and bulk create only the new ones
+        The matched tags keep the name and type of the catalogue tag, the repeated tags are returned once
+        :param tags: list of dicts with name, type, related_projects and related_people
+        :return: dict with the resolved tags and the names of the created tags
+        """
+        with self._lock:
+            self.get_tags()
+            resolved_tags: Dict[str, dict] = {}
+            new_tags: Dict[str, dict] = {}
+            for tag in tags:
+                if not tag.get("name"):
+                    continue
+                normalized_name = self.normalize_name(tag["name"])
+                if normalized_name in resolved_tags:
+                    continue
+                existing_tag = self._tags.get(normalized_name) or new_tags.get(normalized_name)
+                if existing_tag is None:
+                    existing_tag = new_tags[normalized_name] = {
+                        "name": tag["name"].strip(),
+                        "type": tag.get("type", "project"),
+                        "related_projects": tag.get("related_projects", []),
+                        "related_people": tag.get("related_people", []),
+                        "usage_count": 1
+                    }
+                resolved_tags[normalized_name] = {
+                    "name": existing_tag["name"],
+                    "type": existing_tag["type"],
+                    "related_projects": tag.get("related_projects", []),
+                    "related_people": tag.get("related_people", [])
+                }
+
+            if new_tags:
+                created_tags = self.dynamo_service.bulk_create(list(new_tags.values()))["items"]
+                for created_tag in created_tags:
+                    self._tags[self.normalize_name(created_tag["name"])] = created_tag
+
+            return {
+                "tags": list(resolved_tags.values()),
+                "new_tags_created": [tag["name"] for tag in new_tags.values()]
+            }
+
+
+tag_catalogue = TagCatalogue()
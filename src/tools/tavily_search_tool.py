@@ -1,13 +1,111 @@
+import asyncio
+import json
+import logging
+from typing import Any, List, Optional
 from langchain_community.tools import TavilySearchResults
+from langchain_core.callbacks import AsyncCallbackManagerForToolRun, CallbackManagerForToolRun
+from langchain_core.tools import BaseTool
+from core.kv_store import SQLiteKeyValueStore
+from core.registry import registry
 from core.settings import settings
 
+WEB_SEARCH_DESCRIPTION = "Search the web for information about words or phrases to be clear in the meaning of a text, always use this tool to understand the meaning of words or phrases."
+
+
+class GlossarySearchTool(BaseTool):
+    """
+    Lightweight web search for the glossary lookups, only the snippets of the results are returned
+    The snippets are cached per normalized term, so the recurring jargon is searched once per TTL
+    The failed searches are not cached
+    """
+    name: str = "web_search"
+    description: str = WEB_SEARCH_DESCRIPTION
+    search_tool: BaseTool
+    store: Optional[Any] = None
+    ttl_seconds: int = 7 * 24 * 60 * 60
+    snippet_max_chars: int = 500
+
+    @staticmethod
+    def normalize_term(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    def _compact_results(self, output: Any) -> Optional[str]:
+        """
+        Keep the title, url and a short snippet of each result, None if the output is not a list of results
+        """
+        if isinstance(output, str):
+            try:
+                output = json.loads(output)
+            except ValueError:
+                return None
+        if not isinstance(output, list):
+            return None
+        snippets = [
+            {
+                "title": result.get("title", ""),
+                "url": result.get("url", ""),
+                "content": (result.get("content") or "")[:self.snippet_max_chars]
+            }
+            for result in output if isinstance(result, dict)
+        ]
+        return json.dumps(snippets, ensure_ascii=False)
+
+    def _get_cached(self, term: str) -> Optional[str]:
+        if self.store is None:
+            return None
+        try:
+            return self.store.get(term)
+        except Exception as e:
+            logging.warning(f"Error reading the web search cache: {e}")
+            return None
+
+    def _set_cached(self, term: str, snippets: str) -> None:
+        if self.store is None:
+            return
+        try:
+            self.store.set(term, snippets, self.ttl_seconds)
+        except Exception as e:
+            logging.warning(f"Error writing the web search cache: {e}")
+
+    def _run(self, query: str, run_manager: Optional[CallbackManagerForToolRun] = None) -> str:
+        term = self.normalize_term(query)
+        cached = self._get_cached(term)
+        if cached is not None:
+            return cached
+
+        output = self.search_tool.run({"query": query})
+        snippets = self._compact_results(output)
+        if snippets is None:
+            return output
+        self._set_cached(term, snippets)
+        return snippets
+
+    async def _arun(self, query: str, run_manager: Optional[AsyncCallbackManagerForToolRun] = None) -> str:
+        # The SQLite cache is blocking, it is read and written in a thread to keep the event loop free
+        term = self.normalize_term(query)
+        cached = await asyncio.to_thread(self._get_cached, term)
+        if cached is not None:
+            return cached
+
+        output = await self.search_tool.arun({"query": query})
+        snippets = self._compact_results(output)
+        if snippets is None:
+            return output
+        await asyncio.to_thread(self._set_cached, term, snippets)
+        return snippets
+
+
 class TavilySearch:
     def __init__(self):
         if not settings.TAVILY_API_KEY:
             raise ValueError("TAVILY_API_KEY is not set in the environment variables")
         self.set_tool()
-    
+
     def set_tool(self):
+        if settings.TAVILY_SEARCH_MODE == "glossary":
+            self.tool = self._build_glossary_tool()
+            return
+
         self.tool = TavilySearchResults(
             name="web_search",
             max_results=5,
@@ -15,7 +113,37 @@ class TavilySearch:
             include_answer=True,
             include_raw_content=True,
             include_images=True,
-            description="Search the web for information about words or phrases to be clear in the meaning of a text, always use this tool to understand the meaning of words or phrases."
+            description=WEB_SEARCH_DESCRIPTION
+        )
+
+    @staticmethod
+    def _get_cache_store() -> Optional[SQLiteKeyValueStore]:
+        """
+        Get the persistent cache of the glossary lookups in TAVILY_CACHE_PATH, None if it is disabled or can not be opened
+        """
+        if not settings.TAVILY_CACHE_PATH:
+            return None
+        try:
+            return SQLiteKeyValueStore(settings.TAVILY_CACHE_PATH, table="web_search_snippets")
+        except Exception as e:
+            logging.warning(f"Web search cache not available in {settings.TAVILY_CACHE_PATH}: {e}")
+            return None
+
+    def _build_glossary_tool(self) -> GlossarySearchTool:
+        search_tool = TavilySearchResults(
+            name="web_search",
+            max_results=settings.TAVILY_GLOSSARY_MAX_RESULTS,
+            search_depth="basic",
+            include_answer=False,
+            include_raw_content=False,
+            include_images=False,
+            description=WEB_SEARCH_DESCRIPTION
+        )
+        return GlossarySearchTool(
+            search_tool=search_tool,
+            store=self._get_cache_store(),
+            ttl_seconds=settings.TAVILY_CACHE_TTL_SECONDS,
+            snippet_max_chars=settings.TAVILY_GLOSSARY_SNIPPET_MAX_CHARS
         )
 
-tavily_search_tool = TavilySearch().tool
\ No newline at end of file
+registry.register("web_search_tool", lambda: TavilySearch().tool)
@@ -0,0 +1,14 @@
+import importlib
+
+import pytest
+
+from benchmarks.harness import BenchmarkConfig, install_fakes
+
+
+@pytest.fixture(scope="session")
+def fake_environment():
+    """ Installs the local stand-ins of OpenAI, Slack, Gmail, DynamoDB, Pinecone and Tavily and imports the app with them"""
+
+    environment = install_fakes(BenchmarkConfig(channels=3, messages_per_channel=10, emails_per_day=5, llm_latency_ms=0, api_latency_ms=0))
+    importlib.import_module("app")
+    return environment
@@ -0,0 +1,50 @@
+import pytest
+
+
+@pytest.fixture()
+def checkpoint_service(fake_environment):
+    from services import checkpoint_service
+    return checkpoint_service
+
+
+def _source_output(tool_output):
+    return {
+        "summary_result": {"daily_summary": "summary"},
+        "tool_usage": [{"tool_name": "get_conversations", "tool_input": {"day": "2024-12-03"}, "tool_output": tool_output}]
+    }
+
+
+def test_checkpoint_roundtrip_drops_the_raw_tool_output(checkpoint_service):
+    store = checkpoint_service.InMemoryCheckpointStore()
+    store.save("run", "slack", _source_output(["message"] * 100))
+
+    assert store.get("run", "slack") == {
+        "summary_result": {"daily_summary": "summary"},
+        "tool_usage": [{"tool_name": "get_conversations", "tool_input": {"day": "2024-12-03"}}]
+    }
+    assert store.get("run", "gmail") is None
+
+
+def test_checkpoint_is_a_snapshot_of_the_output(checkpoint_service):
+    store = checkpoint_service.InMemoryCheckpointStore()
+    output = {"tags_result": {"tags": []}}
+    store.save("run", "tags", output)
+    output["tags_result"]["tags"].append({"name": "changed"})
+
+    assert store.get("run", "tags") == {"tags_result": {"tags": []}}
+
+
+def test_expired_checkpoint_is_not_returned(checkpoint_service):
+    store = checkpoint_service.InMemoryCheckpointStore(ttl_seconds=-1)
+    store.save("run", "general", {"summary_result": {}})
+
+    assert store.get("run", "general") is None
+
+
+def test_dynamo_checkpoint_over_the_size_limit_is_not_stored(checkpoint_service):
+    store = checkpoint_service.DynamoCheckpointStore(table_name="unit_checkpoints", max_bytes=200)
+    store.save("run", "slack", _source_output(["long message " * 100]))
+    store.save("run", "general", {"summary_result": {"daily_summary": "x" * 500}})
+
+    assert store.get("run", "slack") is not None
+    assert store.get("run", "general") is None
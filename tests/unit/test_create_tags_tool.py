@@ -0,0 +1,40 @@
+import json
+import uuid
+
+import pytest
+
+
+@pytest.fixture()
+def tags_db(fake_environment):
+    from services import DynamoDbService
+    return DynamoDbService(table_name=f"unit_tags_{uuid.uuid4().hex}")
+
+
+@pytest.fixture()
+def create_tool(tags_db):
+    from tools.summary_tags.create_tags_tool import CreateTagsTool
+    return CreateTagsTool(dynamo_service=tags_db)
+
+
+def test_existing_tags_are_not_created_again(create_tool, tags_db):
+    tags_db.bulk_create([{"name": "Proyecto Atlas", "type": "project", "related_projects": [], "related_people": [], "usage_count": 1}])
+
+    result = json.loads(create_tool._run(tags=[
+        {"name": "proyecto atlas", "type": "project"},
+        {"name": "Nuevo Cliente", "type": "project"},
+        {"name": "nuevo cliente", "type": "project"}
+    ]))
+
+    assert [tag["name"] for tag in result["items"]] == ["Nuevo Cliente"]
+    assert sorted(tag["name"] for tag in tags_db.get_all(limit=500)["items"]) == ["Nuevo Cliente", "Proyecto Atlas"]
+
+
+def test_concurrent_runs_create_a_tag_once(create_tool, tags_db):
+    from core.concurrency import run_in_threads
+
+    run_in_threads({
+        f"run_{index}": lambda: create_tool._create_missing_tags([{"name": "Nuevo Cliente", "type": "project"}])
+        for index in range(8)
+    })
+
+    assert [tag["name"] for tag in tags_db.get_all(limit=500)["items"]] == ["Nuevo Cliente"]
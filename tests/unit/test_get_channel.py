@@ -0,0 +1,38 @@
+import pytest
+
+DAY = "2024-12-03"
+
+
+@pytest.fixture()
+def workspace(fake_environment, monkeypatch):
+    """ Workspace with more channels than a conversations.list page, the channels cache starts empty"""
+
+    from benchmarks.fakes.slack import FakeWebClient, SyntheticWorkspace
+    from tools.slack import get_channel
+    workspace = SyntheticWorkspace(DAY, fake_environment.config.member_id, channels=12, messages_per_channel=1)
+    monkeypatch.setattr(FakeWebClient, "workspace", workspace)
+    monkeypatch.setattr(get_channel, "_channels_cache", {"expires_at": 0.0, "channels": None})
+    FakeWebClient.calls.clear()
+    return workspace
+
+
+def test_channels_are_listed_with_every_page(workspace, monkeypatch):
+    from benchmarks.fakes.slack import FakeWebClient
+    from core.settings import Settings
+    from tools.slack.get_channel import SlackGetChannel
+    monkeypatch.setattr(Settings, "SLACK_CHANNELS_PAGE_SIZE", 5)
+
+    channels = SlackGetChannel()._get_channels()
+
+    assert [channel["id"] for channel in channels] == [channel["id"] for channel in workspace.channels]
+    assert FakeWebClient.calls["conversations.list"] == 3
+
+
+def test_channels_are_cached_between_runs(workspace):
+    from benchmarks.fakes.slack import FakeWebClient
+    from tools.slack.get_channel import SlackGetChannel
+
+    SlackGetChannel()._get_channels()
+    SlackGetChannel()._get_channels()
+
+    assert FakeWebClient.calls["conversations.list"] == 1
@@ -0,0 +1,121 @@
+import pytest
+
+DAY = "2024-12-03"
+
+
+@pytest.fixture()
+def workspace(fake_environment, monkeypatch):
+    """ Workspace where only part of the channels have messages of the summarized user"""
+
+    from benchmarks.fakes.slack import FakeWebClient, SyntheticWorkspace
+    workspace = SyntheticWorkspace(DAY, fake_environment.config.member_id, channels=12, messages_per_channel=10, user_message_ratio=0.08)
+    monkeypatch.setattr(FakeWebClient, "workspace", workspace)
+    FakeWebClient.calls.clear()
+    return workspace
+
+
+@pytest.fixture()
+def conversations_tool(workspace):
+    from tools.slack.get_conversations import SlackGetConversations
+    return SlackGetConversations()
+
+
+def _active_channel_ids(workspace):
+    return {
+        channel_id
+        for channel_id, messages in workspace.messages.items()
+        if any(message["user"] == workspace.member_id or f"<@{workspace.member_id}>" in message["text"] for message in messages)
+    }
+
+
+def _replace_search(monkeypatch, search_messages):
+    from benchmarks.fakes.slack import FakeWebClient
+    monkeypatch.setattr(FakeWebClient, "search_messages", search_messages)
+
+
+def test_prefilter_returns_the_channels_with_messages_of_the_user(conversations_tool, workspace, monkeypatch):
+    from benchmarks.fakes.slack import FakeWebClient
+    queries = []
+    search_messages = FakeWebClient.search_messages
+
+    def recorded_search(self, query, **kwargs):
+        queries.append(query)
+        return search_messages(self, query, **kwargs)
+
+    _replace_search(monkeypatch, recorded_search)
+
+    active_channel_ids = conversations_tool._search_active_channel_ids(DAY, workspace.member_id)
+
+    assert active_channel_ids == _active_channel_ids(workspace)
+    assert 0 < len(active_channel_ids) < len(workspace.channels)
+    # The bounds are exclusive, the searched days are 2024-12-02, 2024-12-03 and 2024-12-04
+    assert queries == [
+        f"from:<@{workspace.member_id}> after:2024-12-01 before:2024-12-05",
+        f"<@{workspace.member_id}> after:2024-12-01 before:2024-12-05"
+    ]
+
+
+def test_prefilter_falls_back_to_the_full_scan_on_search_errors(conversations_tool, workspace, monkeypatch):
+    from slack_sdk.errors import SlackApiError
+
+    def failing_search(self, **kwargs):
+        raise SlackApiError("missing_scope", {"ok": False, "error": "missing_scope"})
+
+    _replace_search(monkeypatch, failing_search)
+
+    assert conversations_tool._search_active_channel_ids(DAY, workspace.member_id) is None
+
+
+def test_prefilter_falls_back_to_the_full_scan_on_not_ok_responses(conversations_tool, workspace, monkeypatch):
+    _replace_search(monkeypatch, lambda self, **kwargs: {"ok": False, "error": "not_allowed_token_type"})
+
+    assert conversations_tool._search_active_channel_ids(DAY, workspace.member_id) is None
+
+
+def test_prefilter_falls_back_to_the_full_scan_over_the_max_pages(conversations_tool, workspace, monkeypatch):
+    from core.settings import settings
+    searched_pages = []
+
+    def paged_search(self, query, count=100, page=1, **kwargs):
+        searched_pages.append(page)
+        return {
+            "ok": True,
+            "messages": {
+                "matches": [{"channel": {"id": workspace.channels[0]["id"]}}],
+                "paging": {"page": page, "pages": settings.SLACK_SEARCH_MAX_PAGES + 1}
+            }
+        }
+
+    _replace_search(monkeypatch, paged_search)
+
+    assert conversations_tool._search_active_channel_ids(DAY, workspace.member_id) is None
+    assert searched_pages == list(range(1, settings.SLACK_SEARCH_MAX_PAGES + 1))
+
+
+def test_prefiltered_conversations_are_the_full_scan_conversations(conversations_tool, workspace, monkeypatch):
+    from benchmarks.fakes.slack import FakeWebClient
+    from core.settings import Settings
+
+    prefiltered_conversations = conversations_tool.get_day_conversations(DAY, workspace.member_id)
+    prefiltered_history_calls = FakeWebClient.calls["conversations.history"]
+
+    monkeypatch.setattr(Settings, "SLACK_SEARCH_PREFILTER_ENABLED", False)
+    FakeWebClient.calls.clear()
+    full_scan_conversations = conversations_tool.get_day_conversations(DAY, workspace.member_id)
+
+    assert prefiltered_conversations == full_scan_conversations
+    assert [conversation["channel_id"] for conversation in full_scan_conversations] == sorted(_active_channel_ids(workspace))
+    assert prefiltered_history_calls == len(_active_channel_ids(workspace))
+    assert FakeWebClient.calls["conversations.history"] == len(workspace.channels)
+
+
+def test_thread_replies_are_added_once_per_thread(conversations_tool, workspace):
+    conversations = conversations_tool.get_day_conversations(DAY, workspace.member_id)
+
+    assert any("thread_messages" in message for conversation in conversations for message in conversation["messages"])
+    for conversation in conversations:
+        thread_messages = [message for message in conversation["messages"] if "thread_messages" in message]
+        assert len({message["thread_ts"] for message in thread_messages}) == len(thread_messages)
+        for message in thread_messages:
+            assert message["timestamp"] not in [reply["timestamp"] for reply in message["thread_messages"]]
+            assert all("user_full_name" in reply for reply in message["thread_messages"])
@@ -0,0 +1,133 @@
+from types import SimpleNamespace
+
+import pytest
+
+
+class FakeClock:
+    """ Wall clock moved by the tests"""
+
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture()
+def clock(fake_environment, monkeypatch):
+    from tools.slack import get_users
+    clock = FakeClock()
+    monkeypatch.setattr(get_users, "time", SimpleNamespace(time=clock.time))
+    return clock
+
+
+@pytest.fixture()
+def users_directory(clock, monkeypatch):
+    """ The users directory singleton with an empty state, restored after the test"""
+
+    from tools.slack.get_users import SlackGetUsers
+    users_directory = SlackGetUsers()
+    monkeypatch.setattr(users_directory, "users_cache", {})
+    monkeypatch.setattr(users_directory, "users_fetched", False)
+    monkeypatch.setattr(users_directory, "loaded_at", 0.0)
+    monkeypatch.setattr(users_directory, "load_retry_at", 0.0)
+    monkeypatch.setattr(users_directory, "not_found_ids", {})
+    return users_directory
+
+
+@pytest.fixture()
+def slack_calls():
+    from benchmarks.fakes.slack import FakeWebClient
+    FakeWebClient.calls.clear()
+    return FakeWebClient.calls
+
+
+def _slack_error(error):
+    from slack_sdk.errors import SlackApiError
+    return SlackApiError(error, {"ok": False, "error": error})
+
+
+def _fail_users_list(monkeypatch):
+    from benchmarks.fakes.slack import FakeWebClient
+
+    def users_list(self, **kwargs):
+        raise _slack_error("ratelimited")
+
+    monkeypatch.setattr(FakeWebClient, "users_list", users_list)
+
+
+def test_directory_is_loaded_once_with_every_page(users_directory, slack_calls, monkeypatch):
+    from core.settings import Settings
+    monkeypatch.setattr(Settings, "SLACK_USERS_PAGE_SIZE", 20)
+
+    assert users_directory.get_user_info("U00001")["full_name"] == "User 1"
+    assert users_directory.get_user_info("U00049")["full_name"] == "User 49"
+    assert slack_calls["users.list"] == 3
+    assert users_directory.stats()["users"] == 50
+
+
+def test_directory_is_loaded_again_when_its_ttl_expires(users_directory, slack_calls, clock):
+    from core.settings import settings
+    users_directory.get_user_info("U00001")
+
+    clock.now += settings.SLACK_USERS_CACHE_TTL_SECONDS + 1
+    users_directory.get_user_info("U00001")
+
+    assert slack_calls["users.list"] == 2
+
+
+def test_failed_load_keeps_the_directory_and_is_retried(users_directory, slack_calls, clock, monkeypatch):
+    from core.settings import settings
+    from tools.slack.get_users import USERS_LOAD_RETRY_SECONDS
+    users_directory.get_user_info("U00001")
+    loaded_at = users_directory.loaded_at
+
+    clock.now += settings.SLACK_USERS_CACHE_TTL_SECONDS + 1
+    with monkeypatch.context() as failing:
+        _fail_users_list(failing)
+        assert users_directory.get_user_info("U00001")["full_name"] == "User 1"
+        assert users_directory.get_user_info("U00002")["full_name"] == "User 2"
+
+    assert users_directory.loaded_at == loaded_at
+    assert users_directory.stats()["users"] == 50
+
+    clock.now += USERS_LOAD_RETRY_SECONDS
+    users_directory.get_user_info("U00001")
+
+    assert users_directory.loaded_at == clock.now
+    assert slack_calls["users.list"] == 2
+
+
+def test_failed_first_load_is_not_marked_as_loaded(users_directory, slack_calls, monkeypatch):
+    _fail_users_list(monkeypatch)
+
+    user_info = users_directory.get_user_info("U00003")
+
+    assert user_info["full_name"] == "User 3"
+    assert users_directory.users_fetched is False
+    assert users_directory.export_state() is None
+    assert slack_calls["users.info"] == 1
+
+
+def test_unknown_users_are_not_looked_up_again(users_directory, slack_calls):
+    users_directory.resolve_users(["U99999", "U99999", None])
+    users_directory.resolve_users(["U99999"])
+
+    assert users_directory.get_user_info("U99999")["full_name"] == "Unknown User"
+    assert slack_calls["users.info"] == 1
+
+
+def test_users_info_errors_are_not_cached_as_unknown_users(users_directory, slack_calls, monkeypatch):
+    from benchmarks.fakes.slack import FakeWebClient
+    users_directory.get_user_info("U00001")
+
+    def users_info(self, **kwargs):
+        raise _slack_error("internal_error")
+
+    with monkeypatch.context() as failing:
+        failing.setattr(FakeWebClient, "users_info", users_info)
+        users_directory.resolve_users(["U99999"])
+
+    assert "U99999" not in users_directory.not_found_ids
+    users_directory.resolve_users(["U99999"])
+    assert "U99999" in users_directory.not_found_ids
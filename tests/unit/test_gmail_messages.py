@@ -0,0 +1,79 @@
+import base64
+import json
+
+import pytest
+
+
+@pytest.fixture()
+def messages_fetcher(fake_environment):
+    from tools.gmail_messages import GmailMessagesFetcher
+    return GmailMessagesFetcher(api_resource=None, body_max_chars=20)
+
+
+def _raw_message(raw_email: bytes, message_id: str = "1") -> dict:
+    return {"id": message_id, "threadId": "t1", "labelIds": ["INBOX"], "raw": base64.urlsafe_b64encode(raw_email).decode("ascii")}
+
+
+def test_encoded_headers_are_decoded(messages_fetcher):
+    raw_email = (
+        b"From: =?utf-8?q?Jos=C3=A9_P=C3=A9rez?= <jose@example.com>\r\n"
+        b"To: Ana <ana@example.com>\r\n"
+        b"Subject: =?utf-8?b?UmV1bmnDs24gZGUgcGxhbmlmaWNhY2nDs24=?=\r\n"
+        b"Date: Tue, 03 Dec 2024 10:00:00 +0000\r\n"
+        b"Content-Type: text/plain; charset=utf-8\r\n\r\n"
+        b"Hola equipo, nos vemos a las 10"
+    )
+
+    digest = messages_fetcher._build_digest(_raw_message(raw_email))
+
+    assert digest["sender"] == "José Pérez <jose@example.com>"
+    assert digest["subject"] == "Reunión de planificación"
+    assert digest["cc"] is None
+    assert digest["body"] == "Hola equipo, nos vem"
+    assert digest["is_truncated"] is True
+
+
+def test_raw_non_ascii_headers_are_serializable(messages_fetcher):
+    raw_email = (
+        "From: José <jose@example.com>\r\n"
+        "Subject: Revisión del presupuesto\r\n"
+        "Content-Type: text/plain; charset=utf-8\r\n\r\n"
+        "Presupuesto"
+    ).encode("utf-8")
+
+    digest = messages_fetcher._build_digest(_raw_message(raw_email))
+
+    assert all(value is None or isinstance(value, str) for key, value in digest.items() if key in ("sender", "subject", "date"))
+    assert "Revisi" in json.loads(json.dumps(digest, ensure_ascii=False))["subject"]
+
+
+def test_plain_text_body_is_preferred_over_html(messages_fetcher):
+    raw_email = (
+        b"From: ana@example.com\r\n"
+        b"Content-Type: multipart/alternative; boundary=part\r\n\r\n"
+        b"--part\r\nContent-Type: text/html\r\n\r\n<p>Html body</p>\r\n"
+        b"--part\r\nContent-Type: text/plain\r\n\r\nPlain body\r\n"
+        b"--part--\r\n"
+    )
+
+    digest = messages_fetcher._build_digest(_raw_message(raw_email))
+
+    assert digest["body"] == "Plain body"
+
+
+def test_malformed_messages_are_skipped(messages_fetcher, monkeypatch):
+    valid_email = b"From: ana@example.com\r\nSubject: Plan\r\nContent-Type: text/plain\r\n\r\nPlan of the week"
+    unknown_charset_email = b"From: ana@example.com\r\nContent-Type: text/plain; charset=x-unknown\r\n\r\nBody"
+    messages = [
+        _raw_message(valid_email, "1"),
+        _raw_message(unknown_charset_email, "2"),
+        {"id": "3", "raw": "not base64!"},
+        {"id": "4"},
+        _raw_message(valid_email, "5")
+    ]
+    monkeypatch.setattr(messages_fetcher, "_list_message_ids", lambda query: [message["id"] for message in messages])
+    monkeypatch.setattr(messages_fetcher, "_get_messages", lambda message_ids: messages)
+
+    digests = messages_fetcher.get_day_messages("2024-12-02", "2024-12-04")
+
+    assert [digest["id"] for digest in digests] == ["1", "5"]
@@ -0,0 +1,37 @@
+import threading
+
+import pytest
+
+
+@pytest.fixture()
+def request_builder(fake_environment):
+    from google.oauth2.credentials import Credentials
+    from tools.gmail_tool import ThreadLocalHttpRequestBuilder
+    return ThreadLocalHttpRequestBuilder(Credentials(token="token"))
+
+
+def _build_request(request_builder):
+    return request_builder(None, None, "https://gmail.googleapis.com/gmail/v1/users/me/messages", method="GET")
+
+
+def test_requests_of_a_thread_share_its_http_client(request_builder):
+    first_request = _build_request(request_builder)
+    second_request = _build_request(request_builder)
+
+    assert first_request.http is second_request.http
+    assert first_request.http.credentials is request_builder.credentials
+
+
+def test_each_thread_sends_its_requests_with_its_own_http_client(request_builder):
+    https = []
+
+    def send_request():
+        https.append(_build_request(request_builder).http)
+
+    threads = [threading.Thread(target=send_request) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(http) for http in https}) == 4
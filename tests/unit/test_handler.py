@@ -1,8 +1,15 @@
+import importlib
 import json
+from datetime import datetime, timezone
 
 import pytest
 
-from hello_world import app
+
+@pytest.fixture(scope="module")
+def app(fake_environment):
+    """ The app imported with the local stand-ins"""
+
+    return importlib.import_module("app")
 
 
 @pytest.fixture()
@@ -10,7 +17,7 @@ def apigw_event():
     """ Generates API GW Event"""
 
     return {
-        "body": '{ "test": "body"}',
+        "body": '{ "day": "2024-12-03", "force": true, "debug": true }',
         "resource": "/{proxy+}",
         "requestContext": {
             "resourceId": "123456",
@@ -62,11 +69,58 @@ def apigw_event():
     }
 
 
-def test_lambda_handler(apigw_event):
+def test_lambda_handler(app, apigw_event):
 
     ret = app.lambda_handler(apigw_event, "")
     data = json.loads(ret["body"])
 
     assert ret["statusCode"] == 200
-    assert "message" in ret["body"]
-    assert data["message"] == "hello world"
+    assert data["date"] == "2024-12-03"
+    assert data["partial_failures"] == {}
+    assert data["summary_result"]["general_summary_result"]["summary_result"]["daily_summary"]
+    assert data["summary_result"]["general_summary_result"]["usage"]["total"]["total_tokens"] > 0
+    assert "stage:sinks" in data["metrics"]
+
+
+def test_lambda_handler_batch_of_users(app):
+    ret = app.lambda_handler({
+        "day": "2024-12-05",
+        "force": True,
+        "users": [{"slack_member_id": "U00000"}, {"slack_member_id": "U00002", "notification_channel": "#user-2"}]
+    }, "")
+    data = json.loads(ret["body"])
+
+    assert ret["statusCode"] == 200
+    assert [(user["user_id"], user["status"]) for user in data["users"]] == [("U00000", "completed"), ("U00002", "completed")]
+
+
+def test_lambda_handler_rejects_users_without_member_id(app):
+    ret = app.lambda_handler({"day": "2024-12-05", "users": [{"slack_member_id": "U00000"}, {"slack_user_full_name": "User 2"}]}, "")
+
+    assert ret["statusCode"] == 400
+
+
+def test_lambda_handler_usage_of_a_month(app):
+    app.lambda_handler({"day": "2024-12-06", "force": True}, "")
+
+    ret = app.lambda_handler({"usage_period": datetime.now(timezone.utc).strftime("%Y-%m")}, "")
+    data = json.loads(ret["body"])
+
+    assert ret["statusCode"] == 200
+    assert data["usage"]["runs"] >= 1
+    assert data["usage"]["total"]["total_tokens"] > 0
+
+
+def test_lambda_handler_usage_of_an_invalid_period(app):
+    ret = app.lambda_handler({"usage_period": "2024-13"}, "")
+
+    assert ret["statusCode"] == 400
+
+
+def test_lambda_handler_usage_without_usage_table(app, monkeypatch):
+    monkeypatch.setattr(app.summarizer_service, "usage_service", None)
+
+    ret = app.lambda_handler({"usage_period": "2024-12"}, "")
+
+    assert ret["statusCode"] == 501
+    assert json.loads(ret["body"])["error"] == "Tabla de uso no configurada"
@@ -0,0 +1,77 @@
+import pytest
+
+
+@pytest.fixture()
+def store(fake_environment, tmp_path):
+    from core.kv_store import SQLiteKeyValueStore
+    return SQLiteKeyValueStore(str(tmp_path / "cache" / "llm_cache.sqlite3"), max_entries=3, table="llm_responses")
+
+
+def _chat_generations(content):
+    from langchain_core.messages import AIMessage
+    from langchain_core.outputs import ChatGeneration
+
+    message = AIMessage(
+        content=content,
+        usage_metadata={"input_tokens": 100, "output_tokens": 20, "total_tokens": 120},
+        response_metadata={"token_usage": {"total_tokens": 120}, "model_name": "gpt-4o-mini"}
+    )
+    return [ChatGeneration(message=message)]
+
+
+def test_store_entries_expire(store):
+    store.set("fresh", "value", ttl_seconds=60)
+    store.set("expired", "value", ttl_seconds=-1)
+
+    assert store.get("fresh") == "value"
+    assert store.get("expired") is None
+    assert store.get("missing") is None
+
+
+def test_store_evicts_the_least_recently_used_entries(store):
+    for key in ("a", "b", "c"):
+        store.set(key, key, ttl_seconds=60)
+    store.get("a")
+
+    store.set("d", "d", ttl_seconds=60)
+
+    assert len(store) == 3
+    assert store.get("b") is None
+    assert [store.get(key) for key in ("a", "c", "d")] == ["a", "c", "d"]
+
+
+def test_cached_responses_have_no_token_usage(fake_environment):
+    from core.llm_cache import TieredLLMCache
+    cache = TieredLLMCache()
+
+    cache.update("prompt", "gpt-4o-mini", _chat_generations("summary"))
+    cached_generation = cache.lookup("prompt", "gpt-4o-mini")[0]
+
+    assert cached_generation.message.content == "summary"
+    assert cached_generation.message.usage_metadata is None
+    assert "token_usage" not in cached_generation.message.response_metadata
+    assert cache.lookup("prompt", "gpt-4o") is None
+    assert cache.stats() == {"memory_hits": 1, "persistent_hits": 0, "misses": 1, "updates": 1, "memory_entries": 1}
+
+
+def test_persistent_tier_answers_a_new_container(store):
+    from core.llm_cache import TieredLLMCache
+    TieredLLMCache(store=store).update("prompt", "gpt-4o-mini", _chat_generations("summary"))
+
+    new_container_cache = TieredLLMCache(store=store)
+
+    assert new_container_cache.lookup("prompt", "gpt-4o-mini")[0].message.content == "summary"
+    assert new_container_cache.lookup("prompt", "gpt-4o-mini")[0].message.content == "summary"
+    assert new_container_cache.stats()["persistent_hits"] == 1
+    assert new_container_cache.stats()["memory_hits"] == 1
+
+
+def test_memory_tier_keeps_the_most_recent_entries(fake_environment):
+    from core.llm_cache import TieredLLMCache
+    cache = TieredLLMCache(max_memory_entries=2)
+
+    for prompt in ("first", "second", "third"):
+        cache.update(prompt, "gpt-4o-mini", _chat_generations(prompt))
+
+    assert cache.lookup("first", "gpt-4o-mini") is None
+    assert cache.lookup("third", "gpt-4o-mini")[0].message.content == "third"
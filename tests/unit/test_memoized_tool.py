@@ -0,0 +1,76 @@
+from typing import Optional
+
+import pytest
+
+
+@pytest.fixture()
+def lookup_tool(fake_environment):
+    from langchain_core.tools import BaseTool, ToolException
+
+    class LookupTool(BaseTool):
+        """ Read-only tool that fails on the calls listed in failures"""
+
+        name: str = "lookup"
+        description: str = "Look up a term"
+        handle_tool_error: bool = True
+        calls: list = []
+        failures: list = []
+
+        def _run(self, query: str, limit: Optional[int] = None) -> str:
+            self.calls.append(query)
+            failure = self.failures.pop(0) if self.failures else None
+            if failure == "raise":
+                raise ToolException("lookup not available")
+            if failure == "message":
+                return "Error getting the term: lookup not available"
+            return f"definition of {query}"
+
+    return LookupTool(calls=[], failures=[])
+
+
+def test_repeated_calls_of_a_run_are_answered_from_the_cache(lookup_tool):
+    from tools import MemoizedTool, tool_run_scope
+    memoized_tool = MemoizedTool(lookup_tool)
+
+    with tool_run_scope() as cache:
+        results = [
+            memoized_tool.run({"query": "sprint"}),
+            memoized_tool.run({"query": "  sprint "}),
+            memoized_tool.run({"query": "sprint", "limit": None}),
+            memoized_tool.run({"query": "backlog"})
+        ]
+
+    assert results == ["definition of sprint"] * 3 + ["definition of backlog"]
+    assert lookup_tool.calls == ["sprint", "backlog"]
+    assert cache.hits == 2
+
+
+def test_runs_do_not_share_results(lookup_tool):
+    from tools import MemoizedTool, tool_run_scope
+    memoized_tool = MemoizedTool(lookup_tool)
+
+    with tool_run_scope():
+        memoized_tool.run({"query": "sprint"})
+    with tool_run_scope():
+        memoized_tool.run({"query": "sprint"})
+    memoized_tool.run({"query": "sprint"})
+
+    assert lookup_tool.calls == ["sprint"] * 3
+
+
+def test_failed_calls_are_not_cached(lookup_tool):
+    from tools import MemoizedTool, tool_run_scope
+    memoized_tool = MemoizedTool(lookup_tool)
+    lookup_tool.failures.extend(["raise", "message"])
+
+    with tool_run_scope() as cache:
+        results = [memoized_tool.run({"query": "sprint"}) for _ in range(4)]
+
+    assert results == [
+        "lookup not available",
+        "Error getting the term: lookup not available",
+        "definition of sprint",
+        "definition of sprint"
+    ]
+    assert len(lookup_tool.calls) == 3
+    assert cache.hits == 1
@@ -0,0 +1,69 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+
+
+@pytest.fixture()
+def metrics(fake_environment):
+    from core import metrics
+    return metrics
+
+
+def test_stages_are_aggregated_in_the_invocation_scope(metrics):
+    @metrics.timed_stage("unit:stage")
+    def stage(value):
+        return {"value": value}
+
+    @metrics.timed_stage("unit:async_stage")
+    async def async_stage():
+        raise RuntimeError("stage failed")
+
+    with metrics.metrics_scope() as recorder:
+        stage("a")
+        stage("b")
+        with pytest.raises(RuntimeError):
+            asyncio.run(async_stage())
+
+    summary = recorder.summary()
+    assert summary["unit:stage"]["calls"] == 2
+    assert summary["unit:stage"]["payload_bytes"] == 2 * len(json.dumps({"value": "a"}))
+    assert summary["unit:stage"]["errors"] == 0
+    assert (summary["unit:async_stage"]["calls"], summary["unit:async_stage"]["errors"]) == (1, 1)
+    assert metrics.get_metrics() is None
+
+
+def test_llm_and_tool_calls_are_attributed_to_the_current_stage(metrics):
+    handler = metrics.MetricsCallbackHandler()
+    llm_run_id, tool_run_id = uuid.uuid4(), uuid.uuid4()
+
+    with metrics.metrics_scope() as recorder:
+        with metrics.measure_stage("stage:general"):
+            handler.on_chat_model_start({}, [], run_id=llm_run_id, invocation_params={"model_name": "gpt-4o-mini"})
+            handler.on_llm_error(RuntimeError("timeout"), run_id=llm_run_id)
+            handler.on_tool_start({"name": "web_search"}, "query", run_id=tool_run_id)
+            handler.on_tool_end("result", run_id=tool_run_id)
+
+    summary = recorder.summary()
+    assert (summary["stage:general"]["llm_calls"], summary["stage:general"]["tool_calls"]) == (1, 1)
+    assert summary["llm:gpt-4o-mini"]["errors"] == 1
+    assert summary["tool:web_search"]["payload_bytes"] == len("result")
+
+
+def test_emf_lines_are_only_written_when_enabled(metrics, monkeypatch, capsys):
+    from core.settings import Settings
+
+    metrics.record_stage("unit:disabled", wall_ms=1.0)
+    assert capsys.readouterr().out == ""
+
+    monkeypatch.setattr(Settings, "METRICS_ENABLED", True)
+    metrics.record_stage("unit:enabled", wall_ms=12.345, payload_bytes=10)
+    emf_line = json.loads(capsys.readouterr().out)
+
+    assert emf_line["Stage"] == "unit:enabled"
+    assert emf_line["WallTime"] == 12.35
+    assert emf_line["_aws"]["CloudWatchMetrics"][0]["Dimensions"] == [["Stage"]]
+    assert {metric["Name"] for metric in emf_line["_aws"]["CloudWatchMetrics"][0]["Metrics"]} == {
+        "WallTime", "Calls", "LLMCalls", "ToolCalls", "PayloadBytes", "Errors"
+    }
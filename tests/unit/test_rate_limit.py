@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+
+import pytest
+
+
+class FakeClock:
+    """ Monotonic clock that only moves when the limiter sleeps"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture()
+def clock(fake_environment, monkeypatch):
+    from tools.slack import rate_limit
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(monotonic=clock.monotonic, sleep=clock.sleep))
+    return clock
+
+
+def test_requests_of_a_minute_are_not_delayed(clock):
+    from tools.slack.rate_limit import SlackRateLimiter
+    limiter = SlackRateLimiter(enabled=True)
+
+    for _ in range(SlackRateLimiter.get_requests_per_minute("conversations.history")):
+        limiter.acquire("conversations.history")
+
+    assert clock.sleeps == []
+
+
+def test_requests_over_the_tier_wait_for_the_refill(clock):
+    from tools.slack.rate_limit import SlackRateLimiter
+    limiter = SlackRateLimiter(enabled=True)
+
+    for _ in range(20 + 2):
+        limiter.acquire("users.list")
+
+    # Tier 2 refills 20 requests per minute, one request every 3 seconds
+    assert sum(clock.sleeps) == pytest.approx(6.0)
+
+
+def test_methods_have_their_own_bucket(clock):
+    from tools.slack.rate_limit import SlackRateLimiter
+    limiter = SlackRateLimiter(enabled=True)
+
+    for _ in range(20):
+        limiter.acquire("users.list")
+    limiter.acquire("users.info")
+    limiter.acquire("conversations.replies")
+
+    assert clock.sleeps == []
+
+
+def test_disabled_limiter_never_waits(clock):
+    from tools.slack.rate_limit import SlackRateLimiter
+    limiter = SlackRateLimiter(enabled=False)
+
+    for _ in range(100):
+        limiter.acquire("search.messages")
+
+    assert clock.sleeps == []
+
+
+def test_unknown_methods_are_limited_as_tier_3(fake_environment):
+    from tools.slack.rate_limit import SlackRateLimiter
+
+    assert SlackRateLimiter.get_requests_per_minute("reactions.get") == 50
+    assert SlackRateLimiter.get_requests_per_minute("users.info") == 100
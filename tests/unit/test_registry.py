@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_components_are_created_once_on_first_use(fake_environment):
+    from core.registry import LazyRegistry
+
+    registry = LazyRegistry()
+    created = []
+
+    def factory():
+        time.sleep(0.01)
+        created.append(object())
+        return created[-1]
+
+    registry.register("client", factory)
+    assert not registry.is_initialized("client")
+
+    components = []
+    threads = [threading.Thread(target=lambda: components.append(registry.get("client"))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(created) == 1
+    assert all(component is created[0] for component in components)
+
+    registry.reset("client")
+    assert registry.get("client") is created[1]
+
+
+def test_unregistered_components_raise(fake_environment):
+    import pytest
+    from core.registry import LazyRegistry
+
+    with pytest.raises(KeyError):
+        LazyRegistry().get("missing")
+
+
+def test_agent_llm_and_response_cache_are_not_created_at_import():
+    code = (
+        "from benchmarks.harness import BenchmarkConfig, install_fakes\n"
+        "install_fakes(BenchmarkConfig(llm_latency_ms=0, api_latency_ms=0))\n"
+        "import app\n"
+        "from core.llm_cache import get_llm_cache\n"
+        "from core.registry import registry\n"
+        "assert not registry.is_initialized('agent_llm')\n"
+        "assert get_llm_cache.cache_info().currsize == 0\n"
+        "app.summarizer_service.tag_extractor.catalogue_chain\n"
+        "assert registry.is_initialized('agent_llm')\n"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, check=True)
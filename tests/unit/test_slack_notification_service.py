@@ -0,0 +1,122 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+
+class RecordingNotificationService:
+    """ Notification service that records the posted and updated texts"""
+
+    def __init__(self, post_fails: bool = False):
+        self.post_fails = post_fails
+        self.posted = []
+        self.updated = []
+
+    def post_message(self, message, channel="#daily-bot"):
+        if self.post_fails:
+            return None
+        self.posted.append(message)
+        return {"channel": "C00001", "ts": "1700000000.000100"}
+
+    def update_message(self, message, channel, ts):
+        self.updated.append(message)
+        return True
+
+
+class FakeClock:
+    """ Monotonic clock moved by the tests"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture()
+def clock(fake_environment, monkeypatch):
+    from services import slack_notification_service
+    clock = FakeClock()
+    monkeypatch.setattr(slack_notification_service, "time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+@pytest.fixture()
+def notification_service():
+    return RecordingNotificationService()
+
+
+def _streaming_message(notification_service, update_interval_seconds=1.5):
+    from services.slack_notification_service import StreamingSlackMessage
+    return StreamingSlackMessage(notification_service, update_interval_seconds=update_interval_seconds).start()
+
+
+def test_partial_texts_are_pushed_at_most_once_per_interval(clock, notification_service):
+    streaming_message = _streaming_message(notification_service)
+
+    streaming_message.update("Hoy")
+    clock.now += 0.5
+    streaming_message.update("Hoy se revisó")
+    clock.now += 1.5
+    streaming_message.update("Hoy se revisó el proyecto")
+    final_pushed = streaming_message.finalize("Hoy se revisó el proyecto 1")
+
+    assert notification_service.posted == ["Generando el resumen del día..."]
+    assert notification_service.updated == ["Hoy", "Hoy se revisó el proyecto", "Hoy se revisó el proyecto 1"]
+    assert final_pushed is True
+
+
+def test_message_is_not_streamed_when_the_placeholder_is_not_posted(clock):
+    streaming_message = _streaming_message(RecordingNotificationService(post_fails=True))
+
+    streaming_message.update("Hoy")
+
+    assert streaming_message.is_update_due() is False
+    assert streaming_message.finalize("Hoy se revisó el proyecto 1") is False
+
+
+def test_callback_pushes_the_summary_field_of_the_partial_json(clock, notification_service):
+    from services.slack_notification_service import SlackStreamingCallbackHandler
+    streaming_message = _streaming_message(notification_service)
+    callback = SlackStreamingCallbackHandler(streaming_message)
+    run_id = uuid.uuid4()
+
+    callback.on_chat_model_start({}, [], run_id=run_id)
+    for token in ['{"daily_', 'summary": "Hoy', ' se revisó', ' el proyecto', '", "key_points": []}']:
+        clock.now += 1.0
+        callback.on_llm_new_token(token, run_id=run_id)
+    callback.on_llm_end(None, run_id=run_id)
+
+    assert notification_service.updated == ["Hoy se revisó", "Hoy se revisó el proyecto"]
+    assert callback._tokens == {}
+
+
+def test_callback_does_not_parse_the_tokens_within_the_interval(clock, notification_service, monkeypatch):
+    from services import slack_notification_service
+    streaming_message = _streaming_message(notification_service)
+    callback = slack_notification_service.SlackStreamingCallbackHandler(streaming_message)
+    parsed_texts = []
+    monkeypatch.setattr(slack_notification_service, "parse_json_markdown", lambda text: parsed_texts.append(text) or {"daily_summary": text})
+    run_id = uuid.uuid4()
+
+    clock.now += 2.0
+    for token in ["a", "b", "c", "d"]:
+        callback.on_llm_new_token(token, run_id=run_id)
+    clock.now += 2.0
+    callback.on_llm_new_token("e", run_id=run_id)
+
+    assert parsed_texts == ["a", "abcde"]
+
+
+def test_summary_finalizes_the_streaming_message_instead_of_sending_a_new_one(clock, notification_service):
+    from services.summarizer_service import SummarizerService
+    from benchmarks.fakes.slack import FakeWebClient
+    summarizer_service = SummarizerService()
+    streaming_message = _streaming_message(notification_service)
+    FakeWebClient.calls.clear()
+
+    summarizer_service._send_summary_notification("Resumen final", streaming_message=streaming_message)
+    summarizer_service._send_summary_notification("Resumen final", streaming_message=_streaming_message(RecordingNotificationService(post_fails=True)))
+
+    assert notification_service.updated == ["Resumen final"]
+    assert FakeWebClient.calls["chat.postMessage"] == 1
@@ -0,0 +1,111 @@
+import pytest
+
+DAY = "2024-12-03"
+PREVIOUS_DAY = "2024-12-02"
+NEXT_DAY = "2024-12-04"
+
+
+@pytest.fixture()
+def direct_agent(fake_environment):
+    from agents import SlackSummarizerAgent
+    return SlackSummarizerAgent(direct_mode=True)
+
+
+def test_direct_mode_summarizes_the_fetched_conversations_in_one_llm_call(direct_agent, fake_environment):
+    from core.user_profile import get_default_user_profile
+    conversations = direct_agent.conversations_tool.get_day_conversations(DAY, get_default_user_profile().slack_member_id)
+    llm_calls = fake_environment.model.calls
+
+    result = direct_agent.execute_agent(DAY, PREVIOUS_DAY, NEXT_DAY)
+
+    assert fake_environment.model.calls - llm_calls == 1
+    assert result["summary_result"]["general_summary"] == "Slack activity of the day"
+    assert result["tool_usage"] == [{
+        "tool_name": "get_conversations",
+        "tool_input": {"day": DAY, "user_id": get_default_user_profile().slack_member_id},
+        "tool_output": conversations
+    }]
+
+
+def test_agent_mode_fetches_the_conversations_with_its_tools(fake_environment):
+    from agents import SlackSummarizerAgent
+    agent = SlackSummarizerAgent(direct_mode=False)
+    llm_calls = fake_environment.model.calls
+
+    result = agent.execute_agent(DAY, PREVIOUS_DAY, NEXT_DAY)
+
+    assert fake_environment.model.calls - llm_calls == 2
+    assert [tool_usage["tool_name"] for tool_usage in result["tool_usage"]] == ["get_conversations"]
+
+
+def test_direct_mode_fetch_errors_fail_the_stage(direct_agent, monkeypatch):
+    from tools.slack.get_conversations import SlackGetConversations
+
+    def failing_fetch(self, day, user_id):
+        raise RuntimeError("slack not available")
+
+    monkeypatch.setattr(SlackGetConversations, "get_day_conversations", failing_fetch)
+
+    with pytest.raises(RuntimeError):
+        direct_agent.execute_agent(DAY, PREVIOUS_DAY, NEXT_DAY)
+
+
+@pytest.fixture()
+def map_reduce_settings(monkeypatch):
+    """ Thresholds low enough to split the conversations of the test workspace"""
+
+    from core.settings import Settings
+    monkeypatch.setattr(Settings, "SLACK_MAP_REDUCE_MIN_TOKENS", 1)
+    monkeypatch.setattr(Settings, "SLACK_MAP_CHUNK_TOKENS", 300)
+
+
+def _day_conversations(direct_agent):
+    from core.user_profile import get_default_user_profile
+    return direct_agent.conversations_tool.get_day_conversations(DAY, get_default_user_profile().slack_member_id)
+
+
+def test_conversations_under_the_threshold_are_one_chunk(direct_agent):
+    conversations = _day_conversations(direct_agent)
+
+    assert direct_agent._split_conversations(conversations) == [conversations]
+
+
+def test_conversations_are_split_in_chunks_of_whole_messages(direct_agent, map_reduce_settings):
+    from core.token_budget import get_token_budgeter
+    conversations = _day_conversations(direct_agent)
+    headers = {channel["channel_id"]: {key: value for key, value in channel.items() if key != "messages"} for channel in conversations}
+
+    chunks = direct_agent._split_conversations(conversations)
+
+    chunked_messages = {}
+    for chunk in chunks:
+        chunk_messages = [message for channel in chunk for message in channel["messages"]]
+        assert len(chunk_messages) == 1 or sum(get_token_budgeter().count(message) for message in chunk_messages) <= 300
+        for channel in chunk:
+            assert {key: value for key, value in channel.items() if key != "messages"} == headers[channel["channel_id"]]
+            chunked_messages.setdefault(channel["channel_id"], []).extend(channel["messages"])
+    assert len(chunks) > 1
+    assert chunked_messages == {channel["channel_id"]: channel["messages"] for channel in conversations}
+
+
+def test_evidences_are_merged_by_relevance(direct_agent):
+    evidences = direct_agent._merge_evidences([
+        {"summary_evidences": [{"text": "a", "relevance_score": 0.2}, {"text": "b", "relevance_score": "high"}]},
+        {"summary_evidences": [{"text": "c", "relevance_score": 0.9}, "not an evidence"]},
+        {}
+    ])
+
+    assert [evidence["text"] for evidence in evidences] == ["c", "a", "b"]
+
+
+def test_high_volume_days_are_summarized_with_map_reduce(direct_agent, map_reduce_settings, fake_environment):
+    chunks = direct_agent._split_conversations(_day_conversations(direct_agent))
+    llm_calls = fake_environment.model.calls
+
+    result = direct_agent.execute_agent(DAY, PREVIOUS_DAY, NEXT_DAY)
+
+    assert fake_environment.model.calls - llm_calls == len(chunks) + 1
+    assert result["summary_result"]["general_detailed_summary"] == "Slack activity of the day"
+    assert result["summary_result"]["important_tasks"] == ["Follow up with User 1"]
+    assert result["summary_result"]["day"] == DAY
+    assert result["summary_result"]["summary_evidences"] == []
@@ -0,0 +1,219 @@
+import asyncio
+import threading
+
+import pytest
+
+PREVIOUS_DAY = "2024-12-02"
+NEXT_DAY = "2024-12-04"
+
+
+@pytest.fixture()
+def summarizer_service(fake_environment):
+    from services.checkpoint_service import InMemoryCheckpointStore
+    from services.summarizer_service import SummarizerService
+    return SummarizerService(checkpoint_store=InMemoryCheckpointStore())
+
+
+def _count_calls(monkeypatch, target, method_name):
+    """ Wraps a method of an object and counts its calls"""
+
+    calls = []
+    method = getattr(target, method_name)
+
+    def counted(*args, **kwargs):
+        calls.append(kwargs)
+        return method(*args, **kwargs)
+
+    monkeypatch.setattr(target, method_name, counted)
+    return calls
+
+
+def _fail_once(monkeypatch, target, method_name, error):
+    """ Makes the first call of a method raise the error"""
+
+    method = getattr(target, method_name)
+    state = {"failed": False}
+
+    def flaky(*args, **kwargs):
+        if not state["failed"]:
+            state["failed"] = True
+            raise error
+        return method(*args, **kwargs)
+
+    monkeypatch.setattr(target, method_name, flaky)
+
+
+def test_async_summarizer_executes_every_stage(summarizer_service):
+    result = asyncio.run(summarizer_service.aexecute_summarizer("2024-10-01", PREVIOUS_DAY, NEXT_DAY))
+
+    assert result["cache_hit"] is False
+    assert result["general_summary_result"]["summary_result"]["daily_summary"]
+    assert result["general_summary_result"]["tags"]
+    assert all(sink_result["success"] for sink_result in result["sinks_result"].values())
+
+
+def test_async_summaries_run_concurrently_in_one_event_loop(summarizer_service):
+    days = ["2024-10-02", "2024-10-03", "2024-10-04"]
+
+    async def summarize_days():
+        return await asyncio.gather(*[
+            summarizer_service.aexecute_summarizer(day, PREVIOUS_DAY, NEXT_DAY) for day in days
+        ])
+
+    results = asyncio.run(summarize_days())
+
+    assert [result["general_summary_result"]["day"] for result in results] == days
+    assert all(result["general_summary_result"]["tags"] for result in results)
+
+
+def test_failed_run_resumes_from_the_first_incomplete_stage(summarizer_service, monkeypatch):
+    day = "2024-11-04"
+    gmail_calls = _count_calls(monkeypatch, summarizer_service.gmail_summarizer, "execute_agent")
+    slack_calls = _count_calls(monkeypatch, summarizer_service.slack_summarizer, "execute_agent")
+    general_calls = _count_calls(monkeypatch, summarizer_service.general_summarizer, "execute_agent")
+    _fail_once(monkeypatch, summarizer_service.tag_extractor, "execute_agent", RuntimeError("tags failed"))
+
+    with pytest.raises(RuntimeError):
+        summarizer_service.execute_summarizer(day, PREVIOUS_DAY, NEXT_DAY)
+    result = summarizer_service.execute_summarizer(day, PREVIOUS_DAY, NEXT_DAY)
+
+    assert result["cache_hit"] is False
+    assert result["general_summary_result"]["tags"]
+    assert (len(gmail_calls), len(slack_calls), len(general_calls)) == (1, 1, 1)
+
+
+def test_checkpoint_errors_do_not_fail_the_run(summarizer_service, monkeypatch):
+    def failing_save(run_key, stage, output):
+        raise RuntimeError("checkpoints table not available")
+
+    monkeypatch.setattr(summarizer_service.checkpoints, "save", failing_save)
+
+    result = summarizer_service.execute_summarizer("2024-11-06", PREVIOUS_DAY, NEXT_DAY)
+
+    assert all(sink_result["success"] for sink_result in result["sinks_result"].values())
+
+
+def test_backfill_skips_the_days_already_summarized(summarizer_service):
+    summarizer_service.execute_summarizer("2024-11-07", PREVIOUS_DAY, NEXT_DAY)
+
+    days_status = summarizer_service.backfill([
+        ("2024-11-07", PREVIOUS_DAY, NEXT_DAY),
+        ("2024-11-08", PREVIOUS_DAY, NEXT_DAY)
+    ], max_concurrency=2)
+
+    assert [(day_status["day"], day_status["status"]) for day_status in days_status] == [
+        ("2024-11-07", "skipped"),
+        ("2024-11-08", "completed")
+    ]
+
+
+def test_backfill_days_extract_their_tags_concurrently(summarizer_service, monkeypatch):
+    tags_stage = threading.Barrier(2, timeout=5)
+    execute_agent = summarizer_service.tag_extractor.execute_agent
+
+    def execute_together(*args, **kwargs):
+        # Both days must reach the tags stage before any of them goes on
+        tags_stage.wait()
+        return execute_agent(*args, **kwargs)
+
+    monkeypatch.setattr(summarizer_service.tag_extractor, "execute_agent", execute_together)
+
+    days_status = summarizer_service.backfill([
+        ("2024-11-09", PREVIOUS_DAY, NEXT_DAY),
+        ("2024-11-10", PREVIOUS_DAY, NEXT_DAY)
+    ], max_concurrency=2)
+
+    assert [day_status["status"] for day_status in days_status] == ["completed", "completed"]
+
+
+def test_batch_summarizes_each_user_with_its_own_profile(summarizer_service, monkeypatch):
+    from benchmarks.fakes.slack import FakeWebClient
+    from core.user_profile import UserProfile
+
+    day = "2024-11-11"
+    notified_channels = []
+    chat_post_message = FakeWebClient.chat_postMessage
+
+    def recorded_post_message(self, channel, **kwargs):
+        notified_channels.append(channel)
+        return chat_post_message(self, channel, **kwargs)
+
+    monkeypatch.setattr(FakeWebClient, "chat_postMessage", recorded_post_message)
+    user_profiles = [
+        UserProfile.from_dict({"slack_member_id": "U00000", "slack_user_full_name": "User 0", "notification_channel": "#user-0"}),
+        UserProfile.from_dict({"slack_member_id": "U00001", "slack_user_full_name": "User 1", "notification_channel": "#user-1"})
+    ]
+
+    users_status = summarizer_service.execute_batch_summarizer(user_profiles, day, PREVIOUS_DAY, NEXT_DAY, max_concurrency=2)
+
+    assert users_status == [
+        {"day": day, "user_id": "U00000", "status": "completed"},
+        {"day": day, "user_id": "U00001", "status": "completed"}
+    ]
+    assert sorted(notified_channels) == ["#user-0", "#user-1"]
+    assert summarizer_service.result_cache.get("U00001", day)["user_id"] == "U00001"
+    assert summarizer_service._get_run_key(day, user_profiles[0]) != summarizer_service._get_run_key(day, user_profiles[1])
+
+
+def _slack_messages_sent():
+    from benchmarks.fakes.slack import FakeWebClient
+    return FakeWebClient.calls["chat.postMessage"]
+
+
+def test_stored_summary_is_returned_without_executing_the_pipeline(summarizer_service, fake_environment):
+    day = "2024-11-01"
+    first_result = summarizer_service.execute_summarizer(day, PREVIOUS_DAY, NEXT_DAY)
+    llm_calls = fake_environment.model.calls
+
+    second_result = summarizer_service.execute_summarizer(day, PREVIOUS_DAY, NEXT_DAY)
+
+    assert first_result["cache_hit"] is False
+    assert second_result["cache_hit"] is True
+    assert second_result["general_summary_result"]["summary_result"] == first_result["general_summary_result"]["summary_result"]
+    assert fake_environment.model.calls == llm_calls
+
+
+def test_force_executes_every_stage_again(summarizer_service, fake_environment):
+    day = "2024-11-02"
+    summarizer_service.execute_summarizer(day, PREVIOUS_DAY, NEXT_DAY)
+    llm_calls = fake_environment.model.calls
+
+    result = summarizer_service.execute_summarizer(day, PREVIOUS_DAY, NEXT_DAY, force=True)
+
+    assert result["cache_hit"] is False
+    assert fake_environment.model.calls > llm_calls
+
+
+def test_stored_summary_of_another_pipeline_version_is_not_returned(summarizer_service):
+    from core.user_profile import get_default_user_profile
+    from services.summary_cache_service import SummaryResultCache
+
+    day = "2024-11-03"
+    user_id = get_default_user_profile().user_id
+    summarizer_service.execute_summarizer(day, PREVIOUS_DAY, NEXT_DAY)
+    other_version_cache = SummaryResultCache(summarizer_service.summaries_db, pipeline_version="other-version")
+
+    assert summarizer_service.result_cache.get(user_id, day) is not None
+    assert other_version_cache.build_key(user_id, day) != summarizer_service.result_cache.build_key(user_id, day)
+    assert other_version_cache.get(user_id, day) is None
+
+
+def test_failed_sink_is_retried_before_returning_the_stored_summary(summarizer_service, monkeypatch):
+    from core.user_profile import get_default_user_profile
+
+    day = "2024-11-05"
+    _fail_once(monkeypatch, summarizer_service.vector_store, "add_documents", RuntimeError("pinecone down"))
+    pinecone_calls = _count_calls(monkeypatch, summarizer_service.vector_store, "add_documents")
+
+    first_result = summarizer_service.execute_summarizer(day, PREVIOUS_DAY, NEXT_DAY)
+    slack_messages = _slack_messages_sent()
+    run_status = summarizer_service._execute_summarizer_with_status(day, PREVIOUS_DAY, NEXT_DAY, get_default_user_profile())
+    third_result = summarizer_service.execute_summarizer(day, PREVIOUS_DAY, NEXT_DAY)
+
+    assert first_result["sinks_result"]["pinecone"]["success"] is False
+    assert first_result["sinks_result"]["dynamo"]["success"] is True
+    assert run_status["status"] == "completed"
+    assert len(pinecone_calls) == 2
+    assert _slack_messages_sent() == slack_messages
+    assert third_result["cache_hit"] is True
+    assert len(pinecone_calls) == 2
@@ -0,0 +1,85 @@
+import uuid
+
+import pytest
+
+
+@pytest.fixture()
+def tags_db(fake_environment):
+    from services import DynamoDbService
+    return DynamoDbService(table_name=f"unit_tags_{uuid.uuid4().hex}")
+
+
+@pytest.fixture()
+def catalogue(tags_db):
+    from tools.summary_tags.tag_catalogue import TagCatalogue
+    tags_db.bulk_create([
+        {"name": "Proyecto Atlas", "type": "project", "related_projects": [], "related_people": [], "usage_count": 1},
+        {"name": "José Pérez", "type": "person", "related_projects": [], "related_people": [], "usage_count": 1}
+    ])
+    return TagCatalogue(dynamo_service=tags_db, ttl_seconds=300)
+
+
+def test_normalize_name_ignores_accents_case_and_punctuation(fake_environment):
+    from tools.summary_tags.tag_catalogue import TagCatalogue
+
+    assert TagCatalogue.normalize_name("  José  PÉREZ. ") == "jose perez"
+    assert TagCatalogue.normalize_name("proyecto-atlas") == TagCatalogue.normalize_name("Proyecto Atlas")
+
+
+def test_existing_tags_are_matched_and_only_the_new_ones_are_created(catalogue, tags_db):
+    result = catalogue.resolve([
+        {"name": "jose perez", "type": "person", "related_projects": ["Proyecto Atlas"]},
+        {"name": "PROYECTO ATLAS", "type": "area"},
+        {"name": "Nuevo Cliente", "type": "project"},
+        {"name": "nuevo cliente", "type": "project"},
+        {"name": ""}
+    ])
+
+    assert result["new_tags_created"] == ["Nuevo Cliente"]
+    assert [(tag["name"], tag["type"]) for tag in result["tags"]] == [
+        ("José Pérez", "person"),
+        ("Proyecto Atlas", "project"),
+        ("Nuevo Cliente", "project")
+    ]
+    assert result["tags"][0]["related_projects"] == ["Proyecto Atlas"]
+    assert len(tags_db.get_all(limit=500)["items"]) == 3
+
+
+def test_created_tags_are_matched_without_reloading_the_table(catalogue, tags_db):
+    catalogue.resolve([{"name": "Nuevo Cliente", "type": "project"}])
+    scans = tags_db.table.calls["Scan"]
+
+    result = catalogue.resolve([{"name": "nuevo  cliente", "type": "project"}])
+
+    assert result["new_tags_created"] == []
+    assert tags_db.table.calls["Scan"] == scans
+
+
+def test_catalogue_is_reloaded_when_its_ttl_expires(tags_db):
+    from tools.summary_tags.tag_catalogue import TagCatalogue
+    catalogue = TagCatalogue(dynamo_service=tags_db, ttl_seconds=-1)
+    catalogue.get_tags()
+    tags_db.bulk_create([{"name": "Otro Proyecto", "type": "project", "related_projects": [], "related_people": [], "usage_count": 1}])
+
+    assert [tag["name"] for tag in catalogue.get_tags()] == ["Otro Proyecto"]
+
+
+def test_catalogue_mode_extracts_the_tags_in_one_llm_call(catalogue, tags_db, fake_environment):
+    from agents import TagExtractorAgent
+    tag_extractor = TagExtractorAgent(catalogue=catalogue, catalogue_mode=True)
+    llm_calls = fake_environment.model.calls
+
+    first_result = tag_extractor.execute_agent(summary="Worked on project 1 with User 1")
+    second_result = tag_extractor.execute_agent(summary="Worked on project 1 with User 1")
+
+    assert fake_environment.model.calls - llm_calls == 2
+    assert [tag["name"] for tag in first_result["tags_result"]["tags"]] == ["Project 1", "User 1", "Development"]
+    assert first_result["tags_result"]["new_tags_created"] == ["Project 1", "User 1", "Development"]
+    assert second_result["tags_result"]["new_tags_created"] == []
+    assert len(tags_db.get_all(limit=500)["items"]) == 5
+
+
+def test_default_mode_is_the_tool_calling_agent(fake_environment):
+    from agents import TagExtractorAgent
+
+    assert TagExtractorAgent().catalogue_mode is False
@@ -0,0 +1,72 @@
+import asyncio
+import json
+from typing import Optional
+
+from langchain_core.callbacks import CallbackManagerForToolRun
+from langchain_core.tools import BaseTool
+
+
+class CountingSearchTool(BaseTool):
+    name: str = "web_search"
+    description: str = "Search the web"
+    output: str = json.dumps([{"title": "Lambda", "url": "https://example.com", "content": "x" * 50}])
+    calls: int = 0
+
+    def _run(self, query: str, run_manager: Optional[CallbackManagerForToolRun] = None) -> str:
+        self.calls += 1
+        return self.output
+
+
+def _glossary_tool(tmp_path, search_tool, snippet_max_chars=10):
+    from core.kv_store import SQLiteKeyValueStore
+    from tools.tavily_search_tool import GlossarySearchTool
+
+    store = SQLiteKeyValueStore(str(tmp_path / "web_search.sqlite3"), table="web_search_snippets")
+    return GlossarySearchTool(search_tool=search_tool, store=store, snippet_max_chars=snippet_max_chars)
+
+
+def test_glossary_snippets_are_cached_per_normalized_term(fake_environment, tmp_path):
+    search_tool = CountingSearchTool()
+    tool = _glossary_tool(tmp_path, search_tool)
+
+    first = tool.run({"query": "AWS  Lambda"})
+    second = tool.run({"query": "aws lambda"})
+
+    assert first == second
+    assert search_tool.calls == 1
+    assert json.loads(first) == [{"title": "Lambda", "url": "https://example.com", "content": "x" * 10}]
+
+
+def test_glossary_failed_searches_are_not_cached(fake_environment, tmp_path):
+    search_tool = CountingSearchTool(output="HTTPError('429 Too Many Requests')")
+    tool = _glossary_tool(tmp_path, search_tool)
+
+    assert tool.run({"query": "lambda"}) == "HTTPError('429 Too Many Requests')"
+    tool.run({"query": "lambda"})
+
+    assert search_tool.calls == 2
+
+
+def test_glossary_async_lookups_share_the_cache(fake_environment, tmp_path):
+    search_tool = CountingSearchTool()
+    tool = _glossary_tool(tmp_path, search_tool)
+
+    first = asyncio.run(tool.arun({"query": "Lambda"}))
+    second = tool.run({"query": "lambda"})
+
+    assert first == second
+    assert search_tool.calls == 1
+
+
+def test_web_search_defaults_to_the_advanced_search(fake_environment, monkeypatch):
+    from core.settings import Settings
+    from tools.tavily_search_tool import GlossarySearchTool, TavilySearch
+
+    monkeypatch.setattr(Settings, "TAVILY_API_KEY", "tavily-key")
+    assert not isinstance(TavilySearch().tool, GlossarySearchTool)
+
+    monkeypatch.setattr(Settings, "TAVILY_SEARCH_MODE", "glossary")
+    monkeypatch.setattr(Settings, "TAVILY_CACHE_PATH", "")
+    tool = TavilySearch().tool
+    assert isinstance(tool, GlossarySearchTool)
+    assert tool.store is None
@@ -0,0 +1,44 @@
+import pytest
+
+
+@pytest.fixture()
+def token_budgeter(fake_environment):
+    from core.token_budget import TokenBudgeter
+    return TokenBudgeter(budgets={"small": 200, "disabled": 0})
+
+
+def test_value_within_the_budget_is_returned_untouched(token_budgeter):
+    value = {"messages": ["short message"] * 3}
+
+    assert token_budgeter.fit("small", value) is value
+    assert token_budgeter.fit("disabled", {"messages": ["long message " * 200] * 20}) == {"messages": ["long message " * 200] * 20}
+    assert token_budgeter.fit("unknown", "text") == "text"
+
+
+def test_long_strings_are_shortened_first(token_budgeter):
+    value = {"messages": ["word " * 1000]}
+
+    fitted = token_budgeter.fit("small", value)
+
+    assert token_budgeter.count(fitted) <= 200
+    assert len(fitted["messages"]) == 1
+    assert fitted["messages"][0].endswith("...")
+    assert value == {"messages": ["word " * 1000]}
+
+
+def test_largest_list_items_are_dropped(token_budgeter):
+    value = {"channel": "general", "messages": [{"text": f"message {index} about the project"} for index in range(200)]}
+
+    fitted = token_budgeter.fit("small", value)
+
+    assert token_budgeter.count(fitted) <= 200
+    assert fitted["channel"] == "general"
+    assert 1 <= len(fitted["messages"]) < 200
+    assert fitted["messages"][0] == {"text": "message 0 about the project"}
+
+
+def test_text_is_cut_as_the_last_resort(token_budgeter):
+    fitted = token_budgeter.fit("small", "word " * 2000)
+
+    assert isinstance(fitted, str)
+    assert token_budgeter.count(fitted) <= 200
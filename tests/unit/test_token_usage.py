@@ -0,0 +1,60 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+
+@pytest.fixture()
+def token_usage(fake_environment):
+    from core import token_usage
+    return token_usage
+
+
+def test_cost_uses_the_longest_priced_prefix_of_the_model(token_usage):
+    assert token_usage.estimate_cost("gpt-4o-mini-2024-07-18", 1_000_000, 1_000_000) == pytest.approx(0.15 + 0.60)
+    assert token_usage.estimate_cost("gpt-4o-2024-08-06", 1_000_000) == pytest.approx(2.50)
+    assert token_usage.estimate_cost("unknown-model", 1_000_000, 1_000_000) == 0.0
+
+
+def test_llm_calls_are_accounted_by_agent_in_the_run_scope(token_usage):
+    from langchain_core.messages import AIMessage
+    from langchain_core.outputs import ChatGeneration, LLMResult
+
+    def llm_result(input_tokens, output_tokens):
+        message = AIMessage(content="ok", usage_metadata={"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens})
+        return LLMResult(generations=[[ChatGeneration(message=message)]], llm_output={"model_name": "gpt-4o-mini"})
+
+    with token_usage.usage_scope() as run_usage:
+        token_usage.TokenUsageCallbackHandler("slack_agent").on_llm_end(llm_result(1000, 200), run_id=uuid.uuid4())
+        token_usage.TokenUsageCallbackHandler("slack_agent").on_llm_end(llm_result(500, 100), run_id=uuid.uuid4())
+        token_usage.TokenUsageCallbackHandler("general_agent").on_llm_end(llm_result(2000, 400), run_id=uuid.uuid4())
+    token_usage.record_usage("outside_agent", "gpt-4o-mini", prompt_tokens=10)
+
+    summary = run_usage.summary()
+    assert summary["agents"]["slack_agent"] == {
+        "llm_calls": 2, "prompt_tokens": 1500, "completion_tokens": 300, "total_tokens": 1800,
+        "cost_usd": round(token_usage.estimate_cost("gpt-4o-mini", 1500, 300), 6)
+    }
+    assert summary["total"]["total_tokens"] == 1800 + 2400
+    assert "outside_agent" not in summary["agents"]
+
+
+def test_run_usage_is_added_to_the_daily_and_monthly_totals(fake_environment):
+    from services.usage_service import UsageService
+
+    usage_service = UsageService(table_name=f"unit_usage_{uuid.uuid4().hex}")
+    run_usage = {
+        "agents": {"slack_agent": {"llm_calls": 1, "prompt_tokens": 100, "completion_tokens": 20, "total_tokens": 120, "cost_usd": 0.5}},
+        "total": {"llm_calls": 1, "prompt_tokens": 100, "completion_tokens": 20, "total_tokens": 120, "cost_usd": 0.5}
+    }
+
+    usage_service.record_run(run_usage, run_date=datetime(2024, 12, 3, tzinfo=timezone.utc))
+    usage_service.record_run(run_usage, run_date=datetime(2024, 12, 20, tzinfo=timezone.utc))
+
+    daily_usage = usage_service.get_daily_usage("2024-12-03")
+    monthly_usage = usage_service.get_monthly_usage("2024-12")
+    assert daily_usage["runs"] == 1
+    assert monthly_usage["runs"] == 2
+    assert monthly_usage["agents"]["slack_agent"]["total_tokens"] == 240
+    assert float(monthly_usage["total"]["cost_usd"]) == pytest.approx(1.0)
+    assert usage_service.get_daily_usage("2024-12-04")["runs"] == 0
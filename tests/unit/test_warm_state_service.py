@@ -0,0 +1,98 @@
+import gzip
+import json
+import time
+
+
+class FakeSection:
+    def __init__(self, state=None, fail_hydrate=False):
+        self.state = state
+        self.fail_hydrate = fail_hydrate
+        self.hydrated = None
+
+    def export_state(self):
+        return self.state
+
+    def hydrate_state(self, state, age_seconds=0.0):
+        if self.fail_hydrate:
+            raise ValueError("bad section state")
+        self.hydrated = state
+
+    def refresh(self):
+        pass
+
+
+def _write_snapshot(path, snapshot):
+    path.write_bytes(gzip.compress(json.dumps(snapshot).encode("utf-8")))
+
+
+def _service(tmp_path, sections):
+    from services.warm_state_service import WarmStateService
+    return WarmStateService(enabled=True, path=str(tmp_path / "warm_state.json.gz"), table_name="", sections=sections)
+
+
+def test_snapshot_without_created_at_is_a_miss(fake_environment, tmp_path):
+    section = FakeSection()
+    service = _service(tmp_path, {"users": section})
+    _write_snapshot(tmp_path / "warm_state.json.gz", {"version": 1, "expires_at": time.time() + 60, "sections": {"users": {"a": 1}}})
+
+    assert service.hydrate() is False
+    assert section.hydrated is None
+
+
+def test_section_that_can_not_be_hydrated_is_left_cold(fake_environment, tmp_path):
+    broken, healthy = FakeSection(fail_hydrate=True), FakeSection()
+    service = _service(tmp_path, {"broken": broken, "healthy": healthy})
+    now = time.time()
+    _write_snapshot(tmp_path / "warm_state.json.gz", {
+        "version": 1, "created_at": now, "expires_at": now + 60, "sections": {"broken": {"a": 1}, "healthy": {"b": 2}}
+    })
+
+    assert service.hydrate() is True
+    assert broken.hydrated is None
+    assert healthy.hydrated == {"b": 2}
+
+
+def test_save_errors_do_not_fail_the_invocation(fake_environment, tmp_path):
+    class BrokenSection(FakeSection):
+        def export_state(self):
+            raise RuntimeError("export failed")
+
+    service = _service(tmp_path, {"broken": BrokenSection()})
+
+    assert service.save_if_needed() is False
+
+
+def test_background_refresh_and_invocation_save_one_at_a_time(fake_environment, tmp_path):
+    section = FakeSection(state={"a": 1})
+    service = _service(tmp_path, {"users": section})
+    write_local = service._write_local
+    writers = {"active": 0, "max_active": 0}
+
+    def slow_write_local(data):
+        writers["active"] += 1
+        writers["max_active"] = max(writers["max_active"], writers["active"])
+        time.sleep(0.02)
+        write_local(data)
+        writers["active"] -= 1
+
+    service._write_local = slow_write_local
+    refresh_thread = service.refresh_in_background()
+    assert service.save_if_needed() is True
+    refresh_thread.join()
+
+    assert writers["max_active"] == 1
+    assert service.hydrate() is True
+    assert section.hydrated == {"a": 1}
+
+
+def test_handler_answers_with_a_corrupt_snapshot(fake_environment, tmp_path, monkeypatch):
+    import app
+    from services.warm_state_service import WarmStateService
+
+    snapshot_path = tmp_path / "warm_state.json.gz"
+    snapshot_path.write_bytes(b"not a gzipped snapshot")
+    monkeypatch.setattr(app, "warm_state_service", WarmStateService(enabled=True, path=str(snapshot_path), table_name=""))
+
+    ret = app.lambda_handler({"day": "2024-12-07"}, "")
+
+    assert ret["statusCode"] == 200